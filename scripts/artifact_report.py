@@ -71,16 +71,37 @@ class ArtifactHtmlReport:
             
             html_no_escape  : if html_escape=True, list of columns not to escape
         '''
+        self.start_artifact_data_table(data_headers, source_path, len(data_list), write_total, write_location,
+                                       table_responsive, table_style, table_id)
+        self.write_artifact_data_rows(data_list, html_escape, html_no_escape)
+        self.end_artifact_data_table(cols_repeated_at_bottom)
+
+    def start_artifact_data_table(self, data_headers, source_path, num_entries=None,
+            write_total=True, write_location=True, table_responsive=True, table_style='', table_id='dtBasicExample'):
+        ''' Writes info about data and the head of the table. The rows are then written
+            with write_artifact_data_rows() (possibly in several batches) and the table is
+            closed with end_artifact_data_table().
+            num_entries    : Total number of rows, or None if not known yet (streamed rows):
+                             the total is then written by end_artifact_data_table()
+            Other parameters: see write_artifact_data_table()
+        '''
         if (not self.report_file):
             raise ValueError('Output report file is closed/unavailable!')
 
-        num_entries = len(data_list)
+        self.data_table_headers = data_headers
+        self.data_table_responsive = table_responsive
+        self.data_table_num_rows = 0
+        self.data_table_total_pos = None
         if write_total:
-            minor_header_S = f'Total number of entries: {num_entries}'
+            self.report_file.write('<h6>' + html.escape('Total number of entries: '))
+            if num_entries is None:
+                # Placeholder of fixed width, filled by end_artifact_data_table()
+                self.data_table_total_pos = self.report_file.tell()
+                num_entries = 0
+            self.report_file.write(self._total_entries_field(num_entries))
             if self.dates_filter_S is not None:
-                minor_header_S = minor_header_S + f' (Date(s):{self.dates_filter_S})'
-            self.write_minor_header(minor_header_S, 'h6')
-            # self.write_minor_header(f'Total number of entries: {num_entries}', 'h6')
+                self.report_file.write(html.escape(f' (Date(s):{self.dates_filter_S})'))
+            self.report_file.write('</h6>')
 
         if write_location:
             if is_platform_windows():
@@ -100,23 +121,46 @@ class ArtifactHtmlReport:
         self.report_file.write('<tr>' + ''.join( ('<th class="th-sm">{}</th>'.format(html.escape(str(x))) for x in data_headers) ) + '</tr>')
         self.report_file.write('</thead><tbody>')
 
+    def write_artifact_data_rows(self, data_list, html_escape=True, html_no_escape=[]):
+        ''' Writes rows (any iterable) of the table started with start_artifact_data_table()'''
+        data_headers = self.data_table_headers
+        num_rows = 0
         if html_escape:
             for row in data_list:
+                num_rows += 1
                 if html_no_escape:
                     self.report_file.write('<tr>' + ''.join( ('<td>{}</td>'.format(html.escape(str(x) if x not in [None, 'N/A'] else '')) if h not in html_no_escape else '<td>{}</td>'.format(str(x) if x not in [None, 'N/A'] else '') for x,h in zip(row, data_headers)) )  + '</tr>')
                 else:
                     self.report_file.write('<tr>' + ''.join( ('<td>{}</td>'.format(html.escape(str(x) if x not in [None, 'N/A'] else '')) for x in row) ) + '</tr>')
         else:
             for row in data_list:
+                num_rows += 1
                 self.report_file.write('<tr>' + ''.join( ('<td>{}</td>'.format(str(x) if x != None else '') for x in row) ) + '</tr>')
-        
+        self.data_table_num_rows += num_rows
+
+    def end_artifact_data_table(self, cols_repeated_at_bottom=True):
+        ''' Closes the table started with start_artifact_data_table()'''
         self.report_file.write('</tbody>')
         if cols_repeated_at_bottom:
-            self.report_file.write('<tfoot><tr>' + ''.join( ('<th>{}</th>'.format(html.escape(str(x))) for x in data_headers) ) + '</tr></tfoot>')
+            self.report_file.write('<tfoot><tr>' + ''.join( ('<th>{}</th>'.format(html.escape(str(x))) for x in self.data_table_headers) ) + '</tr></tfoot>')
         self.report_file.write('</table>')
-        if table_responsive:
+        if self.data_table_responsive:
             self.report_file.write("</div>")
 
+        if self.data_table_total_pos is not None:
+            self.report_file.seek(self.data_table_total_pos)
+            self.report_file.write(self._total_entries_field(self.data_table_num_rows))
+            self.report_file.seek(0, os.SEEK_END)
+            self.data_table_total_pos = None
+
+    def _total_entries_field(self, num_entries):
+        ''' Number of entries, padded to a fixed width when a placeholder is patched
+            (the padding is inside an HTML comment)'''
+        if self.data_table_total_pos is None:
+            return str(num_entries)
+        num_S = str(num_entries)
+        return num_S + '<!--' + ' ' * (20 - len(num_S)) + '-->'
+
     def add_section_heading(self, heading, size='h2'):
         heading = html.escape(heading)
         data = '<div class="d-flex justify-content-between flex-wrap flex-md-nowrap align-items-center pt-3 pb-2 mb-3 border-bottom">'\
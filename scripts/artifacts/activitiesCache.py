@@ -1,57 +1,156 @@
-import sqlite3
 import os
 import json
+import sqlite3
+import base64
+import binascii
 
-from scripts.artifact_report import ArtifactHtmlReport
-from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows, open_sqlite_db_readonly
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
-def get_activitiesCache(files_found, report_folder, seeker, wrap_text):
+from scripts.ilapfuncs import logfunc, is_platform_windows, SqliteQuery, run_sqlite_queries, get_sqlite_db, iter_query_batches
 
-    for file_found in files_found:
-        file_found = str(file_found)
-        
-        if not os.path.basename(file_found) == 'ActivitiesCache.db':
+# https://github.com/kacos2000/WindowsTimeline
+ACTIVITY_TYPES = {2: 'Notification', 3: 'Mobile Backup', 5: 'Open App/File/Page', 6: 'App In Use/Focus',
+                  10: 'Clipboard', 11: 'System', 12: 'System', 15: 'System', 16: 'Copy/Paste'}
+OPERATION_TYPES = {1: 'Active', 2: 'Updated', 3: 'Deleted', 4: 'Ignored'}
+
+# Platforms of the AppId entries, by preference, for the 'Application' column
+APP_PLATFORMS = ('windows_win32', 'x_exe_path', 'windows_universal', 'packageId')
+
+# Fields of the Payload JSON object reported, after the columns of the tables
+PAYLOAD_FIELDS = ('displayText', 'appDisplayName', 'description', 'contentUri', 'activeDurationSeconds', 'userTimezone')
+
+# Columns read from Activity and ActivityOperation. The row of the report is
+# built by ActivityRows: the first column is the timeline date and Id,
+# AppId, Payload and ClipboardPayload are decoded
+ACTIVITY_COLUMNS = '''datetime(StartTime, 'unixepoch', 'localtime'), datetime(EndTime, 'unixepoch', 'localtime'),
+        datetime(LastModifiedTime, 'unixepoch', 'localtime'), datetime(ExpirationTime, 'unixepoch', 'localtime'),
+        Id, AppActivityId, ActivityType, AppId, PlatformDeviceId, Payload, {clipboard}'''
+ACTIVITY_SQL = f'SELECT {ACTIVITY_COLUMNS} FROM Activity ORDER BY StartTime ASC'
+OPERATION_SQL = f'''SELECT {ACTIVITY_COLUMNS}, OperationOrder, OperationType,
+        datetime(CreatedTime, 'unixepoch', 'localtime') FROM ActivityOperation ORDER BY OperationOrder ASC'''
+
+ACTIVITY_HEADERS = ('StartTime', 'EndTime', 'LastModifiedTime', 'ExpirationTime', 'Id', 'AppActivityId', 'ActivityType',
+                    'Application', 'Packages', 'PlatformDeviceId', 'DisplayText', 'AppDisplayName', 'Description',
+                    'ContentUri', 'ActiveDurationSeconds', 'UserTimezone', 'Clipboard Text')
+OPERATION_HEADERS = ACTIVITY_HEADERS + ('OperationOrder', 'OperationType', 'CreatedTime')
+
+def decode_json(data):
+    '''Returns the decoded JSON of a TEXT/BLOB column (None if null or invalid)'''
+    if not data:
+        return None
+    try:
+        return json_loads(data)
+    except (TypeError, ValueError):
+        return None
+
+def get_application(app_id):
+    '''Returns the application of the AppId JSON list, by APP_PLATFORMS preference'''
+    entries = decode_json(app_id)
+    if not isinstance(entries, list):
+        return app_id or ''
+    applications = {entry.get('platform'): entry.get('application') for entry in entries if isinstance(entry, dict)}
+    for platform in APP_PLATFORMS:
+        if applications.get(platform):
+            return applications[platform]
+    return next((application for application in applications.values() if application), '')
+
+def get_clipboard_text(clipboard_payload):
+    '''Returns the text entries of the ClipboardPayload JSON list (base64 content)'''
+    entries = decode_json(clipboard_payload)
+    if not isinstance(entries, list):
+        return ''
+    texts = []
+    for entry in entries:
+        if not isinstance(entry, dict) or entry.get('formatName') != 'Text' or not entry.get('content'):
             continue
+        try:
+            texts.append(base64.b64decode(entry['content']).decode('utf-8', errors='replace'))
+        except (binascii.Error, ValueError):
+            texts.append(entry['content'])
+    return '\n'.join(texts)
+
+def get_type_name(value, names):
+    return f'{value} ({names[value]})' if value in names else value
 
-        db = open_sqlite_db_readonly(file_found)
-        cursor = db.cursor()
-        cursor.execute('''select Activity.AppActivityId AS AppActivityId,
-        Activity.Payload AS Payload,
-        datetime(Activity.LastModifiedTime, 'unixepoch', 'localtime') AS LastModifiedTime,
-        datetime(Activity.ExpirationTime, 'unixepoch', 'localtime') AS ExpirationTime,
-        datetime(Activity.StartTime, 'unixepoch', 'localtime') AS StartTime,
-        datetime(Activity.EndTime, 'unixepoch', 'localtime') AS EndTime
-        FROM Activity ORDER BY Activity.StartTime ASC''')
+def get_table_columns(db, table):
+    '''Returns the column names of a table (empty if the table does not exist)'''
+    cursor = db.cursor()
+    cursor.row_factory = None
+    return {row[1] for row in cursor.execute(f"PRAGMA table_info('{table}')")}
 
-        all_rows = cursor.fetchall()
-        usageentries = len(all_rows)
+def get_packages(db):
+    '''Returns Activity_PackageId as a dict ActivityId -> 'Platform: PackageName; ...', read in batches'''
+    packages = {}
+    if not get_table_columns(db, 'Activity_PackageId'):
+        return packages
+    cursor = db.cursor()
+    cursor.row_factory = None
+    cursor.execute('SELECT ActivityId, Platform, PackageName FROM Activity_PackageId')
+    for batch in iter_query_batches(cursor):
+        for activity_id, platform, package_name in batch:
+            packages.setdefault(activity_id, []).append(f'{platform}: {package_name}')
+    return {activity_id: '; '.join(names) for activity_id, names in packages.items()}
 
-        if usageentries > 0:
-            report = ArtifactHtmlReport('ActivitiesCache')
-            report.start_artifact_report(report_folder, 'ActivitiesCache')
-            report.add_script()
+class ActivityRows:
+    '''Transform of the Activity/ActivityOperation queries: decodes the Id, AppId,
+       Payload and ClipboardPayload columns and joins the packages of the activity.
+       Counts the payloads that are not a JSON object'''
 
-            data_list = []
+    def __init__(self, packages):
+        self.packages = packages
+        self.invalid_payloads = 0
 
-            data_headers = ('AppActivityId', 'DisplayText', 'AppDisplayName', 'LastModifiedTime', 'ExpirationTime', 'StartTime', 'EndTime')
-            for rows in all_rows:
-                try:
-                    payload = rows[1].decode("utf-8")
-                    payload = json.loads(payload)
-                    displayText = payload.get('displayText')
-                    appDisplayName = payload.get('appDisplayName')
+    def __call__(self, row):
+        start, end, modified, expiration, activity_id, app_activity_id, activity_type, app_id, device_id, \
+            payload, clipboard_payload = row[:11]
+        payload_object = decode_json(payload)
+        if not isinstance(payload_object, dict):
+            if payload:
+                self.invalid_payloads += 1
+            payload_object = {}
+        operation = row[11:]
+        if operation:
+            operation = (operation[0], get_type_name(operation[1], OPERATION_TYPES), operation[2])
+        return (start, end, modified, expiration, activity_id.hex() if isinstance(activity_id, bytes) else activity_id,
+                app_activity_id, get_type_name(activity_type, ACTIVITY_TYPES), get_application(app_id),
+                self.packages.get(activity_id, ''), device_id) + \
+               tuple(payload_object.get(field, '') for field in PAYLOAD_FIELDS) + \
+               (get_clipboard_text(clipboard_payload),) + operation
+
+def get_activitiesCache(files_found, report_folder, seeker, wrap_text):
 
-                    data_list.append((rows[0], displayText, appDisplayName, rows[2], rows[3], rows[4], rows[5]))
-                except:
-                    pass
+    for file_found in files_found:
+        file_found = str(file_found)
 
-            report.write_artifact_data_table(data_headers, data_list, file_found)
-            report.end_artifact_report()
+        if not os.path.basename(file_found) == 'ActivitiesCache.db':
+            continue
 
-            tsvname = f'ActivitesCache'
-            tsv(report_folder, data_headers, data_list, tsvname)
+        # ClipboardPayload only exists since Windows 10 1809
+        try:
+            db = get_sqlite_db(file_found)
+            rows = ActivityRows(get_packages(db))
+            tables = {table: get_table_columns(db, table) for table in ('Activity', 'ActivityOperation')}
+        except (sqlite3.Error, OSError) as ex:
+            logfunc(f'Error reading {file_found}: {str(ex)}')
+            continue
 
-        else:
-            logfunc(f'No ActivitiesCache data available')
+        queries = []
+        for table, sql, report_name, headers, tsvname in (
+                ('Activity', ACTIVITY_SQL, 'ActivitiesCache', ACTIVITY_HEADERS, 'ActivitesCache'),
+                ('ActivityOperation', OPERATION_SQL, 'ActivitiesCache Operations', OPERATION_HEADERS, None)):
+            columns = tables[table]
+            if not columns:
+                logfunc(f'No {report_name} data available')
+                continue
+            clipboard = 'ClipboardPayload' if 'ClipboardPayload' in columns else 'NULL'
+            queries.append(SqliteQuery(report_name, sql.format(clipboard=clipboard), headers, transform=rows,
+                                       tsvname=tsvname, tlactivity=report_name))
 
-        db.close()
\ No newline at end of file
+        # One streaming pass per table: rows are decoded batch by batch
+        run_sqlite_queries(report_folder, file_found, queries)
+        if rows.invalid_payloads:
+            logfunc(f'ActivitiesCache: {rows.invalid_payloads} payloads are not JSON objects in {file_found}')
@@ -1,70 +1,215 @@
 #!/usr/bin/env python3
+import re
 import json
 import datetime
+import itertools
 import os
+from collections import OrderedDict
 
 from scripts.artifact_report import ArtifactHtmlReport
-from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows
+from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows, iter_batches
 
-def get_betterDiscord(files_found, report_folder, seeker, wrap_text):
-    
-    for file_found in files_found:
-        file_found = str(file_found)
-        if not os.path.basename(file_found) == 'MessageLoggerV2Data.config.json': # skip -journal and other files
+READ_CHUNK_SIZE = 1024 * 1024   # characters read at once from the log
+MAX_REPLY_DEPTH = 100           # longest reply chain shown for a message
+MESSAGES_INDEX_SIZE = 100000    # latest messages kept for the reply chains
+
+# Next structural character of a JSON value, end of a JSON string
+STRUCTURE_RE = re.compile(r'["{}\[\]]')
+STRING_END_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# Characters that may still follow a number up to the end of the buffer
+NUMBER_TAIL_RE = re.compile(r'[0-9.eE+\-]*\Z')
+
+class JsonStreamReader:
+    '''Pull parser over a JSON text file: objects are walked member by member
+       (iter_members()) and only the values asked for are decoded, the others
+       are skipped without being built. Only the unread part of the current
+       chunk is kept in memory.'''
+
+    def __init__(self, fp, chunk_size=READ_CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        '''Reads the next chunk (dropping what was consumed), False at end of file'''
+        chunk = '' if self.eof else self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        '''Returns the next non-whitespace character ('' at end of file)'''
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n\ufeff':
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f'JSON: expected {char!r} at {self.buffer[self.pos:self.pos + 20]!r}')
+        self.pos += 1
+
+    def decode_value(self):
+        '''Decodes the value at the current position'''
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number could go on in the next chunk ('1.' is decoded as 1)
+                if self.eof or not isinstance(value, (int, float)) or not NUMBER_TAIL_RE.match(self.buffer, end):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def skip_value(self):
+        '''Skips the value at the current position without decoding it'''
+        if self.peek() not in ('{', '['):
+            self.decode_value()
+            return
+        depth = 0
+        while True:
+            match = STRUCTURE_RE.search(self.buffer, self.pos)
+            if match is None:
+                self.pos = len(self.buffer)
+                if not self._fill():
+                    raise ValueError('JSON: unexpected end of file')
+                continue
+            char = match.group()
+            if char == '"':
+                # Strings are skipped whole: they may hold any other character
+                self.pos = match.start()
+                end = STRING_END_RE.match(self.buffer, self.pos + 1)
+                while end is None:
+                    if not self._fill():
+                        raise ValueError('JSON: unexpected end of file')
+                    end = STRING_END_RE.match(self.buffer, self.pos + 1)
+                self.pos = end.end()
+                continue
+            self.pos = match.end()
+            depth += 1 if char in '{[' else -1
+            if depth == 0:
+                return
+
+    def iter_members(self):
+        '''Yields the keys of the object at the current position; the caller
+           must decode_value() or skip_value() each member before the next one'''
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.decode_value()
+            self.expect(':')
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f'JSON: expected \',\' or \'}}\' at {self.buffer[self.pos - 1:self.pos + 20]!r}')
+
+def iter_message_records(fp):
+    '''Yields the entries of data.messageRecord of a MessageLoggerV2 log, one at a time'''
+    reader = JsonStreamReader(fp)
+    for key in reader.iter_members():
+        if key != 'data':
+            reader.skip_value()
             continue
-    
-        with open(file_found, "r") as fp:
-            deserialized = json.load(fp)
-        
-        data_list = []
-        for key, value in deserialized['data'].items():
-            #print(key)
-            if key == "messageRecord":
-                for keylin, valuein in value.items():
-                    #print(valuein['message'])
-                    timestamp = valuein['message']['timestamp']
-                    timestamp = datetime.datetime.fromtimestamp(int(timestamp)/1000).strftime('%Y-%m-%d %H:%M:%S.%f')
-                    username = valuein['message']['author']['username']
-                    content = valuein['message']['content']
-                    referencing = valuein['message'].get('referenced_message')
-                    aggregator = ' '
-                    if referencing:
-                        control = 1
-                        aggregator = aggregator + ('<table>')
-                        while(control):
-                            aggregator = aggregator +('<tr>')
-                            timestamp_in = referencing.get('timestamp')
-                            timestamp_in = datetime.datetime.fromtimestamp(int(timestamp_in)/1000).strftime('%Y-%m-%d %H:%M:%S.%f')
-                            username_in = referencing['author'].get('username')
-                            content_in = referencing.get('content')
-                            referencing = referencing.get('referenced_message')
-                            aggregator = aggregator + f'<td>{timestamp_in}</td>'
-                            aggregator = aggregator + f'<td>{username_in}</td>'
-                            aggregator = aggregator + f'<td>{content_in}</td>'
-                            aggregator = aggregator +('</tr>')
-                            if referencing:
-                                control = 1
-                            else:
-                                control = 0
-                                aggregator = aggregator + ('</table>')
-                    data_list.append((timestamp, username, content, aggregator.strip()))
-    
-    num_entries = len(data_list)
-    if num_entries > 0:
-        report = ArtifactHtmlReport('Better Discord')
-        report.start_artifact_report(report_folder, 'Better Discord')
-        report.add_script()
-        data_headers = ('Timestamp','Username','Content','Referenced Messages')
-        
-        report.write_artifact_data_table(data_headers, data_list, file_found,html_no_escape=['Referenced Messages'])
-        report.end_artifact_report()
-        
+        for data_key in reader.iter_members():
+            if data_key != 'messageRecord':
+                reader.skip_value()
+                continue
+            for _message_id in reader.iter_members():
+                yield reader.decode_value()
+
+def format_timestamp(timestamp):
+    return datetime.datetime.fromtimestamp(int(timestamp)/1000).strftime('%Y-%m-%d %H:%M:%S.%f')
+
+def get_reference_id(message):
+    '''Returns the id of the message 'message' replies to (None if none)'''
+    reference = message.get('message_reference') or {}
+    referencing = message.get('referenced_message') or {}
+    return reference.get('message_id') or referencing.get('id')
+
+def get_reply_chain(message, messages_index):
+    '''Returns the HTML table of the messages 'message' replies to: the nested
+       'referenced_message' entries, continued through the message-id index
+       (id -> (timestamp, username, content, reply id)) when they stop'''
+    parts = []
+    seen = set()
+    referencing = message.get('referenced_message')
+    reference_id = get_reference_id(message)
+    while len(parts) < MAX_REPLY_DEPTH:
+        if referencing:
+            entry = (format_timestamp(referencing.get('timestamp')), (referencing.get('author') or {}).get('username'),
+                     referencing.get('content'), get_reference_id(referencing))
+            seen.add(referencing.get('id'))
+            referencing = referencing.get('referenced_message')
+        elif reference_id in messages_index and reference_id not in seen:
+            entry = messages_index[reference_id]
+            seen.add(reference_id)
+        else:
+            break
+        parts.append(f'<tr><td>{entry[0]}</td><td>{entry[1]}</td><td>{entry[2]}</td></tr>')
+        reference_id = entry[3]
+    if not parts:
+        return ''
+    return ''.join(['<table>'] + parts + ['</table>'])
+
+def iter_rows(file_found, messages_index):
+    '''Yields the rows of the messageRecord entries of a log, adding each message to
+       the index (the oldest messages are dropped after MESSAGES_INDEX_SIZE)'''
+    with open(file_found, "r", encoding='utf-8', errors='replace') as fp:
+        for record in iter_message_records(fp):
+            message = record['message']
+            timestamp = format_timestamp(message['timestamp'])
+            username = message['author']['username']
+            content = message['content']
+            messages_index[message.get('id')] = (timestamp, username, content, get_reference_id(message))
+            if len(messages_index) > MESSAGES_INDEX_SIZE:
+                messages_index.popitem(last=False)
+            yield (timestamp, username, content, get_reply_chain(message, messages_index))
+
+def get_betterDiscord(files_found, report_folder, seeker, wrap_text):
+
+    log_files = [str(file_found) for file_found in files_found
+                 if os.path.basename(str(file_found)) == 'MessageLoggerV2Data.config.json'] # skip -journal and other files
+
+    # Latest messages read, for the reply chains: id -> (timestamp, username, content, reply id).
+    # Replies usually nest the message they answer ('referenced_message'): the
+    # index is only used where that nesting stops
+    messages_index = OrderedDict()
+    rows = itertools.chain.from_iterable(iter_rows(file_found, messages_index) for file_found in log_files)
+    report = None
+    data_headers = ('Timestamp','Username','Content','Referenced Messages')
+    for data_list in iter_batches(rows):
+        if report is None:
+            report = ArtifactHtmlReport('Better Discord')
+            report.start_artifact_report(report_folder, 'Better Discord')
+            report.add_script()
+            report.start_artifact_data_table(data_headers, ', '.join(log_files))
+
+        # Rows are written batch by batch to the HTML, TSV and timeline
+        report.write_artifact_data_rows(data_list, html_no_escape=['Referenced Messages'])
+
         tsvname = f'Better Discord'
         tsv(report_folder, data_headers, data_list, tsvname)
-        
+
         tlactivity = f'Better Discord'
         timeline(report_folder, tlactivity, data_list, data_headers)
+
+    if report is not None:
+        report.end_artifact_data_table()
+        report.end_artifact_report()
     else:
         logfunc('No Better Discord data available')
-        
-    
\ No newline at end of file
@@ -1,8 +1,7 @@
 import os
 import datetime
 
-from scripts.artifact_report import ArtifactHtmlReport
-from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows, open_sqlite_db_readonly
+from scripts.ilapfuncs import logfunc, is_platform_windows, SqliteQuery, run_sqlite_queries
 
 # https://gist.github.com/gamesbook/03d030b7b79370fb6b2a67163a8ac3b5
 def convert_dotnet_tick(ticks):
@@ -16,32 +15,11 @@ def convert_dotnet_tick(ticks):
         _date = _date.replace(year=_date.year + 1900)
     return _date.strftime("%Y-%m-%dT%H:%M:%S.%fZ")[:-3]
 
-def get_dropbox(files_found, report_folder, seeker, wrap_text):
-    cachefiles_db = ''
-    contacts_db = ''
-    sync_history_db = ''
-    source_file_cachefiles = ''
-    source_file_contacts = ''
-    source_file_sync_history = ''
-
-    for file_found in files_found:
-        
-        if file_found.endswith("cachefiles.sqlite"):
-            cachefiles_db = str(file_found)
-            source_file_cachefiles = file_found.replace(seeker.directory, '')
+def convert_cache_item_ticks(row):
+    '''Converts LastAccessDateTime and LocalLastModifiedTime (.NET ticks)'''
+    return row[:4] + tuple(None if ticks is None else convert_dotnet_tick(ticks) for ticks in row[4:6])
 
-        elif file_found.endswith("contacts.sqlite"):
-            contacts_db = str(file_found)
-            source_file_contacts = file_found.replace(seeker.directory, '')
-
-        elif file_found.endswith("sync_history.db"):
-            sync_history_db = str(file_found)
-            source_file_sync_history = file_found.replace(seeker.directory, '')
-
-    db = open_sqlite_db_readonly(cachefiles_db)
-    cursor = db.cursor()
-    try:
-        cursor.execute('''select 
+CACHE_ITEM_QUERY = SqliteQuery('Dropbox App - CacheItem', '''select 
             CacheItem.FileName AS FileName,
             CacheItem.Path AS Path,
             CacheItem.LocalFileSize AS Filesize,
@@ -49,71 +27,21 @@ def get_dropbox(files_found, report_folder, seeker, wrap_text):
             CacheItem.LastAccessDateTime AS LastAccessDateTime,
             CacheItem.LocalLastModifiedTime AS LocalLastModifiedTime
             from CacheItem ORDER BY CacheItem.LastAccessDateTime desc
-        ''')
-        all_rows = cursor.fetchall()
-        usageentries = len(all_rows)
-    except:
-        usageentries = 0
-
-    if usageentries > 0:
-        report = ArtifactHtmlReport('Dropbox App - CacheItem')
-        report.start_artifact_report(report_folder, 'Dropbox App - CacheItem')
-        report.add_script()
-        data_headers = ('Filename', 'Path', 'Filesize', 'Hash', 'LastAccessDateTime', 'LocalLastModifiedTime')
-        
-        data_list = []
-        for rows in all_rows:
-            data_list.append((rows[0], rows[1], rows[2], rows[3], convert_dotnet_tick(rows[4]), convert_dotnet_tick(rows[5])))
-
-        report.write_artifact_data_table(data_headers, data_list, cachefiles_db)
-        report.end_artifact_report()
-
-        tsvname = f'Dropbox App - CacheItem'
-        tsv(report_folder, data_headers, data_list, tsvname, source_file_cachefiles)
-    else:
-        logfunc('No cachefiles.sqlite - CacheItem available')
+        ''',
+    ('Filename', 'Path', 'Filesize', 'Hash', 'LastAccessDateTime', 'LocalLastModifiedTime'),
+    transform=convert_cache_item_ticks, no_data_msg='No cachefiles.sqlite - CacheItem available')
 
-    db.close()
-
-    db = open_sqlite_db_readonly(contacts_db)
-    cursor = db.cursor()
-    try:
-        cursor.execute('''select 
+CONTACT_ITEM_QUERY = SqliteQuery('Dropbox App - ContactItem', '''select 
             ContactItem.Email AS Email,
             ContactItem.DBId AS DBId,
             ContactItem.PhotoUrl AS PhotoUrl,
             ContactItem.Name AS Name
             from ContactItem
-        ''')
-        all_rows = cursor.fetchall()
-        usageentries = len(all_rows)
-    except:
-        usageentries = 0
-
-    if usageentries > 0:
-        report = ArtifactHtmlReport('Dropbox App - ContactItem')
-        report.start_artifact_report(report_folder, 'Dropbox App - ContactItem')
-        report.add_script()
-        data_headers = ('Email', 'DBId', 'PhotoUrl', 'Name')
-        
-        data_list = []
-        for rows in all_rows:
-            data_list.append((rows[0], rows[1], rows[2], rows[3]))
-
-        report.write_artifact_data_table(data_headers, data_list, contacts_db)
-        report.end_artifact_report()
+        ''',
+    ('Email', 'DBId', 'PhotoUrl', 'Name'),
+    no_data_msg='No contacts.sqlite - ContactItem available')
 
-        tsvname = f'Dropbox App - ContactItem'
-        tsv(report_folder, data_headers, data_list, tsvname, source_file_contacts)
-    else:
-        logfunc('No contacts.sqlite - ContactItem available')
-
-    db.close()
-
-    db = open_sqlite_db_readonly(sync_history_db)
-    cursor = db.cursor()
-    try:
-        cursor.execute('''select 
+SYNC_HISTORY_QUERY = SqliteQuery('Dropbox - Sync History', '''select 
             sync_history.event_type AS event_type,
             sync_history.file_event_type AS file_event_type,
             sync_history.direction AS direction,
@@ -121,26 +49,32 @@ def get_dropbox(files_found, report_folder, seeker, wrap_text):
             sync_history.other_user AS other_user,
             datetime(sync_history.timestamp, 'unixepoch', 'localtime') AS timestamp
             from sync_history ORDER BY timestamp desc
-        ''')
-        all_rows = cursor.fetchall()
-        usageentries = len(all_rows)
-    except:
-        usageentries = 0
+        ''',
+    ('Event Type', 'File Event Type', 'Direction', 'local_path', 'other_user', 'timestamp'),
+    no_data_msg='No sync_history.db - sync_history available')
 
-    if usageentries > 0:
-        report = ArtifactHtmlReport('Dropbox - Sync History')
-        report.start_artifact_report(report_folder, 'Dropbox - Sync History')
-        report.add_script()
-        data_headers = ('Event Type', 'File Event Type', 'Direction', 'local_path', 'other_user', 'timestamp')
+def get_dropbox(files_found, report_folder, seeker, wrap_text):
+    cachefiles_db = ''
+    contacts_db = ''
+    sync_history_db = ''
+    source_file_cachefiles = ''
+    source_file_contacts = ''
+    source_file_sync_history = ''
+
+    for file_found in files_found:
         
-        data_list = []
-        for rows in all_rows:
-            data_list.append((rows[0], rows[1], rows[2], rows[3], rows[4], rows[5]))
+        if file_found.endswith("cachefiles.sqlite"):
+            cachefiles_db = str(file_found)
+            source_file_cachefiles = file_found.replace(seeker.directory, '')
+
+        elif file_found.endswith("contacts.sqlite"):
+            contacts_db = str(file_found)
+            source_file_contacts = file_found.replace(seeker.directory, '')
 
-        report.write_artifact_data_table(data_headers, data_list, sync_history_db)
-        report.end_artifact_report()
+        elif file_found.endswith("sync_history.db"):
+            sync_history_db = str(file_found)
+            source_file_sync_history = file_found.replace(seeker.directory, '')
 
-        tsvname = f'Dropbox - Sync History'
-        tsv(report_folder, data_headers, data_list, tsvname, source_file_sync_history)
-    else:
-        logfunc('No sync_history.db - sync_history available')
\ No newline at end of file
+    run_sqlite_queries(report_folder, cachefiles_db, (CACHE_ITEM_QUERY,), tsv_source=source_file_cachefiles)
+    run_sqlite_queries(report_folder, contacts_db, (CONTACT_ITEM_QUERY,), tsv_source=source_file_contacts)
+    run_sqlite_queries(report_folder, sync_history_db, (SYNC_HISTORY_QUERY,), tsv_source=source_file_sync_history)
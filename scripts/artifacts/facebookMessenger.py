@@ -2,20 +2,9 @@ import os
 import datetime
 import re
 
-from scripts.artifact_report import ArtifactHtmlReport
-from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows, open_sqlite_db_readonly
+from scripts.ilapfuncs import logfunc, is_platform_windows, SqliteQuery, run_sqlite_queries
 
-def get_facebookMessenger(files_found, report_folder, seeker, wrap_text):
-
-    for file_found in files_found:
-        file_found = str(file_found)
-        if not re.search(r"msys_[0-9]*.db", file_found):
-            continue
-
-        db = open_sqlite_db_readonly(file_found)
-        cursor = db.cursor()
-
-        cursor.execute('''select 
+MESSAGES_QUERY = SqliteQuery('Facebook Messenger - Messages', '''select 
             contacts.name AS name,
 			contacts.username AS usernmae,
             thread_messages.text AS text,
@@ -25,32 +14,11 @@ def get_facebookMessenger(files_found, report_folder, seeker, wrap_text):
             thread_messages.nullstate_description_text3 AS description3,
 			thread_messages.profile_picture_url AS profile_picture_url
             from thread_messages join contacts on contacts.id = thread_messages.sender_id
-        ''')
-
-        all_rows = cursor.fetchall()
-        usageentries = len(all_rows)
-
-        if usageentries > 0:
-            report = ArtifactHtmlReport('Facebook Messenger - Messages')
-            report.start_artifact_report(report_folder, 'Facebook Messenger - Messages')
-            report.add_script()
+        ''',
+    ('name', 'username', 'text', 'timestamp', 'description1', 'description2', 'description3', 'profile_picture_url'),
+    no_data_msg='No Facebook Messenger - Messages available')
 
-            data_list = []
-
-            data_headers = ('name', 'username', 'text', 'timestamp', 'description1', 'description2', 'description3', 'profile_picture_url')
-            for rows in all_rows:
-                data_list.append((rows[0], rows[1], rows[2], rows[3], rows[4], rows[5], rows[6], rows[7]))
-
-            report.write_artifact_data_table(data_headers, data_list, file_found)
-            report.end_artifact_report()
-
-            tsvname = f'Facebook Messenger - Messages'
-            tsv(report_folder, data_headers, data_list, tsvname)
-
-        else:
-            logfunc(f'No Facebook Messenger - Messages available')
-
-        cursor.execute('''select 
+STORIES_QUERY = SqliteQuery('Facebook Messenger - Stories', '''select 
             bucket_stories.bucket_id AS bucket_id,
             bucket_stories.owner_id AS owner_id,
             bucket_stories.bucket_name AS bucket_name,
@@ -59,32 +27,11 @@ def get_facebookMessenger(files_found, report_folder, seeker, wrap_text):
             bucket_stories.media_playable_url AS media_playable_url,
             bucket_stories.media_thumbnail_url AS media_thumbnail_url
             from bucket_stories ORDER BY timestamp ASC
-        ''')
-
-        all_rows = cursor.fetchall()
-        usageentries = len(all_rows)
-
-        if usageentries > 0:
-            report = ArtifactHtmlReport('Facebook Messenger - Stories')
-            report.start_artifact_report(report_folder, 'Facebook Messenger - Stories')
-            report.add_script()
-
-            data_list = []
-
-            data_headers = ('bucket_id', 'owner_id', 'bucket_name', 'media_url', 'media_playable_url', 'media_thumbnail_url', 'timestamp')
-            for rows in all_rows:
-                data_list.append((rows[0], rows[1], rows[2], rows[3], rows[4], rows[5], rows[6]))
+        ''',
+    ('bucket_id', 'owner_id', 'bucket_name', 'media_url', 'media_playable_url', 'media_thumbnail_url', 'timestamp'),
+    no_data_msg='No Facebook Messenger - Stories available')
 
-            report.write_artifact_data_table(data_headers, data_list, file_found)
-            report.end_artifact_report()
-
-            tsvname = f'Facebook Messenger - Stories'
-            tsv(report_folder, data_headers, data_list, tsvname)
-
-        else:
-            logfunc(f'No Facebook Messenger - Stories available')
-
-        cursor.execute('''select 
+CONTACTS_QUERY = SqliteQuery('Facebook Messenger - Contacts', '''select 
             contacts.id AS id,
             contacts.username AS username,
             contacts.name AS name,
@@ -99,32 +46,11 @@ def get_facebookMessenger(files_found, report_folder, seeker, wrap_text):
             contacts.profile_picture_url AS profile_picture_url,
             contacts.profile_picture_large_url AS profile_picture_large_url
             from contacts
-        ''')
-
-        all_rows = cursor.fetchall()
-        usageentries = len(all_rows)
-
-        if usageentries > 0:
-            report = ArtifactHtmlReport('Facebook Messenger - Contacts')
-            report.start_artifact_report(report_folder, 'Facebook Messenger - Contacts')
-            report.add_script()
-
-            data_list = []
-
-            data_headers = ('id', 'username', 'name', 'first_name', 'last_name', 'birthday', 'is_messenger_user', 'profile_picture_url', 'profile_picture_large_url')
-            for rows in all_rows:
-                data_list.append((rows[0], rows[1], rows[2], rows[3], rows[4], rows[5], rows[6], rows[7], rows[8]))
-
-            report.write_artifact_data_table(data_headers, data_list, file_found)
-            report.end_artifact_report()
-
-            tsvname = f'Facebook Messenger - Contacts'
-            tsv(report_folder, data_headers, data_list, tsvname)
-
-        else:
-            logfunc(f'No Facebook Messenger - Contacts available')
+        ''',
+    ('id', 'username', 'name', 'first_name', 'last_name', 'birthday', 'is_messenger_user', 'profile_picture_url', 'profile_picture_large_url'),
+    no_data_msg='No Facebook Messenger - Contacts available')
 
-        cursor.execute('''select 
+ATTACHMENTS_QUERY = SqliteQuery('Facebook Messenger - Attachments', '''select 
             attachments.filename AS filename,
             attachments.filesize AS filesize,
             datetime(ROUND(attachments.timestamp_ms / 1000), 'unixepoch', 'localtime') AS timestamp,
@@ -132,29 +58,17 @@ def get_facebookMessenger(files_found, report_folder, seeker, wrap_text):
             attachments.playable_url_mime_type AS playable_url_mime_type,
             attachments.accessibility_summary_text AS summary_text
             from attachments ORDER BY timestamp ASC
-        ''')
+        ''',
+    ('filename', 'filesize', 'timestamp', 'playable_url', 'playable_url_mime_type', 'summary_text'),
+    no_data_msg='No Facebook Messenger - Attachments available')
 
-        all_rows = cursor.fetchall()
-        usageentries = len(all_rows)
+MESSENGER_QUERIES = (MESSAGES_QUERY, STORIES_QUERY, CONTACTS_QUERY, ATTACHMENTS_QUERY)
 
-        if usageentries > 0:
-            report = ArtifactHtmlReport('Facebook Messenger - Attachments')
-            report.start_artifact_report(report_folder, 'Facebook Messenger - Attachments')
-            report.add_script()
-
-            data_list = []
-
-            data_headers = ('filename', 'filesize', 'timestamp', 'playable_url', 'playable_url_mime_type', 'summary_text')
-            for rows in all_rows:
-                data_list.append((rows[0], rows[1], rows[2], rows[3], rows[4], rows[5]))
-
-            report.write_artifact_data_table(data_headers, data_list, file_found)
-            report.end_artifact_report()
-
-            tsvname = f'Facebook Messenger - Attachments'
-            tsv(report_folder, data_headers, data_list, tsvname)
+def get_facebookMessenger(files_found, report_folder, seeker, wrap_text):
 
-        else:
-            logfunc(f'No Facebook Messenger - Attachments available')
+    for file_found in files_found:
+        file_found = str(file_found)
+        if not re.search(r"msys_[0-9]*.db", file_found):
+            continue
 
-        db.close()
\ No newline at end of file
+        run_sqlite_queries(report_folder, file_found, MESSENGER_QUERIES)
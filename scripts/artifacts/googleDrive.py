@@ -1,19 +1,8 @@
 import os
 
-from scripts.artifact_report import ArtifactHtmlReport
-from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows, open_sqlite_db_readonly
+from scripts.ilapfuncs import logfunc, is_platform_windows, SqliteQuery, run_sqlite_queries
 
-def get_googleDrive(files_found, report_folder, seeker, wrap_text):
-
-    for file_found in files_found:
-        file_found = str(file_found)
-        if not os.path.basename(file_found) == "metadata_sqlite_db":
-            continue
-
-        db = open_sqlite_db_readonly(file_found)
-        cursor = db.cursor()
-
-        cursor.execute('''select items.local_title AS local_title,
+ITEMS_QUERY = SqliteQuery('Google Drive', '''select items.local_title AS local_title,
         items.file_size AS file_size,
         items.mime_type AS mime_type,
         CASE
@@ -29,29 +18,15 @@ def get_googleDrive(files_found, report_folder, seeker, wrap_text):
         datetime(ROUND("modified_date" / 1000), 'unixepoch', 'localtime') AS modified_date,
         datetime(ROUND("shared_with_me_date" / 1000), 'unixepoch', 'localtime') AS shared_with_me_date,
         datetime(ROUND("viewed_by_me_date" / 1000), 'unixepoch', 'localtime') AS viewed_by_me_date
-        FROM items''')
-
-        all_rows = cursor.fetchall()
-        usageentries = len(all_rows)
+        FROM items''',
+    ('local_title', 'file_size', 'mime_type', 'trashed', 'is_owner', 'modified_date', 'shared_with_me_date', 'viewed_by_me_date'),
+    no_data_msg='No Windows Google Drive data available')
 
-        if usageentries > 0:
-            report = ArtifactHtmlReport('Google Drive')
-            report.start_artifact_report(report_folder, 'Google Drive')
-            report.add_script()
-
-            data_list = []
-
-            data_headers = ('local_title', 'file_size', 'mime_type', 'trashed', 'is_owner', 'modified_date', 'shared_with_me_date', 'viewed_by_me_date')
-            for rows in all_rows:
-                data_list.append((rows[0], rows[1], rows[2], rows[3], rows[4], rows[5], rows[6], rows[7]))
-
-            report.write_artifact_data_table(data_headers, data_list, file_found)
-            report.end_artifact_report()
-
-            tsvname = f'Google Drive'
-            tsv(report_folder, data_headers, data_list, tsvname)
+def get_googleDrive(files_found, report_folder, seeker, wrap_text):
 
-        else:
-            logfunc(f'No Windows Google Drive data available')
+    for file_found in files_found:
+        file_found = str(file_found)
+        if not os.path.basename(file_found) == "metadata_sqlite_db":
+            continue
 
-        db.close()
\ No newline at end of file
+        run_sqlite_queries(report_folder, file_found, (ITEMS_QUERY,))
@@ -1,40 +1,117 @@
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 
 from scripts.artifact_report import ArtifactHtmlReport
 from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows
 
-def get_setupapiDev(files_found, report_folder, seeker, wrap_text):
+DATA_HEADERS = ('Section Start', 'Section End', 'Section Type', 'Name', 'VID', 'PID', 'Serial', 'Status', 'Log File')
+
+READ_BUFFER_SIZE = 1024 * 1024  # bytes read at once from the log
+
+# Rotations are parsed by a pool of processes only when they add up to
+# PARALLEL_MIN_SIZE bytes: starting the pool costs more for small logs
+PARALLEL_MIN_SIZE = 32 * 1024 * 1024
+
+# Lines of a section:
+#   >>>  [Device Install (Hardware initiated) - USB\VID_0781&PID_5567\4C530001230612117301]
+#   >>>  Section start 2023/01/12 10:15:32.123
+#   <<<  Section end 2023/01/12 10:15:35.456
+#   <<<  [Exit status: SUCCESS]
+SECTION_HEADER = '>>>  ['
+SECTION_START = '>>>  Section start '
+SECTION_END = '<<<  Section end '
+EXIT_STATUS = '<<<  [Exit status: '
+
+VID_PID_RE = re.compile(r'VID_([0-9A-Fa-f]{4})&PID_([0-9A-Fa-f]{4})')
+SECTION_DATE_RE = re.compile(r'^(\d{4})/(\d{2})/(\d{2}) ')
 
-    for file_found in files_found:
-        file_found = str(file_found)
-        if not os.path.basename(file_found) == "setupapi.dev.log":
-            continue
+def get_device_ids(name):
+    '''Returns the (VID, PID, serial) of a USB device instance ID ('' if absent)'''
+    match = VID_PID_RE.search(name)
+    vid, pid = (match.group(1), match.group(2)) if match else ('', '')
+    parts = name.split('\\')
+    serial = parts[2] if len(parts) >= 3 and parts[0].upper().startswith('USB') else ''
+    return vid, pid, serial
 
-        with open(file_found, "r") as fp:
-            data = fp.read()
+def get_timeline_date(date):
+    '''Returns a section date (2023/01/12 10:15:32.123) as the timeline key of the
+       other artifacts (2023-01-12 10:15:32.123), so that keys compare as text'''
+    return SECTION_DATE_RE.sub(r'\1-\2-\3 ', date, count=1)
 
-        split_data = re.split("\[Device Install \(Hardware initiated\) - ", data)
+def make_row(header, start, end, status, log_name):
+    section_type, _sep, name = header.partition(' - ')
+    vid, pid, serial = get_device_ids(name)
+    return (start, end, section_type, name, vid, pid, serial, status, log_name)
+
+def parse_setupapi_log(file_found):
+    '''Returns the sections of a setupapi.dev log, read in one pass line by line.
+       A section ends with its exit status, the next header or the end of file'''
+    log_name = os.path.basename(file_found)
+    data_list = []
+    header = None
+    start = end = status = ''
+    with open(file_found, 'r', encoding='utf-8', errors='replace', buffering=READ_BUFFER_SIZE) as fp:
+        for line in fp:
+            if line.startswith(SECTION_HEADER):
+                if header is not None:
+                    data_list.append(make_row(header, start, end, status, log_name))
+                header = line[len(SECTION_HEADER):].rstrip().rstrip(']')
+                start = end = status = ''
+            elif header is None:
+                continue
+            elif line.startswith(SECTION_START):
+                start = line[len(SECTION_START):].strip()
+            elif line.startswith(SECTION_END):
+                end = line[len(SECTION_END):].strip()
+            elif line.startswith(EXIT_STATUS):
+                status = line[len(EXIT_STATUS):].rstrip().rstrip(']')
+                data_list.append(make_row(header, start, end, status, log_name))
+                header = None
+    if header is not None:
+        data_list.append(make_row(header, start, end, status, log_name))
+    # 'Boot Session' headers are not sections: they have no start
+    return [row for row in data_list if row[0]]
+
+def iter_parsed_logs(log_files):
+    '''Yields the sections of each log, in the order of log_files. Several logs
+       (rotations) are parsed concurrently by a process pool if they are large'''
+    if len(log_files) < 2 or (os.cpu_count() or 1) < 2 or \
+            sum(os.path.getsize(file_found) for file_found in log_files) < PARALLEL_MIN_SIZE:
+        for file_found in log_files:
+            yield parse_setupapi_log(file_found)
+        return
+    with ProcessPoolExecutor() as executor:
+        yield from executor.map(parse_setupapi_log, log_files)
+
+def get_setupapiDev(files_found, report_folder, seeker, wrap_text):
 
-        if len(split_data) > 0:
-            del split_data[0] # index 0 is trash data
-            report = ArtifactHtmlReport("setupapi.dev.log")
-            report.start_artifact_report(report_folder, 'setupapi.dev.log')
-            report.add_script()
-        
-            data_list = []
+    # Rotations (setupapi.dev.YYYYMMDD_HHMMSS.log) oldest first, then the current log
+    log_files = [str(file_found) for file_found in files_found
+                 if re.fullmatch(r'setupapi\.dev(\.[^\\/]+)?\.log', os.path.basename(str(file_found)))]
+    log_files.sort(key=lambda path: (os.path.dirname(path), os.path.basename(path) == 'setupapi.dev.log', path))
 
-            data_headers = ('Name', 'First Connection Time')
-            for i in split_data:
-                name = i.split("]")[0]
-                firstConnectionTime = i.split("Section start ")[1].split("\n")[0]
-                data_list.append((name, firstConnectionTime))
+    if log_files:
+        report = ArtifactHtmlReport("setupapi.dev.log")
+        report.start_artifact_report(report_folder, 'setupapi.dev.log')
+        report.add_script()
 
-            report.write_artifact_data_table(data_headers, data_list, file_found)
-            report.end_artifact_report()
+        data_headers = DATA_HEADERS
+        tsvname = f'setupapi.dev.log'
+        tlactivity = f'setupapi.dev.log USB Devices'
 
-            tsvname = f'setupapi.dev.log'
+        # Sections are written log by log; only USB devices go to the timeline
+        report.start_artifact_data_table(data_headers, ', '.join(log_files))
+        for data_list in iter_parsed_logs(log_files):
+            if not data_list:
+                continue
+            report.write_artifact_data_rows(data_list)
             tsv(report_folder, data_headers, data_list, tsvname)
+            usb_list = [(get_timeline_date(row[0]),) + row[1:] for row in data_list if row[4] or row[6]]
+            if usb_list:
+                timeline(report_folder, tlactivity, usb_list, data_headers)
+        report.end_artifact_data_table()
+        report.end_artifact_report()
 
-        else:
-            logfunc(f'No setupapi.dev.log data available')
\ No newline at end of file
+    else:
+        logfunc(f'No setupapi.dev.log data available')
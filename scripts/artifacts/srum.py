@@ -0,0 +1,130 @@
+import os
+import struct
+import datetime
+
+from scripts.artifact_report import ArtifactHtmlReport
+from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows, open_ese_db, get_ese_data, \
+    convert_file_time, day_time_to_text, iter_batches
+
+# Kinds of the columns read from the SRUM extension tables
+INTEGER, APP, USER, OLE_TIME, FILE_TIME = range(5)
+
+TIMESTAMP_COLUMN = ('Timestamp', 'TimeStamp', OLE_TIME)
+APP_COLUMN = ('Application', 'AppId', APP)
+USER_COLUMN = ('User', 'UserId', USER)
+
+# SRUM extension tables reported: (table name, report name, columns), with
+# the columns as (header, column name, kind). The first column is the
+# timestamp of the row, used for the timeline.
+SRUM_TABLES = (
+    ('{973F5D5C-1D90-4944-BE8E-24B94231A174}', 'SRUM Network Data Usage', (
+        TIMESTAMP_COLUMN, APP_COLUMN, USER_COLUMN,
+        ('Interface LUID', 'InterfaceLuid', INTEGER), ('Profile ID', 'L2ProfileId', INTEGER),
+        ('Bytes Sent', 'BytesSent', INTEGER), ('Bytes Received', 'BytesRecvd', INTEGER))),
+    ('{DD6636C4-8929-4683-974E-22C046A43763}', 'SRUM Network Connectivity', (
+        TIMESTAMP_COLUMN, APP_COLUMN, USER_COLUMN,
+        ('Interface LUID', 'InterfaceLuid', INTEGER), ('Profile ID', 'L2ProfileId', INTEGER),
+        ('Connected Time (s)', 'ConnectedTime', INTEGER), ('Connect Start Time', 'ConnectStartTime', FILE_TIME))),
+    ('{D10CA2FE-6FCF-4F6D-848E-B2E99266FA89}', 'SRUM Application Resource Usage', (
+        TIMESTAMP_COLUMN, APP_COLUMN, USER_COLUMN,
+        ('Foreground Cycle Time', 'ForegroundCycleTime', INTEGER),
+        ('Background Cycle Time', 'BackgroundCycleTime', INTEGER), ('Face Time', 'FaceTime', INTEGER),
+        ('Foreground Bytes Read', 'ForegroundBytesRead', INTEGER),
+        ('Foreground Bytes Written', 'ForegroundBytesWritten', INTEGER),
+        ('Background Bytes Read', 'BackgroundBytesRead', INTEGER),
+        ('Background Bytes Written', 'BackgroundBytesWritten', INTEGER))),
+    ('{D10CA2FE-6FCF-4F6D-848E-B2E99266FA86}', 'SRUM Push Notifications', (
+        TIMESTAMP_COLUMN, APP_COLUMN, USER_COLUMN,
+        ('Notification Type', 'NotificationType', INTEGER), ('Payload Size', 'PayloadSize', INTEGER),
+        ('Network Type', 'NetworkType', INTEGER))),
+)
+
+# SruDbIdMapTable.IdType of the entries that hold a SID (the others hold
+# the UTF-16 name of an application or service)
+ID_TYPE_SID = 3
+
+# OLE automation dates are days since 1899-12-30
+OLE_TIME_EPOCH_ORDINAL = datetime.date(1899, 12, 30).toordinal()
+SECONDS_PER_DAY = 86400
+
+def convert_ole_time(data):
+    '''Returns the text of an OLE automation date (8 bytes double), '' if null'''
+    if not data or len(data) != 8:
+        return ''
+    days, seconds = divmod(round(struct.unpack('<d', data)[0] * SECONDS_PER_DAY), SECONDS_PER_DAY)
+    text = day_time_to_text(OLE_TIME_EPOCH_ORDINAL + days, seconds * 1000000)
+    return text if text is not None else data.hex()
+
+def sid_to_text(data):
+    '''Returns the 'S-1-...' text of a binary SID (its hex if malformed)'''
+    if len(data) < 8 or len(data) != 8 + 4 * data[1]:
+        return data.hex()
+    authority = int.from_bytes(data[2:8], 'big')
+    sub_authorities = struct.unpack(f'<{data[1]}I', data[8:])
+    return '-'.join(['S', str(data[0]), str(authority)] + [str(value) for value in sub_authorities])
+
+def get_id_map(ese_db):
+    '''Returns SruDbIdMapTable as a dict IdIndex -> application name or SID, built once'''
+    id_map = {}
+    if ese_db.get_table('SruDbIdMapTable') is None:
+        return id_map
+    id_type, id_index, id_blob = ese_db.get_column_indexes('SruDbIdMapTable', ('IdType', 'IdIndex', 'IdBlob'))
+    for record in ese_db.get_table('SruDbIdMapTable').records:
+        data = get_ese_data(record, id_blob)
+        if not data:
+            continue
+        if record.get_value_data_as_integer(id_type) == ID_TYPE_SID:
+            value = sid_to_text(data)
+        else:
+            value = data.decode('utf-16', errors='replace').rstrip('\x00')
+        id_map[record.get_value_data_as_integer(id_index)] = value
+    return id_map
+
+def iter_table_rows(ese_db, table_name, columns, id_map):
+    '''Yields the rows of a SRUM extension table, with the IDs resolved through id_map'''
+    indexes = ese_db.get_column_indexes(table_name, [column_name for _header, column_name, _kind in columns])
+    kinds = [kind for _header, _column_name, kind in columns]
+    for record in ese_db.get_table(table_name).records:
+        row = []
+        for index, kind in zip(indexes, kinds):
+            if index is None:
+                row.append('')
+            elif kind == OLE_TIME:
+                row.append(convert_ole_time(record.get_value_data(index)))
+            else:
+                value = record.get_value_data_as_integer(index)
+                if kind == FILE_TIME:
+                    value = convert_file_time(value) if value else ''
+                elif kind != INTEGER and value is not None:
+                    value = id_map.get(value, value)
+                row.append('' if value is None else value)
+        yield tuple(row)
+
+def get_srum(files_found, report_folder, seeker, wrap_text):
+
+    for file_found in files_found:
+        file_found = str(file_found)
+        if not os.path.basename(file_found).lower() == "srudb.dat":
+            continue
+
+        ese_db = open_ese_db(file_found)
+        id_map = get_id_map(ese_db)
+
+        for table_name, report_name, columns in SRUM_TABLES:
+            if ese_db.get_table(table_name) is None:
+                logfunc(f'No {report_name} data available')
+                continue
+
+            report = ArtifactHtmlReport(report_name)
+            report.start_artifact_report(report_folder, report_name)
+            report.add_script()
+            data_headers = tuple(header for header, _column_name, _kind in columns)
+
+            # Records are written batch by batch to the HTML, TSV and timeline
+            report.start_artifact_data_table(data_headers, file_found)
+            for data_list in iter_batches(iter_table_rows(ese_db, table_name, columns, id_map)):
+                report.write_artifact_data_rows(data_list)
+                tsv(report_folder, data_headers, data_list, report_name)
+                timeline(report_folder, report_name, data_list, data_headers)
+            report.end_artifact_data_table()
+            report.end_artifact_report()
@@ -1,14 +1,21 @@
 import os
 import xmltodict
 import sqlite3
-from bs4 import BeautifulSoup
 from scripts.artifact_report import ArtifactHtmlReport
-from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows, open_sqlite_db_readonly, get_next_unused_name
+from scripts.ilapfuncs import logfunc, tsv, timeline, timeline_intervals, is_platform_windows, open_sqlite_db_readonly, has_wal_content, html_to_text, get_next_unused_name, iter_batches
 import json
 import datetime
 import sys
 import pprint
 import hashlib
+import struct
+import concurrent.futures
+import itertools
+import shutil
+import zipfile
+import tarfile
+import io
+import html
 import csv
 import codecs
 import subprocess
@@ -77,6 +84,18 @@ C_W24H2      = 3
 C_W24H2_DIFF = 4
 C_UNKNOWN    = 0
 
+# Filename of the CAM DB
+C_CAM_DB     = "CapabilityAccessManager.db"
+
+# How the WAL file is merged with the DB (config "database.merge_WAL_file_to_DB_mode")
+# "copy": the WAL is replayed into a private copy (evidence is not modified)
+# "in_place": the WAL is checkpointed into the evidence DB itself
+C_MERGE_WAL_MODE_COPY     = "copy"
+C_MERGE_WAL_MODE_IN_PLACE = "in_place"
+C_MERGE_WAL_MODES_L       = (C_MERGE_WAL_MODE_COPY, C_MERGE_WAL_MODE_IN_PLACE)
+# Subdir of the report's 'temp' folder holding the private copies
+C_WAL_REPLAY_SUBDIR       = os.path.join("temp", "CAM_WAL_replay")
+
 #====================================================================
 # W23H2
 #====================================================================
@@ -162,6 +181,18 @@ C_TABLES_CAM_DB_COLS_COUNT_W24H2_D = {'Capabilities': 2,
  'NonPackagedGlobalPromptHistory': 6
  }
 
+#====================================================================
+# Schema fingerprints
+# A schema fingerprint is the SHA-256 of the sorted, lowercased 
+# "table(col1,col2,...)" signatures of the user tables. The registry
+# maps known fingerprints to CAM versions; more entries can be 
+# added through the config file ("schema.known_versions").
+#====================================================================
+# Version codes that can be referenced by name in the config file
+C_CAM_VERSION_NAMES_D = {"W23H2": C_W23H2, "W24H2": C_W24H2}
+# Version code returned when the nearest match of a version differs
+C_CAM_VERSION_DIFF_D  = {C_W23H2: C_W23H2_DIFF, C_W24H2: C_W24H2_DIFF}
+
 #====================================================================
 # CODE
 #====================================================================
@@ -389,10 +420,12 @@ def get_sqlite_schema_readonly(db_path):
 ## #--------------------------------------------------------------------
 
 #--------------------------------------------------------------------
-# @parameter db_path [IN] path for the main SQLite3 database
+# @parameter db [IN] open connection to the main SQLite3 database 
+#                    (file, cached copy or in-memory DB of a zip/tar 
+#                    input)
 # 2025-03-29
 #--------------------------------------------------------------------
-def lookup_and_report_fileID_in_CSV(db_path, csv_file_path, csv_db_table_name, report_ID, report_folder, debug_flag=False):
+def lookup_and_report_fileID_in_CSV(db, csv_file_path, csv_db_table_name, report_ID, report_folder, debug_flag=False):
     """Function to lookup fileIDs in the csv_file_path file. 
        This CSV file is obtained through Eric Zimmermann's "AmCacheParser.exe" corresponding 
        to the "*Amcache_UnassociatedFileEntries.csv". 
@@ -445,7 +478,14 @@ ON NonPackagedIdentityRelationship.FileID = FileIDs.ID"""
 
     founds_L = []
     FILE_ID_idx = 4 # Index of FileID in record_L
-    NonPackagedIdentityRelationship_L = execute_sql_query_in_database(db_path, sql_S)
+    try:
+        NonPackagedIdentityRelationship_L = db.execute(sql_S).fetchall()
+    except sqlite3.Error as e:
+        log_and_print_error(f"SQLite error: {e}")
+        NonPackagedIdentityRelationship_L = None
+    # No rows (or error): nothing to look up
+    if NonPackagedIdentityRelationship_L is None:
+        NonPackagedIdentityRelationship_L = []
     for record_L in NonPackagedIdentityRelationship_L:
         file_ID = record_L[FILE_ID_idx]
         # file_ID is something like this xxxx|DATA|yyyy|zzzz ("|" is just 
@@ -754,6 +794,77 @@ def execute_sql_query_in_database(db_path, sql_s, params=None):
     return None  # Return an empty list in case of error
 
 
+#====================================================================
+# Row pipeline of the reports: rows flow from their source (SQLite 
+# cursor, list, generator) through a transform into the HTML report 
+# and the TSV file, in batches of C_REPORT_BATCH_SIZE rows (see 
+# iter_batches() in ilapfuncs). No list with all the rows is built.
+#====================================================================
+C_REPORT_BATCH_SIZE = 1000
+
+#--------------------------------------------------------------------
+# Default transform of the rows of the reports: the first field 
+# (payload) is converted to text (see html_to_text())
+# @param row [IN] row (tuple or list)
+# @return list with the fields of the row
+# 2026-10-19
+#--------------------------------------------------------------------
+def payload_to_text_row(row):
+    """Returns 'row' as a list, with its first field converted to text"""
+    payload = row[0]
+    # Note: payload needs to be a string,
+    # so for queries that return an INT as first field,
+    # we convert to a string.
+    # 2025-05-16 
+    if isinstance(payload, int):
+        payload = str(payload)
+        # DEBUG
+        Debug_S = f"[INFO] Converted 'int' to 'str': '{payload}'"
+        print_banner(Debug_S)
+
+    data_row_L = list(row)
+    data_row_L[0] = html_to_text(payload)
+    return data_row_L
+
+#--------------------------------------------------------------------
+# Writes batches of rows to the table of an (already started) HTML 
+# report and, if 'tsvname' is set, to the TSV file 'tsvname'
+# @param report        [IN] ArtifactHtmlReport (started)
+# @param report_folder [IN] folder of the report
+# @param headers_L     [IN] list of headers
+# @param batches_iter  [IN] iterable of lists of rows (see iter_batches() in ilapfuncs)
+# @param tsvname       [IN] name of the TSV file (None/"": no TSV)
+# @param file_found    [IN] file being processed
+# @param name_S        [IN] name of the report (for errors)
+# @param transform_row [IN] function applied to each row (None: none)
+# @param num_entries   [IN] number of rows if known (None: the total
+#                           is written once the rows are written)
+# @return number of rows written
+# 2026-10-19
+#--------------------------------------------------------------------
+def write_row_batches(report, report_folder, headers_L, batches_iter, tsvname, file_found, 
+                      name_S, transform_row=payload_to_text_row, num_entries=None):
+    """Streams 'batches_iter' into the HTML table of 'report' and the TSV file"""
+    report.start_artifact_data_table(headers_L, file_found, num_entries)
+    num_rows = 0
+    for batch_L in batches_iter:
+        if transform_row is not None:
+            try:
+                batch_L = [transform_row(row) for row in batch_L]
+            except Exception as e:
+                Err_S = f"ERROR:['{name_S}']: {e}"
+                log_and_print_error(Err_S)
+                raise
+
+        report.write_artifact_data_rows(batch_L)
+        if tsvname:
+            # The TSV file is created with the first batch, the 
+            # next batches are appended
+            tsv(report_folder, headers_L, batch_L, tsvname)
+        num_rows += len(batch_L)
+    report.end_artifact_data_table()
+    return num_rows
+
 #--------------------------------------------------------------------
 # Create a "text" report, that is a report not lined to an 
 # underlying SQL query.
@@ -783,23 +894,8 @@ def create_report_info(report_folder, name_S, headers_L, infos_L, file_found, de
         report.start_artifact_report(report_folder, name_S)
         report.add_script()
 
-        data_list = []
-
-        data_headers = headers_L
-        for rows in infos_L:
-            try:
-                payload = rows[0]
-                payload_text = BeautifulSoup(payload, 'html.parser').text
-
-                data_row_L = list(rows[1:])
-                data_row_L.insert(0,payload_text)
-                data_list.append(data_row_L)
-            except Exception as e:
-                Err_S = f"ERROR:['{name_S}']: {e}"
-                log_and_print_error(Err_S)
-                raise
-
-        report.write_artifact_data_table(data_headers, data_list, file_found)
+        write_row_batches(report, report_folder, headers_L, iter_batches(infos_L, C_REPORT_BATCH_SIZE), 
+                          None, file_found, name_S, num_entries=num_infos)
         report.end_artifact_report()
 
 ## FIXME:2025-08-20 18h42:29 ==========================================
@@ -833,71 +929,47 @@ def create_report_info(report_folder, name_S, headers_L, infos_L, file_found, de
 # 'headers_L      [IN]: list of headers
 # 'tsvname'       [IN]: name of the TSV (Tab Separated Value) file
 # 'file_found'    [IN]: file being processed
+# 'params_D'      [IN]: values bound to the named parameters of 'sql_S'
+#                       (e.g. get_date_filter_params_D())
 # 2025-03-04
+# 2026-10-19: bound parameters + query plan check of date filters
+# 2026-10-19: rows streamed from the cursor (see write_row_batches())
 #--------------------------------------------------------------------
 def create_report_and_tsv(report_folder, cursor_db, name_S, sql_S, 
-     headers_L, tsvname, file_found, dates_filter_str=None, debug_flag=False):
+     headers_L, tsvname, file_found, dates_filter_str=None, debug_flag=False, params_D=None):
     """Execute the SQL query 'sql_S' over the SQLite3 cursor."""
 
-    cursor_db.execute(sql_S)
-
-    all_rows = cursor_db.fetchall()
-    usageentries = len(all_rows)
-
-    if debug_flag:
-        Debug_S = f"[DEBUG] Report '[{name_S}]' has {usageentries} entries"
-        logfunc(Debug_S)
+    if params_D:
+        check_date_filter_plan(cursor_db, name_S, sql_S, params_D)
+    cursor_db.execute(sql_S, params_D or {})
 
-    if usageentries == 0:
-        # No data: create a list with the word "No data" in each of its fields
+    # Rows are streamed from the cursor: only the first batch is read 
+    # here, to know whether the query returned anything
+    batches_iter = iter_batches(cursor_db, C_REPORT_BATCH_SIZE)
+    first_batch_L = next(batches_iter, None)
+    if first_batch_L is None:
+        # No data: a single row with the word "(empty)" in each of its fields
         no_data_S = "(empty)"
-        all_rows = []
-        headers_copy_L = list(headers_L[:])
-        no_data_L = []
-        for i in range(len(headers_copy_L)):
-            no_data_L.append(no_data_S)
-        all_rows.append(tuple(no_data_L))
-
-
-    if usageentries >= 0:
-        report = ArtifactHtmlReport(name_S, dates_filter_S = dates_filter_str)
-        report.start_artifact_report(report_folder, name_S)
-        report.add_script()
+        batches_iter = iter([[tuple(no_data_S for _header in headers_L)]])
+    else:
+        batches_iter = itertools.chain([first_batch_L], batches_iter)
+    tsv_flag = first_batch_L is not None and tsvname and len(tsvname) > 0
 
-        data_list = []
+    report = ArtifactHtmlReport(name_S, dates_filter_S = dates_filter_str)
+    report.start_artifact_report(report_folder, name_S)
+    report.add_script()
 
-        data_headers = headers_L
-        for rows in all_rows:
-            try:
-                payload = rows[0]
-                # Note: payload needs to be a string,
-                # so for queries that return an INT as first field,
-                # we convert to a string.
-                # 2025-05-16 
-                if isinstance(payload, int):
-                    payload = str(payload)
-                    # DEBUG
-                    Debug_S = f"[INFO] Converted 'int' to 'str': '{payload}'"
-                    print_banner(Debug_S)
-
-                payload_text = BeautifulSoup(payload, 'html.parser').text
-
-                data_row_L = list(rows[1:])
-                data_row_L.insert(0,payload_text)
-                data_list.append(data_row_L)
-            except Exception as e:
-                Err_S = f"ERROR:['{name_S}']: {e}"
-                log_and_print_error(Err_S)
-                raise
+    num_rows = write_row_batches(report, report_folder, headers_L, batches_iter, 
+                                 tsvname if tsv_flag else None, file_found, name_S)
+    report.end_artifact_report()
 
-        report.write_artifact_data_table(data_headers, data_list, file_found)
-        report.end_artifact_report()
+    usageentries = num_rows if first_batch_L is not None else 0
+    if debug_flag:
+        Debug_S = f"[DEBUG] Report '[{name_S}]' has {usageentries} entries"
+        logfunc(Debug_S)
 
-        if usageentries > 0 and tsvname and len(tsvname) > 0:
-            # Create TSV file (only if usageentries has data)
-            tsv(report_folder, data_headers, data_list, tsvname)
-        else:
-            logfunc(f"[INFO] No results for '{name_S}' (no TSV was created)")
+    if not tsv_flag:
+        logfunc(f"[INFO] No results for '{name_S}' (no TSV was created)")
 
 
 #--------------------------------------------------------------------
@@ -943,8 +1015,16 @@ def date_to_filetime(date_string):
 # Returns:
 #   str: A SQL WHERE clause string based on the provided dates, 
 #        or None if no filtering is needed.
+#        The dates are not part of the SQL: they are bound to the
+#        ':start_date' / ':end_date' parameters (see 
+#        get_date_filter_params_D()), so the SQL text does not depend
+#        on the dates and prepared statements can be reused.
 # 2025-03-19
+# 2026-10-19: named parameters instead of literal values
 #--------------------------------------------------------------------
+C_DATE_PARAM_START = "start_date"
+C_DATE_PARAM_END   = "end_date"
+
 def start_date_and_end_date_to_sql(start_date_ft64, end_date_ft64, field_name_S):
 
     # Check if both start_date_ft64 and end_date_ft64 are None
@@ -955,21 +1035,76 @@ def start_date_and_end_date_to_sql(start_date_ft64, end_date_ft64, field_name_S)
     # Check if only start_date_ft64 is provided
     if (start_date_ft64 is not None) and (end_date_ft64 is None):
         # Create SQL WHERE clause for start date filtering
-        return f"WHERE ({field_name_S} >= {start_date_ft64})"
+        return f"WHERE ({field_name_S} >= :{C_DATE_PARAM_START})"
 
     # Check if only end_date_ft64 is provided
     if (start_date_ft64 is None) and (end_date_ft64 is not None):
         # Create SQL WHERE clause for end date filtering
-        return f"WHERE ({field_name_S} <= {end_date_ft64})"
+        return f"WHERE ({field_name_S} <= :{C_DATE_PARAM_END})"
 
     # Check if both start_date_ft64 and end_date_ft64 are provided
     if (start_date_ft64 is not None) and (end_date_ft64 is not None):
         # Create SQL WHERE clause for both start and end date filtering
-        return f"WHERE (({field_name_S} >= {start_date_ft64}) and ({field_name_S} <= {end_date_ft64}))"
+        return f"WHERE (({field_name_S} >= :{C_DATE_PARAM_START}) and ({field_name_S} <= :{C_DATE_PARAM_END}))"
 
     # Still here? No filtering
     return None
 
+#--------------------------------------------------------------------
+# Returns the values bound to the parameters of the SQL built by 
+# start_date_and_end_date_to_sql()
+# @param start_date_ft64 [IN] start date (FILETIME, None: no start)
+# @param end_date_ft64   [IN] end date (FILETIME, None: no end)
+# @return dict {parameter name: value} (empty if no date filter)
+# 2026-10-19
+#--------------------------------------------------------------------
+def get_date_filter_params_D(start_date_ft64, end_date_ft64):
+    """Named parameters of the date filter"""
+    params_D = {}
+    if start_date_ft64 is not None:
+        params_D[C_DATE_PARAM_START] = start_date_ft64
+    if end_date_ft64 is not None:
+        params_D[C_DATE_PARAM_END] = end_date_ft64
+    return params_D
+
+#--------------------------------------------------------------------
+# Checks, with EXPLAIN QUERY PLAN, whether the tables filtered by 
+# date are read through an index (on LastUsedTimeStart/Stop...) or 
+# with a full scan. Full scans are logged (once per query).
+# @param cursor_db [IN] cursor of the DB
+# @param name_S    [IN] name of the query (for the log)
+# @param sql_S     [IN] SQL of the query
+# @param params_D  [IN] bound parameters
+# @return list of the tables read with a full scan
+# 2026-10-19
+#--------------------------------------------------------------------
+C_DATE_FILTERED_TABLES_L = ("PackagedUsageHistory", "NonPackagedUsageHistory",
+                            "NonPackagedIdentityRelationship", "NonPackagedGlobalPromptHistory",
+                            "CAM_UsageHistory", "FleetUsageHistory")
+
+def check_date_filter_plan(cursor_db, name_S, sql_S, params_D):
+    """Logs the date-filtered tables that EXPLAIN QUERY PLAN shows as full scans"""
+    try:
+        plan_L = cursor_db.execute(f"EXPLAIN QUERY PLAN {sql_S}", params_D).fetchall()
+    except sqlite3.Error as e:
+        logfunc(f"[WARNING][{name_S}] EXPLAIN QUERY PLAN failed: {e}")
+        return []
+
+    full_scans_L = []
+    for row in plan_L:
+        # detail: "SCAN <table>" (or "SCAN TABLE <table>" before 3.36)
+        words_L = str(row[-1]).split()
+        if len(words_L) < 2 or words_L[0] != "SCAN":
+            continue
+        table_S = words_L[2] if words_L[1] == "TABLE" and len(words_L) > 2 else words_L[1]
+        if table_S in C_DATE_FILTERED_TABLES_L and "INDEX" not in words_L and table_S not in full_scans_L:
+            full_scans_L.append(table_S)
+
+    if len(full_scans_L) > 0:
+        logfunc(f"[INFO][{name_S}] date filter does a full scan of {full_scans_L} "
+                f"(no index on the date field; the cache, see 'cache.directory', adds one)")
+    return full_scans_L
+
 
 #--------------------------------------------------------------------
 # Count the number of records for all tables in a SQLite3 database 
@@ -1122,61 +1257,143 @@ def compare_dicts_L(current_D, expected_D):
     # If no differences are found, return an empty list
     return report_L
     
+#--------------------------------------------------------------------
+# Canonical, length-prefixed binary encoding of a single SQLite value.
+# Each value is encoded as a one byte type tag followed by its payload:
+# - NULL  -> b'N'
+# - INT   -> b'I' + 8 bytes (signed, little endian)
+# - REAL  -> b'F' + 8 bytes (IEEE 754 double, little endian)
+# - TEXT  -> b'T' + 8 bytes length + UTF-8 bytes
+# - BLOB  -> b'B' + 8 bytes length + raw bytes
+# The length prefix ensures that two different rows can never
+# produce the same byte stream (e.g. ('ab','c') vs. ('a','bc')).
+# @param value [IN] value returned by the sqlite3 module
+# @return bytes with the encoding of 'value'
+# 2026-10-19
+#--------------------------------------------------------------------
+C_DIGEST_PACK_INT    = struct.Struct('<q').pack
+C_DIGEST_PACK_REAL   = struct.Struct('<d').pack
+C_DIGEST_PACK_LENGTH = struct.Struct('<Q').pack
+
+def encode_sqlite_value(value):
+    """Returns a canonical, length-prefixed binary encoding of 'value'"""
+    if value is None:
+        return b'N'
+
+    if isinstance(value, int):
+        return b'I' + C_DIGEST_PACK_INT(value)
+
+    if isinstance(value, float):
+        return b'F' + C_DIGEST_PACK_REAL(value)
+
+    if isinstance(value, str):
+        value_bytes = value.encode('utf-8', 'surrogatepass')
+        return b'T' + C_DIGEST_PACK_LENGTH(len(value_bytes)) + value_bytes
+
+    # BLOB (bytes, or memoryview depending on the sqlite3 module)
+    value_bytes = bytes(value)
+    return b'B' + C_DIGEST_PACK_LENGTH(len(value_bytes)) + value_bytes
+
+#--------------------------------------------------------------------
+# Compute the message digest of a single table of a SQLite3 database.
+# The rows are streamed from the cursor with fetchmany(), so memory 
+# usage is bounded by 'batch_size' rows, regardless of the size of 
+# the table. Each row is fed to the hasher with the canonical encoding
+# of encode_sqlite_value(), prefixed by the number of columns.
+# Every call opens its own read-only connection, so the function can 
+# be safely called from several threads at once.
+# @param db_path        [IN] path to the SQLite3 database
+# @param table_name     [IN] name of the table to hash
+# @param hash_algorithm [IN] name of the hashlib algorithm
+# @param batch_size     [IN] number of rows fetched per fetchmany()
+# @return hexdigest of the table
+# 2026-10-19
+#--------------------------------------------------------------------
+C_DIGEST_BATCH_SIZE = 4096
+
+def compute_single_table_digest(db_path, table_name, hash_algorithm='sha256', 
+                                batch_size=C_DIGEST_BATCH_SIZE):
+    """Streams the rows of 'table_name' into a hasher and returns the hexdigest"""
+    hasher = hashlib.new(hash_algorithm)
+
+    conn = open_sqlite_db_readonly(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT * FROM "{table_name}" ORDER BY rowid;')
+
+        num_cols_prefix = C_DIGEST_PACK_LENGTH(len(cursor.description))
+        encode = encode_sqlite_value
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+
+            # One update() per batch: fewer calls into the hasher
+            # and big enough buffers for hashlib to release the GIL
+            chunk_L = []
+            for row in rows:
+                chunk_L.append(num_cols_prefix)
+                chunk_L.extend(map(encode, row))
+            hasher.update(b''.join(chunk_L))
+    finally:
+        conn.close()
+
+    return hasher.hexdigest()
+
 #--------------------------------------------------------------------
 # Compute a message digest for each table of a SQLite3 database, 
 # returning a string with this info.
 # The function can be used to detect changes in a database.
+# Tables are streamed (see compute_single_table_digest()) and hashed
+# in parallel, one worker thread per table (up to 'max_workers').
+# @param db_path        [IN] path to the SQLite3 database
+# @param hash_algorithm [IN] name of the hashlib algorithm
+# @param max_workers    [IN] max number of threads (None: CPU count)
+# @param tables_L       [IN] restrict the digest to these tables
+#                            (None: all tables of the database)
 # @return dictionary with message digest of tables (one entry per table) 
 #         if ok, None on error.
 # 2025-03-26
+# 2026-10-19: streaming + canonical encoding + parallel
 #--------------------------------------------------------------------
-def compute_table_digest(db_path, hash_algorithm='sha256'):
+def compute_table_digest(db_path, hash_algorithm='sha256', max_workers=None, tables_L=None):
     # Validate hash algorithm
-    try:
-        hash_func = getattr(hashlib, hash_algorithm)
-    except AttributeError:
+    if hash_algorithm not in hashlib.algorithms_available:
         Err_S = f"[ERROR] Unsupported hash algorithm: {hash_algorithm}"
         log_and_print_error(Err_S)
         raise ValueError(Err_S)
     
     try:
-        # Connect to the SQLite database in read-only mode
-        conn = open_sqlite_db_readonly(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # Get list of all tables in the database
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        
+        if tables_L is None:
+            # Get list of all tables in the database
+            conn = open_sqlite_db_readonly(db_path)
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+            tables_L = [table[0] for table in cursor.fetchall()]
+            conn.close()
+
         # Dictionary to store table digests
         table_digests = {}
-        
-        # Compute digest for each table
-        for table in tables:
-            table_name = table[0]
-            
-            # Create a hash object
-            hasher = hash_func()
-            
-            # Fetch all rows from the table
-            cursor.execute(f"SELECT * FROM {table_name} ORDER BY rowid;")
-            
-            # Update hash with each row's content
-            for row in cursor.fetchall():
-                # Convert row to a string representation
-                row_content = str(tuple(row)).encode('utf-8')
-                hasher.update(row_content)
-            
-            # Store the final digest
-            table_digests[table_name] = hasher.hexdigest()
-        
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = max(1, min(max_workers, len(tables_L)))
+
+        if max_workers == 1:
+            for table_name in tables_L:
+                table_digests[table_name] = compute_single_table_digest(db_path, table_name, hash_algorithm)
+        else:
+            # sqlite3 and hashlib both release the GIL, so threads
+            # are enough to hash the tables in parallel
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures_D = {executor.submit(compute_single_table_digest, db_path, table_name, hash_algorithm): table_name
+                             for table_name in tables_L}
+                for future in concurrent.futures.as_completed(futures_D):
+                    table_digests[futures_D[future]] = future.result()
+
         # Sort by table name
         sorted_D = dict(sorted(table_digests.items()))
 
-        # Close the connection to the DB
-        conn.close()
-
         return sorted_D
 
     except sqlite3.Error as e:
@@ -1201,11 +1418,15 @@ def compute_table_digest(db_path, hash_algorithm='sha256'):
 #   db_path (str): The path to the SQLite database file.
 #   output_debug_L (list, optional): A list to store debugging information. 
 #                                    Defaults to None.
+#   integrity_check_flag (bool): run 'PRAGMA integrity_check' (a full scan
+#                                of the DB) before the checkpoint.
 # Returns:
 #   bool: True if the synchronization process completes successfully, False otherwise.
+# NOTE: this function modifies 'db_path' in place. See 
+# sync_WAL_with_DB_copy() for the non-destructive version.
 # 2025-03-26
 #--------------------------------------------------------------------
-def sync_WAL_with_DB(db_path, output_debug_L=None):
+def sync_WAL_with_DB(db_path, output_debug_L=None, integrity_check_flag=False):
     wal_path = f"{db_path}-wal"
     if check_file_exists_and_not_empty(wal_path):
         #----------------------------------------
@@ -1213,7 +1434,8 @@ def sync_WAL_with_DB(db_path, output_debug_L=None):
         # the DB
         #----------------------------------------
         # List used to save debugging info
-        if output_debug_L is not None and len(output_debug_L) > 0:
+        msg_digest_per_table_before_D = None
+        if output_debug_L is not None:
             sep_S = get_sep()
             # We...
             # - i) Display the # of records per table and the size of the DB file 
@@ -1224,127 +1446,1561 @@ def sync_WAL_with_DB(db_path, output_debug_L=None):
             if records_per_table_S is not None:
                 output_debug_L.append(records_per_table_S)
 
-            # Compute digest of tables content
-            msg_digest_per_table_before_D = compute_table_digest(db_path, 'sha256')
-            output_debug_L.append(sep_S)
+            # Compute digest of tables content (only the tables 
+            # changed by the WAL, all of them if unknown)
+            tables_to_hash_S = get_tables_changed_by_WAL(db_path)
+            output_debug_L.append(f"[INFO] Tables changed by the WAL: {tables_to_hash_S}")
+            tables_before_L = get_sqlite_table_names(db_path)
+            if tables_to_hash_S is not None:
+                tables_before_L = [t for t in tables_before_L if t in tables_to_hash_S]
+            msg_digest_per_table_before_D = compute_table_digest(db_path, 'sha256', tables_L=tables_before_L)
+            output_debug_L.append(sep_S)
+
+        # Ok, there is a non-zero WAL file
+        db = open_sqlite_db(db_path)
+        cursor = db.cursor()
+
+        # Check WAL mode and database status
+        cursor.execute("PRAGMA journal_mode=WAL")
+        integrity_result = run_integrity_check(cursor, integrity_check_flag, output_debug_L)
+
+        if integrity_result == 'ok':
+            # Checkpoint the WAL file
+            cursor.execute("PRAGMA wal_checkpoint(RESTART);") 
+            if output_debug_L is not None:
+                output_debug_L.append("[INFO] WAL file checkpointed successfully.")
+       
+        db.commit()
+        db.close()
+
+        if output_debug_L is not None:
+            # We...
+            # - i) Display the # of records per table and the size of the DB file 
+            # - ii) Compute the message digest sha256 of each table after applying WAL
+            # - iii) We compare message digest table per table
+            records_per_table_S = count_records_per_table_S(db_path)
+            sep_S = get_sep()
+            output_debug_L.append(sep_S)
+            output_debug_L.append("[INFO] after 'checkpoint'")
+            if records_per_table_S is not None:
+                output_debug_L.append(records_per_table_S)
+
+            # Compute digest of tables content
+            tables_after_L = get_sqlite_table_names(db_path)
+            if tables_to_hash_S is not None:
+                tables_after_L = [t for t in tables_after_L if t in tables_to_hash_S]
+            msg_digest_per_table_after_D = compute_table_digest(db_path, 'sha256', tables_L=tables_after_L)
+
+            if (msg_digest_per_table_before_D is not None) and\
+                    (msg_digest_per_table_after_D is not None):
+                compare_dictionaries(msg_digest_per_table_before_D, msg_digest_per_table_after_D, output_debug_L)
+            output_debug_L.append(sep_S)
+
+    # DEBUG
+    if output_debug_L is not None:
+        logfunc("DEBUG - 'output_debug_L'")
+        pprint.pp(output_debug_L)
+
+    return True
+
+#--------------------------------------------------------------------
+# Runs 'PRAGMA integrity_check' (a full scan of the database) only 
+# when 'integrity_check_flag' is True.
+# @param cursor               [IN] cursor to the database
+# @param integrity_check_flag [IN] True to run the check
+# @param output_debug_L       [IN][OUT] list for debug info (or None)
+# @return 'ok' if the check passed or was skipped, the error otherwise
+# 2026-10-19
+#--------------------------------------------------------------------
+def run_integrity_check(cursor, integrity_check_flag, output_debug_L=None):
+    """Run 'PRAGMA integrity_check' if asked to, returning 'ok' on success/skip"""
+    if not integrity_check_flag:
+        if output_debug_L is not None:
+            output_debug_L.append("[INFO] Database integrity check skipped.")
+        return 'ok'
+
+    cursor.execute("PRAGMA integrity_check")
+    integrity_result = cursor.fetchone()[0]
+    if integrity_result == 'ok':
+        if output_debug_L is not None:
+            output_debug_L.append("[INFO] Database integrity check passed.")
+    else:
+        Err_S = f"[INFO] Integrity check failed: {integrity_result}"
+        logfunc(Err_S)
+        if output_debug_L is not None:
+            output_debug_L.append(Err_S)
+
+    return integrity_result
+
+#--------------------------------------------------------------------
+# Copies 'src_path' to 'dst_path' as cheaply as the filesystem allows:
+# 1) reflink (copy-on-write clone, Linux FICLONE: btrfs, XFS, ...) 
+# 2) sparse copy (runs of zero bytes become holes)
+# The copy is private: changes to 'dst_path' never reach 'src_path'.
+# @param src_path [IN] file to copy
+# @param dst_path [IN] destination (overwritten if it exists)
+# @return "reflink" or "sparse", depending on the method used
+# 2026-10-19
+#--------------------------------------------------------------------
+C_FICLONE = 0x40049409          # _IOW(0x94, 9, int) from <linux/fs.h>
+C_SPARSE_COPY_CHUNK = 1024*1024 
+
+def copy_file_cow(src_path, dst_path):
+    """Copy 'src_path' to 'dst_path' with a reflink if possible, a sparse copy otherwise"""
+    with open(src_path, 'rb') as src_file, open(dst_path, 'wb') as dst_file:
+        if sys.platform.startswith('linux'):
+            try:
+                import fcntl
+                fcntl.ioctl(dst_file.fileno(), C_FICLONE, src_file.fileno())
+                return "reflink"
+            except (ImportError, OSError):
+                # Filesystem does not support reflinks: fall through
+                pass
+
+        zero_chunk = bytes(C_SPARSE_COPY_CHUNK)
+        while True:
+            chunk = src_file.read(C_SPARSE_COPY_CHUNK)
+            if not chunk:
+                break
+            if chunk == zero_chunk[:len(chunk)]:
+                # Leave a hole instead of writing zeros
+                dst_file.seek(len(chunk), os.SEEK_CUR)
+            else:
+                dst_file.write(chunk)
+        # Needed when the file ends with a hole
+        dst_file.truncate()
+
+    shutil.copystat(src_path, dst_path)
+    return "sparse"
+
+#--------------------------------------------------------------------
+# Returns the list of the tables of a SQLite3 database
+# @param db_path [IN] path to the database
+# @return list with the names of the tables
+# 2026-10-19
+#--------------------------------------------------------------------
+def get_sqlite_table_names(db_path):
+    """Returns the names of the tables of 'db_path'"""
+    conn = open_sqlite_db_readonly(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+#--------------------------------------------------------------------
+# Opens a CAM DB in read-only mode without writing its -shm file.
+# A DB opened with mode=ro rebuilds the WAL index in the -shm, so a 
+# DB without WAL content (evidence without WAL, private copy once 
+# synchronized) is opened with immutable=1. A DB with WAL content 
+# (WAL merge disabled) needs mode=ro for its WAL to be read.
+# @param db_path [IN] path to the DB
+# @return sqlite3 connection
+# 2026-10-19
+#--------------------------------------------------------------------
+def open_CAM_db_readonly(db_path):
+    """Read-only connection to 'db_path' (immutable=1 if it has no WAL content)"""
+    return open_sqlite_db_readonly(db_path, immutable=not has_wal_content(db_path))
+
+#--------------------------------------------------------------------
+# Non-destructive version of sync_WAL_with_DB(): the WAL file is 
+# applied to a private copy of the database created in 'scratch_dir'
+# (reflink or sparse copy, see copy_file_cow()). The evidence files 
+# ('db_path' and its -wal/-shm) are only read, never written.
+#
+# When 'output_debug_L' is not None, the before/after state is 
+# recorded. Digests are only computed for the tables that own pages 
+# written by the WAL (see get_tables_changed_by_WAL()): tables the WAL 
+# never touched are identical by construction. If the WAL cannot be
+# parsed, all tables are hashed.
+#
+# Parameters:
+#   db_path (str): The path to the SQLite database file.
+#   scratch_dir (str): directory for the private copy.
+#   output_debug_L (list, optional): A list to store debugging information. 
+#   integrity_check_flag (bool): run 'PRAGMA integrity_check' on the copy.
+# Returns:
+#   str: path of the synchronized copy, or None on error. If there is
+#        no (or an empty) WAL file, 'db_path' is returned unchanged 
+#        (open it with open_CAM_db_readonly(), not to write its -shm).
+# 2026-10-19
+#--------------------------------------------------------------------
+def sync_WAL_with_DB_copy(db_path, scratch_dir, output_debug_L=None, integrity_check_flag=False):
+    wal_path = f"{db_path}-wal"
+    if not check_file_exists_and_not_empty(wal_path):
+        # Nothing to replay: use the DB as is
+        return db_path
+
+    try:
+        os.makedirs(scratch_dir, exist_ok=True)
+        copy_path = get_next_unused_name(os.path.join(scratch_dir, os.path.basename(db_path)))
+        copy_method = copy_file_cow(db_path, copy_path)
+        if output_debug_L is not None:
+            output_debug_L.append(f"[INFO] Private copy '{copy_path}' ({copy_method})")
+
+        #----------------------------------------
+        # 'Before' state: the copy has no WAL yet
+        #----------------------------------------
+        if output_debug_L is not None:
+            tables_before_L = get_sqlite_table_names(copy_path)
+            tables_to_hash_S = get_tables_changed_by_WAL(db_path)
+            sep_S = get_sep()
+            output_debug_L.append(sep_S)
+            output_debug_L.append(f"[INFO] Tables changed by the WAL: {tables_to_hash_S}")
+            output_debug_L.append("[INFO] Before 'checkpoint'")
+            records_per_table_S = count_records_per_table_S(copy_path)
+            if records_per_table_S is not None:
+                output_debug_L.append(records_per_table_S)
+
+            if tables_to_hash_S is None:
+                tables_before_to_hash_L = tables_before_L
+            else:
+                tables_before_to_hash_L = [t for t in tables_before_L if t in tables_to_hash_S]
+            msg_digest_per_table_before_D = compute_table_digest(copy_path, 'sha256', tables_L=tables_before_to_hash_L)
+            output_debug_L.append(sep_S)
+
+            # Opening the copy (even read-only) may leave an empty -wal/-shm 
+            # behind: they must not shadow the WAL we are about to replay
+            delete_file_if_exists(f"{copy_path}-wal")
+            delete_file_if_exists(f"{copy_path}-shm")
+
+        #----------------------------------------
+        # Replay the WAL into the private copy
+        #----------------------------------------
+        copy_file_cow(wal_path, f"{copy_path}-wal")
+
+        db = open_sqlite_db(copy_path)
+        if db is None:
+            return None
+        cursor = db.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        integrity_result = run_integrity_check(cursor, integrity_check_flag, output_debug_L)
+        if integrity_result == 'ok':
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+            if output_debug_L is not None:
+                output_debug_L.append("[INFO] WAL file checkpointed successfully (private copy).")
+        db.commit()
+        db.close()
+
+        #----------------------------------------
+        # 'After' state
+        #----------------------------------------
+        if output_debug_L is not None:
+            # Tables created by the WAL are included in 'tables_to_hash_S'
+            tables_after_L = get_sqlite_table_names(copy_path)
+            if tables_to_hash_S is None:
+                tables_after_to_hash_L = tables_after_L
+            else:
+                tables_after_to_hash_L = [t for t in tables_after_L if t in tables_to_hash_S]
+
+            output_debug_L.append(sep_S)
+            output_debug_L.append("[INFO] after 'checkpoint'")
+            records_per_table_S = count_records_per_table_S(copy_path)
+            if records_per_table_S is not None:
+                output_debug_L.append(records_per_table_S)
+
+            msg_digest_per_table_after_D = compute_table_digest(copy_path, 'sha256', tables_L=tables_after_to_hash_L)
+            if (msg_digest_per_table_before_D is not None) and\
+                    (msg_digest_per_table_after_D is not None):
+                compare_dictionaries(msg_digest_per_table_before_D, msg_digest_per_table_after_D, output_debug_L)
+            output_debug_L.append(sep_S)
+
+    except (OSError, sqlite3.Error) as e:
+        Err_S = f"[ERROR] Cannot replay WAL of '{db_path}' into a private copy: {e}"
+        log_and_print_error(Err_S)
+        return None
+
+    return copy_path
+
+#--------------------------------------------------------------------
+# Reads, with a single query over sqlite_master, the (lowercased) 
+# column names of each user table of 'db_path'
+# @param db_path [IN] path to the SQLite3 database
+# @param db_conn [IN] connection to the database (None: 'db_path' is opened)
+# @return dict {table_name: sorted list of column names}
+# 2026-10-19
+#--------------------------------------------------------------------
+def get_sqlite_schema_signature_D(db_path, db_conn=None):
+    """Dict with the sorted (lowercased) column names of each table of 'db_path'"""
+    sql_S = """
+SELECT lower(m.name), lower(p.name)
+FROM sqlite_master AS m, pragma_table_info(m.name) AS p
+WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'"""
+    signature_D = {}
+    # A connection opened here is closed here ('with' on a sqlite3 
+    # connection only ends a transaction)
+    conn = open_CAM_db_readonly(db_path) if db_conn is None else db_conn
+    try:
+        for table_name, column_name in conn.execute(sql_S):
+            signature_D.setdefault(table_name, []).append(column_name)
+    finally:
+        if db_conn is None:
+            conn.close()
+
+    for column_names_L in signature_D.values():
+        column_names_L.sort()
+    return signature_D
+
+#--------------------------------------------------------------------
+# Computes the fingerprint of a schema
+# @param tables_D [IN] dict {table_name: list of column names}
+# @return hex SHA-256 of the sorted table/column signatures
+# 2026-10-19
+#--------------------------------------------------------------------
+def schema_fingerprint(tables_D):
+    """Hex digest of the sorted 'table(col,...)' signatures of 'tables_D'"""
+    signatures_L = []
+    for table_name, column_names_L in tables_D.items():
+        columns_S = ",".join(sorted(c.lower() for c in column_names_L))
+        signatures_L.append(f"{table_name.lower()}({columns_S})")
+    signatures_L.sort()
+    return hashlib.sha256(";".join(signatures_L).encode('utf-8')).hexdigest()
+
+#--------------------------------------------------------------------
+# Normalizes (lowercase, sorted columns) a {table: columns} dict
+# 2026-10-19
+#--------------------------------------------------------------------
+def normalize_schema_D(tables_D):
+    """Lowercased copy of 'tables_D' with sorted column names"""
+    return {t.lower(): sorted(c.lower() for c in cols_L) for t, cols_L in tables_D.items()}
+
+#--------------------------------------------------------------------
+# Builds the registry of known CAM schemas: the built-in W23H2/W24H2
+# schemas plus the entries of the config file. Each config entry is
+# a dict with
+# - "name": label of the schema (e.g. "W11-25H2")
+# - "compatible_with": "W23H2" or "W24H2" (the queries to use)
+# - "tables": {table: [columns]} and/or "fingerprint": hex SHA-256
+# @param extra_versions_L [IN] list of config entries (may be None)
+# @return list of dicts {"name", "version", "fingerprint", "tables_D"}
+# ("tables_D" is None for entries given only by fingerprint)
+# 2026-10-19
+#--------------------------------------------------------------------
+def build_schema_registry_L(extra_versions_L=None):
+    """Registry of the known CAM schemas (built-in + config)"""
+    registry_L = [
+        {"name": "W23H2", "version": C_W23H2, 
+         "fingerprint": schema_fingerprint(C_TABLES_CAM_DB_W23H2_D),
+         "tables_D": normalize_schema_D(C_TABLES_CAM_DB_W23H2_D)},
+        {"name": "W24H2", "version": C_W24H2, 
+         "fingerprint": schema_fingerprint(C_TABLES_CAM_DB_W24H2_D),
+         "tables_D": normalize_schema_D(C_TABLES_CAM_DB_W24H2_D)},
+    ]
+
+    for entry_D in (extra_versions_L or []):
+        try:
+            name_S = str(entry_D.get("name", "(unnamed)"))
+            version = C_CAM_VERSION_NAMES_D[str(entry_D["compatible_with"]).upper()]
+            tables_D = entry_D.get("tables")
+            if tables_D is not None:
+                tables_D = normalize_schema_D(tables_D)
+                fingerprint_S = schema_fingerprint(tables_D)
+            else:
+                fingerprint_S = str(entry_D["fingerprint"]).lower()
+        except (KeyError, AttributeError, TypeError) as e:
+            logfunc(f"[WARNING] Invalid 'schema.known_versions' entry {entry_D}: {e}")
+            continue
+        registry_L.append({"name": name_S, "version": version, 
+                           "fingerprint": fingerprint_S, "tables_D": tables_D})
+
+    return registry_L
+
+#--------------------------------------------------------------------
+# Differences between two normalized schemas
+# @param current_D  [IN] schema of the DB
+# @param expected_D [IN] schema of the registry entry
+# @return (distance, list of strings describing the differences)
+# The distance is the number of tables and columns that differ
+# 2026-10-19
+#--------------------------------------------------------------------
+def diff_schemas(current_D, expected_D):
+    """Returns (distance, list of differences) between two schemas"""
+    distance = 0
+    diff_L = []
+
+    new_tables_L = sorted(set(current_D) - set(expected_D))
+    removed_tables_L = sorted(set(expected_D) - set(current_D))
+    distance += len(new_tables_L) + len(removed_tables_L)
+    if new_tables_L:
+        diff_L.append(f"New tables: {', '.join(new_tables_L)}")
+    if removed_tables_L:
+        diff_L.append(f"Removed tables: {', '.join(removed_tables_L)}")
+
+    for table_name in sorted(set(current_D) & set(expected_D)):
+        new_cols_L = sorted(set(current_D[table_name]) - set(expected_D[table_name]))
+        removed_cols_L = sorted(set(expected_D[table_name]) - set(current_D[table_name]))
+        distance += len(new_cols_L) + len(removed_cols_L)
+        if new_cols_L or removed_cols_L:
+            diff_L.append(f"Table '{table_name}': new columns {new_cols_L}, removed columns {removed_cols_L}")
+
+    return distance, diff_L
+
+#--------------------------------------------------------------------
+# Determines the CAM version of 'db_path' from its schema fingerprint
+# @param db_path          [IN] path to the CAM DB
+# @param extra_versions_L [IN] schemas from the config file 
+#                              (see build_schema_registry_L())
+# @param db_conn          [IN] connection to the CAM DB (e.g. in-memory),
+#                              None: 'db_path' is opened
+# @return C_W23H2, C_W24H2 (exact match), C_W23H2_DIFF, C_W24H2_DIFF
+# (nearest match with the same number of tables), C_UNKNOWN or -1 
+# (error)
+# 2025-04-15
+# 2026-10-19: fingerprint registry, nearest-match diff
+#--------------------------------------------------------------------
+def infere_cam_db_version(db_path, extra_versions_L=None, db_conn=None):
+    """Attempt to determine whether we support/recognize database 'db_path'"""
+    try:
+        schema_db_D = get_sqlite_schema_signature_D(db_path, db_conn)
+    except sqlite3.Error as e:
+        Err_S = f"[ERROR] Cannot read schema of '{db_path}': {e}"
+        log_and_print_error(Err_S)
+        return -1
+
+    num_tables = len(schema_db_D)
+    if num_tables == 0:
+        # Something is wrong
+        Err_S = f"[ERROR] Error processing database '{db_path}'"
+        logfunc(Err_S)
+        return -1
+
+    registry_L = build_schema_registry_L(extra_versions_L)
+    fingerprint_S = schema_fingerprint(schema_db_D)
+
+    # Exact match
+    for entry_D in registry_L:
+        if entry_D["fingerprint"] == fingerprint_S:
+            Info_S = f"[INFO] {entry_D['name']} schema ({num_tables} tables)"
+            logfunc(Info_S)
+            return entry_D["version"]
+
+    # No exact match: find the nearest known schema
+    nearest_D = None
+    nearest_distance = None
+    nearest_diff_L = []
+    for entry_D in registry_L:
+        if entry_D["tables_D"] is None:
+            continue
+        distance, diff_L = diff_schemas(schema_db_D, entry_D["tables_D"])
+        if nearest_distance is None or distance < nearest_distance:
+            nearest_D, nearest_distance, nearest_diff_L = entry_D, distance, diff_L
+
+    ret_code = C_UNKNOWN
+    if nearest_D is not None and len(nearest_D["tables_D"]) == num_tables:
+        # Same number of tables as the nearest schema: the queries 
+        # of that version are attempted
+        ret_code = C_CAM_VERSION_DIFF_D[nearest_D["version"]]
+        Info_S = f"""[WARNING] Schema change detected for {db_path}:
+- {num_tables} tables (compatible with '{nearest_D['name']}')
+- fingerprint: {fingerprint_S}
+- changes: {nearest_diff_L}"""
+    elif nearest_D is not None:
+        Info_S = f"""[WARNING] Unknown schema ({num_tables} tables) for {db_path}.
+- fingerprint: {fingerprint_S}
+- nearest known schema: '{nearest_D['name']}' ({len(nearest_D['tables_D'])} tables)
+- changes: {nearest_diff_L}
+"""
+    else:
+        Info_S = f"[WARNING] Unknown schema ({num_tables} tables) for {db_path} (fingerprint: {fingerprint_S})"
+
+    if len(Info_S):
+        logfunc(Info_S)
+        
+    return ret_code
+
+
+#====================================================================
+# CAM analysis cache
+# The queried DB is copied (backup API, so the WAL content is kept) 
+# to '<cache dir>/<SHA-256 of DB+WAL>.db', together with:
+# - indexes on the date fields used by the date filters
+# - the joined (packaged + non-packaged) usage history, unfiltered,
+#   materialized in table 'CAM_UsageHistory'
+# A rerun on the same DB (e.g. with another 'date_range') reuses it.
+#====================================================================
+C_CACHE_USAGE_TABLE = "CAM_UsageHistory"
+C_CACHE_INFO_TABLE  = "CAM_cache_info"
+C_CACHE_HASH_CHUNK  = 1024*1024
+
+# (table, date field) indexed in the cache DB
+C_CACHE_DATE_INDEXES_L = (("PackagedUsageHistory", "LastUsedTimeStop"),
+                          ("NonPackagedUsageHistory", "LastUsedTimeStop"),
+                          ("NonPackagedIdentityRelationship", "LastObservedTime"),
+                          ("NonPackagedGlobalPromptHistory", "ShownTime"),
+                          (C_CACHE_USAGE_TABLE, "LastUsedTimeStop"))
+
+#--------------------------------------------------------------------
+# Computes the SHA-256 of a DB file and of its WAL (if any)
+# @param db_path [IN] path to the DB
+# @return hex digest
+# 2026-10-19
+#--------------------------------------------------------------------
+def compute_db_content_hash(db_path):
+    """SHA-256 of the content of 'db_path' and of its WAL"""
+    hasher = hashlib.sha256()
+    for path in (db_path, f"{db_path}-wal"):
+        if not os.path.isfile(path):
+            continue
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(C_CACHE_HASH_CHUNK)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+#--------------------------------------------------------------------
+# Returns the SELECT of the unfiltered packaged + non-packaged usage
+# history, with the columns of 'C_USAGE_HISTORY_COLS_L'
+# @param db_version [IN] C_W23H2,C_W23H2_DIFF / C_W24H2,C_W24H2_DIFF
+# @return SQL string ("" if db_version is not supported)
+# 2026-10-19
+#--------------------------------------------------------------------
+C_USAGE_HISTORY_COLS_L = ('Source', 'LastUsedTimeStop', 'AccessBlocked', 'Capability', 
+                          'AppIdentifier', 'AppName', 'UserSID', 'SourceID')
+
+def get_SQL_usage_history(db_version):
+    """Returns the SELECT of the joined (packaged + non-packaged) usage history"""
+    if db_version in (C_W23H2, C_W23H2_DIFF):
+        app_name_packaged_S = "NULL"
+        app_name_nonpackaged_S = "NULL"
+        join_packaged_S = ""
+        join_nonpackaged_S = ""
+    elif db_version in (C_W24H2, C_W24H2_DIFF):
+        app_name_packaged_S = "AppNames.StringValue"
+        app_name_nonpackaged_S = "AppNames.StringValue"
+        join_packaged_S = """INNER JOIN AppNames
+on PackagedUsageHistory.AppName = AppNames.ID"""
+        join_nonpackaged_S = """INNER JOIN AppNames
+on NonPackagedUsageHistory.AppName = AppNames.ID"""
+    else:
+        return ""
+
+    # Same joins (and thus same rows and order) as the queries of 
+    # get_SQL_history_all_applications()
+    sql_S = f"""SELECT 'Packaged', PackagedUsageHistory.LastUsedTimeStop, PackagedUsageHistory.AccessBlocked,
+Capabilities.StringValue, PackageFamilyNames.StringValue, {app_name_packaged_S}, 
+Users.StringValue, PackagedUsageHistory.ID
+FROM PackagedUsageHistory
+INNER JOIN Users
+on PackagedUsageHistory.userSid = Users.ID
+INNER JOIN Capabilities
+on PackagedUsageHistory.Capability = Capabilities.ID
+INNER JOIN PackageFamilyNames
+on PackagedUsageHistory.PackageFamilyName = PackageFamilyNames.ID
+{join_packaged_S}
+UNION ALL
+SELECT 'NonPackaged', NonPackagedUsageHistory.LastUsedTimeStop, NonPackagedUsageHistory.AccessBlocked,
+Capabilities.StringValue, BinaryFullPaths.StringValue, {app_name_nonpackaged_S}, 
+Users.StringValue, NonPackagedUsageHistory.ID
+FROM NonPackagedUsageHistory
+INNER JOIN Users
+on NonPackagedUsageHistory.userSid = Users.ID
+INNER JOIN Capabilities
+on NonPackagedUsageHistory.Capability = Capabilities.ID
+INNER JOIN BinaryFullPaths
+on NonPackagedUsageHistory.BinaryFullPath = BinaryFullPaths.ID
+{join_nonpackaged_S}"""
+    return sql_S
+
+#--------------------------------------------------------------------
+# Returns the SQL that fills the 'CAM_UsageHistory' table with the 
+# unfiltered packaged + non-packaged usage history
+# @param db_version [IN] C_W23H2,C_W23H2_DIFF / C_W24H2,C_W24H2_DIFF
+# @return SQL string ("" if db_version is not supported)
+# 2026-10-19
+#--------------------------------------------------------------------
+def get_SQL_materialize_usage_history(db_version):
+    """Returns the INSERT...SELECT that materializes the joined usage history"""
+    select_S = get_SQL_usage_history(db_version)
+    if len(select_S) == 0:
+        return ""
+    return f"INSERT INTO {C_CACHE_USAGE_TABLE} ({', '.join(C_USAGE_HISTORY_COLS_L)})\n{select_S}"
+
+#--------------------------------------------------------------------
+# Builds the cache DB 'cache_path' from 'db_path'
+# The DB is first built under a temporary name and then renamed, so 
+# that an interrupted run never leaves a partial cache behind.
+# @param db_path    [IN] path to the (queried) CAM DB
+# @param db_version [IN] version of the CAM DB
+# @param cache_path [IN] path of the cache DB to create
+# @param hash_S     [IN] content hash of 'db_path'
+# @param db_conn    [IN] connection to the CAM DB (None: 'db_path' is opened)
+# 2026-10-19
+#--------------------------------------------------------------------
+def build_CAM_cache_db(db_path, db_version, cache_path, hash_S, db_conn=None):
+    """Creates the cache DB (copy + date indexes + materialized history)"""
+    tmp_path = f"{cache_path}.tmp"
+    delete_file_if_exists(tmp_path)
+
+    src_db = open_CAM_db_readonly(db_path) if db_conn is None else db_conn
+    dst_db = sqlite3.connect(tmp_path)
+    try:
+        # The backup API copies the content as seen by a reader, 
+        # i.e., including the (not yet checkpointed) WAL frames
+        src_db.backup(dst_db)
+        if db_conn is None:
+            src_db.close()
+
+        cursor = dst_db.cursor()
+        cursor.execute("PRAGMA journal_mode=DELETE")
+        cursor.execute(f"""CREATE TABLE {C_CACHE_USAGE_TABLE} (
+Source TEXT, LastUsedTimeStop INTEGER, AccessBlocked INTEGER, Capability TEXT,
+AppIdentifier TEXT, AppName TEXT, UserSID TEXT, SourceID INTEGER)""")
+        cursor.execute(get_SQL_materialize_usage_history(db_version))
+
+        tables_L = [row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+        for table_name, field_name in C_CACHE_DATE_INDEXES_L:
+            if table_name in tables_L:
+                cursor.execute(f'CREATE INDEX "idx_{table_name}_{field_name}" ON "{table_name}"("{field_name}")')
+
+        cursor.execute(f"CREATE TABLE {C_CACHE_INFO_TABLE} (Key TEXT PRIMARY KEY, Value TEXT)")
+        cursor.executemany(f"INSERT INTO {C_CACHE_INFO_TABLE} VALUES (?,?)",
+                           (("source", db_path), ("sha256", hash_S), 
+                            ("db_version", str(db_version)),
+                            ("created", datetime.datetime.now().isoformat(timespec='seconds'))))
+        dst_db.commit()
+    finally:
+        dst_db.close()
+
+    os.replace(tmp_path, cache_path)
+
+#--------------------------------------------------------------------
+# Returns the path to the cache DB of 'db_path', creating it if needed
+# @param db_path    [IN] path to the (queried) CAM DB
+# @param db_version [IN] version of the CAM DB
+# @param cache_dir  [IN] directory holding the cache DBs
+# @param db_conn    [IN] connection to the CAM DB (None: 'db_path' is opened)
+# @param hash_S     [IN] content hash of the DB (None: computed from 
+#                        'db_path', see compute_db_content_hash())
+# @return (path of the cache DB, True if it was reused), or 
+# (None, False) on error
+# 2026-10-19
+#--------------------------------------------------------------------
+def get_CAM_cache_db(db_path, db_version, cache_dir, db_conn=None, hash_S=None):
+    """Returns (cache DB path, reused flag) for 'db_path'"""
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        if hash_S is None:
+            hash_S = compute_db_content_hash(db_path)
+        cache_path = os.path.join(cache_dir, f"{hash_S}.db")
+
+        if os.path.isfile(cache_path):
+            conn = open_sqlite_db_readonly(cache_path)
+            try:
+                info_D = dict(conn.execute(f"SELECT Key, Value FROM {C_CACHE_INFO_TABLE}"))
+            finally:
+                conn.close()
+            if info_D.get("sha256") == hash_S and info_D.get("db_version") == str(db_version):
+                return cache_path, True
+            logfunc(f"[WARNING] Stale cache '{cache_path}' -- rebuilding")
+            delete_file_if_exists(cache_path)
+
+        build_CAM_cache_db(db_path, db_version, cache_path, hash_S, db_conn)
+        return cache_path, False
+
+    except (OSError, sqlite3.Error) as e:
+        Err_S = f"[ERROR] Cannot use cache for '{db_path}' in '{cache_dir}': {e}"
+        log_and_print_error(Err_S)
+        return None, False
+
+#--------------------------------------------------------------------
+# Returns the SQL of query "D" (all applications) over the cache
+# @param db_version [IN] C_W23H2,C_W23H2_DIFF / C_W24H2,C_W24H2_DIFF
+# @param query_name [IN] Name of the query (for info)
+# @return SQL_query, list with columns names
+# (Empty string and empty list if db_version is unknown)
+# 2026-10-19
+# Query "D" (cached)
+#--------------------------------------------------------------------
+def get_SQL_history_all_applications_cached(db_version, query_name):
+    """Returns the SQL for the union packaged/non-packaged history from the cache"""
+    if db_version in (C_W23H2, C_W23H2_DIFF):
+        app_name_S = ""
+        headers_L = ('LastUsedTimeStop','AccessBlocked','Capability','AppIdentifier','UserSID')
+    elif db_version in (C_W24H2, C_W24H2_DIFF):
+        app_name_S = "AppName,\n"
+        headers_L = ('LastUsedTimeStop','Access','Capability', 
+                     'AppIdentifier','AppName','UserSID')
+    else:
+        Error_S = f"[ERROR][Query '{query_name}'] Non-supported version for '{db_version}'"
+        logfunc(Error_S)
+        return "", []
+
+    sql_S = f"""SELECT datetime((LastUsedTimeStop/10000000) - 11644473600,'unixepoch','localtime') AS Last_used_stop, 
+CASE WHEN AccessBlocked = 0 THEN 'Access OK'
+ELSE 'Blocked'
+END AS AccessBlocked,
+Capability as Capability_str,
+AppIdentifier as application_identifier,
+{app_name_S}UserSID
+FROM {C_CACHE_USAGE_TABLE}"""
+    return sql_S, headers_L
+
+
+#====================================================================
+# CAM fleet analysis
+# Many CAM DBs (one per host) are ingested, in parallel, into a single
+# indexed store ('CAM_fleet.db'), tagged by host, so that cross-host 
+# questions are answered with one query.
+# Hosts are:
+# - the per-host folders holding a CAM DB (first path component 
+#   below the input directory)
+# - the ZIP archives found in the input holding a CAM DB (host: 
+#   name of the archive)
+#====================================================================
+C_FLEET_SUBDIR      = "CAM_fleet"
+C_FLEET_DB_FILENAME = "CAM_fleet.db"
+# Default capabilities of the "sensitive access" fleet report
+C_FLEET_CAPABILITIES_L = ("webcam", "microphone")
+# Path components that mean the input is a single (non-fleet) image
+C_FLEET_IMAGE_ROOTS_L = ("programdata", "windows", "users")
+
+#--------------------------------------------------------------------
+# Returns the host name of a CAM DB found below 'input_dir'
+# @param db_path   [IN] path to the CAM DB
+# @param input_dir [IN] input directory (seeker.directory)
+# 2026-10-19
+#--------------------------------------------------------------------
+def get_fleet_host_name(db_path, input_dir):
+    """Host of 'db_path': its first path component below 'input_dir'"""
+    rel_path = os.path.relpath(db_path, input_dir)
+    first_S = rel_path.replace('\\', '/').split('/')[0]
+    if first_S in ('', '.', '..') or first_S.lower() in C_FLEET_IMAGE_ROOTS_L:
+        return os.path.basename(os.path.normpath(input_dir))
+    return first_S
+
+#--------------------------------------------------------------------
+# Extracts the CAM DB (and its WAL) of a ZIP archive
+# @param zip_path [IN] path to the ZIP archive
+# @param dest_dir [IN] directory where to extract the DB
+# @return path of the extracted DB, None if the ZIP has no CAM DB
+# 2026-10-19
+#--------------------------------------------------------------------
+def extract_CAM_db_from_zip(zip_path, dest_dir):
+    """Extracts CapabilityAccessManager.db(-wal) of 'zip_path' to 'dest_dir'"""
+    with zipfile.ZipFile(zip_path) as zip_file:
+        members_L = [m for m in zip_file.namelist() 
+                     if os.path.basename(m).lower() == C_CAM_DB.lower()]
+        if len(members_L) == 0:
+            return None
+
+        os.makedirs(dest_dir, exist_ok=True)
+        db_path = os.path.join(dest_dir, C_CAM_DB)
+        for suffix_S in ("", "-wal"):
+            member_S = f"{members_L[0]}{suffix_S}"
+            if suffix_S and member_S not in zip_file.namelist():
+                continue
+            with zip_file.open(member_S) as src_file, open(f"{db_path}{suffix_S}", 'wb') as dst_file:
+                shutil.copyfileobj(src_file, dst_file)
+    return db_path
+
+#--------------------------------------------------------------------
+# Reads the joined usage history of one host (run by the workers)
+# @param host_S           [IN] host name
+# @param db_path          [IN] path to the CAM DB of the host
+# @param extra_versions_L [IN] schemas from the config file
+# @return (host_S, db_path, db_version, list of rows)
+# 2026-10-19
+#--------------------------------------------------------------------
+def read_fleet_host_usage(host_S, db_path, extra_versions_L=None):
+    """Returns (host, db_path, db_version, rows) for one host"""
+    db_version = infere_cam_db_version(db_path, extra_versions_L)
+    if db_version <= C_UNKNOWN:
+        return host_S, db_path, db_version, []
+
+    db = open_CAM_db_readonly(db_path)
+    try:
+        rows_L = db.execute(get_SQL_usage_history(db_version)).fetchall()
+    finally:
+        db.close()
+    return host_S, db_path, db_version, rows_L
+
+#--------------------------------------------------------------------
+# Builds the fleet store from the CAM DBs of several hosts
+# @param sources_L        [IN] list of (host, db_path)
+# @param store_path       [IN] path of the fleet store (overwritten)
+# @param extra_versions_L [IN] schemas from the config file
+# @param max_workers      [IN] number of workers (None: default)
+# @return number of hosts ingested
+# 2026-10-19
+#--------------------------------------------------------------------
+def build_CAM_fleet_store(sources_L, store_path, extra_versions_L=None, max_workers=None):
+    """Ingests the CAM DBs of 'sources_L' into the fleet store 'store_path'"""
+    delete_file_if_exists(store_path)
+    store_db = sqlite3.connect(store_path)
+    cursor = store_db.cursor()
+    cursor.execute("""CREATE TABLE Hosts (HostID INTEGER PRIMARY KEY, Host TEXT, 
+DBVersion TEXT, NumRows INTEGER, SourcePath TEXT)""")
+    cursor.execute(f"""CREATE TABLE FleetUsageHistory (HostID INTEGER, 
+Source TEXT, LastUsedTimeStop INTEGER, AccessBlocked INTEGER, Capability TEXT,
+AppIdentifier TEXT, AppName TEXT, UserSID TEXT, SourceID INTEGER)""")
+
+    insert_S = f"""INSERT INTO FleetUsageHistory (HostID, {', '.join(C_USAGE_HISTORY_COLS_L)}) 
+VALUES (?{', ?' * len(C_USAGE_HISTORY_COLS_L)})"""
+    num_hosts = 0
+    # The workers read the hosts' DBs; rows are written by this 
+    # (single) thread, as SQLite allows one writer only
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures_L = [executor.submit(read_fleet_host_usage, host_S, db_path, extra_versions_L)
+                     for host_S, db_path in sources_L]
+        for future in concurrent.futures.as_completed(futures_L):
+            try:
+                host_S, db_path, db_version, rows_L = future.result()
+            except (OSError, sqlite3.Error) as e:
+                log_and_print_error(f"[ERROR] Fleet: cannot read CAM DB: {e}")
+                continue
+            cursor.execute("INSERT INTO Hosts (Host, DBVersion, NumRows, SourcePath) VALUES (?,?,?,?)",
+                           (host_S, CAM_version_str(db_version), len(rows_L), db_path))
+            host_id = cursor.lastrowid
+            cursor.executemany(insert_S, ((host_id,) + tuple(row) for row in rows_L))
+            num_hosts += 1
+
+    cursor.execute("CREATE INDEX idx_fleet_cap_app ON FleetUsageHistory(Capability, AppIdentifier)")
+    cursor.execute("CREATE INDEX idx_fleet_host_time ON FleetUsageHistory(HostID, LastUsedTimeStop)")
+    store_db.commit()
+    store_db.close()
+    return num_hosts
+
+#--------------------------------------------------------------------
+# Fleet mode of get_windowsCapability(): one set of cross-host 
+# reports for all the CAM DBs of the input
+# 2026-10-19
+#--------------------------------------------------------------------
+def get_windowsCapability_fleet(files_found, report_folder, seeker, config):
+    """Ingests all the CAM DBs of the input in a fleet store and reports on it"""
+    input_dir = seeker.directory
+    fleet_dir = create_subdir_in_report_folder(report_folder, C_FLEET_SUBDIR)
+    if fleet_dir is None:
+        return
+
+    # Per-host folders
+    sources_L = []
+    for file_found in files_found:
+        file_found = str(file_found)
+        if os.path.basename(file_found) == C_CAM_DB:
+            sources_L.append((get_fleet_host_name(file_found, input_dir), file_found))
+
+    # Per-host ZIP archives
+    for zip_path in seeker.search('*.zip'):
+        host_S = os.path.splitext(os.path.basename(zip_path))[0]
+        try:
+            db_path = extract_CAM_db_from_zip(zip_path, os.path.join(fleet_dir, "hosts", host_S))
+        except (OSError, zipfile.BadZipFile) as e:
+            logfunc(f"[WARNING] Fleet: cannot read '{zip_path}': {e}")
+            continue
+        if db_path is not None:
+            sources_L.append((host_S, db_path))
+
+    if len(sources_L) == 0:
+        logfunc(f"No Windows Capability Access Manager data available ('{C_CAM_DB}' not found).")
+        return
+
+    store_path = os.path.join(fleet_dir, C_FLEET_DB_FILENAME)
+    num_hosts = build_CAM_fleet_store(sources_L, store_path, config.schema_known_versions_L,
+                                      config.fleet_workers)
+    logfunc(f"[INFO] Fleet: {num_hosts} host(s) ingested in '{store_path}'")
+
+    db = open_sqlite_db_readonly(store_path)
+    cursor = db.cursor()
+
+    date_field = "FleetUsageHistory.LastUsedTimeStop"
+    where_date_SQL_S = start_date_and_end_date_to_sql(config.start_date_ftime64, config.end_date_ftime64, date_field)
+    date_params_D = get_date_filter_params_D(config.start_date_ftime64, config.end_date_ftime64)
+    and_date_SQL_S = ""
+    if where_date_SQL_S is not None:
+        and_date_SQL_S = "AND " + where_date_SQL_S[len("WHERE "):]
+    time_S = "datetime(({0}/10000000) - 11644473600,'unixepoch','localtime')"
+
+    #========================================
+    # "FA" - Hosts
+    #========================================
+    name_S = 'FA_CAM_fleet_hosts'
+    sql_S = """SELECT Host, DBVersion, NumRows, SourcePath FROM Hosts ORDER BY Host"""
+    headers_L = ('Host', 'DB version', 'Rows', 'Source path')
+    create_report_and_tsv(report_folder, cursor, name_S, sql_S, headers_L, name_S, store_path, config.dates_filter_S,
+                          params_D=date_params_D)
+
+    #========================================
+    # "FB" - Hosts where a binary/app used a
+    # sensitive capability (webcam, mic...)
+    #========================================
+    name_S = 'FB_CAM_fleet_sensitive_access'
+    # (create_report_and_tsv() takes no SQL parameters: values are quoted)
+    capabilities_S = ", ".join("'" + str(c).replace("'", "''") + "'" for c in config.fleet_capabilities_L)
+    sql_S = f"""SELECT FleetUsageHistory.Capability, FleetUsageHistory.AppIdentifier, 
+COUNT(DISTINCT FleetUsageHistory.HostID) AS NumHosts,
+group_concat(DISTINCT Hosts.Host) AS HostList,
+{time_S.format('MIN(FleetUsageHistory.LastUsedTimeStop)')} AS First_seen,
+{time_S.format('MAX(FleetUsageHistory.LastUsedTimeStop)')} AS Last_seen
+FROM FleetUsageHistory
+INNER JOIN Hosts ON FleetUsageHistory.HostID = Hosts.HostID
+WHERE FleetUsageHistory.Capability IN ({capabilities_S}) {and_date_SQL_S}
+GROUP BY FleetUsageHistory.Capability, FleetUsageHistory.AppIdentifier
+ORDER BY NumHosts DESC, FleetUsageHistory.Capability, FleetUsageHistory.AppIdentifier"""
+    headers_L = ('Capability', 'App/Binary path', 'Hosts (count)', 'Hosts', 'First seen', 'Last seen')
+    create_report_and_tsv(report_folder, cursor, name_S, sql_S, headers_L, name_S, store_path, config.dates_filter_S,
+                          params_D=date_params_D)
+
+    #========================================
+    # "FC" - First/last seen per host
+    #========================================
+    name_S = 'FC_CAM_fleet_first_last_per_host'
+    sql_S = f"""SELECT Hosts.Host, FleetUsageHistory.Capability, FleetUsageHistory.AppIdentifier,
+COUNT(*) AS NumOccurrences,
+{time_S.format('MIN(FleetUsageHistory.LastUsedTimeStop)')} AS First_seen,
+{time_S.format('MAX(FleetUsageHistory.LastUsedTimeStop)')} AS Last_seen
+FROM FleetUsageHistory
+INNER JOIN Hosts ON FleetUsageHistory.HostID = Hosts.HostID
+WHERE 1 {and_date_SQL_S}
+GROUP BY FleetUsageHistory.HostID, FleetUsageHistory.Capability, FleetUsageHistory.AppIdentifier
+ORDER BY Hosts.Host, FleetUsageHistory.Capability, First_seen"""
+    headers_L = ('Host', 'Capability', 'App/Binary path', 'Count', 'First seen', 'Last seen')
+    create_report_and_tsv(report_folder, cursor, name_S, sql_S, headers_L, name_S, store_path, config.dates_filter_S,
+                          params_D=date_params_D)
+
+    db.close()
+
+#====================================================================
+# WAL frame parser
+# Pure-Python reader of a SQLite database file and its '-wal' file,
+# used to find out what the WAL changes without checkpointing it.
+# Format: https://www.sqlite.org/fileformat2.html
+#====================================================================
+C_WAL_HEADER_SIZE       = 32
+C_WAL_FRAME_HEADER_SIZE = 24
+C_WAL_MAGIC_L           = (0x377f0682, 0x377f0683)
+C_WAL_MAGIC_BIG_ENDIAN  = 0x377f0683   # checksums of big-endian words
+C_DB_HEADER_SIZE        = 100
+
+# b-tree page types
+C_BTREE_INTERIOR_INDEX  = 0x02
+C_BTREE_INTERIOR_TABLE  = 0x05
+C_BTREE_LEAF_INDEX      = 0x0a
+C_BTREE_LEAF_TABLE      = 0x0d
+
+# Name used for pages of the schema table (page 1) and for pages
+# that are not reachable from any b-tree (freelist, overflow of
+# unchanged cells, pointer-map...)
+C_WAL_SCHEMA_TABLE      = "sqlite_master"
+C_WAL_UNATTRIBUTED      = "(freelist/other)"
+
+#--------------------------------------------------------------------
+# Computes the WAL checksum of 'data' (as SQLite does: 32-bit words 
+# added in pairs), starting from the checksum (s0, s1) of what 
+# precedes it in the WAL
+# @param data       [IN] bytes (multiple of 8 bytes)
+# @param s0, s1     [IN] checksum so far (0, 0 for the WAL header)
+# @param big_endian [IN] words are big-endian (WAL magic 0x377f0683)
+# @return s0, s1
+# 2026-10-19
+#--------------------------------------------------------------------
+def wal_checksum(data, s0, s1, big_endian):
+    """Returns the cumulative WAL checksum (s0, s1) of 'data'"""
+    words = iter(struct.unpack(f"{'>' if big_endian else '<'}{len(data) // 4}I", data))
+    for word0, word1 in zip(words, words):
+        s0 = (s0 + word0 + s1) & 0xFFFFFFFF
+        s1 = (s1 + word1 + s0) & 0xFFFFFFFF
+    return s0, s1
+
+#--------------------------------------------------------------------
+# Decodes a SQLite varint (1 to 9 bytes, big endian)
+# @param buf    [IN] bytes
+# @param offset [IN] offset of the varint in 'buf'
+# @return value, offset of the first byte after the varint
+# 2026-10-19
+#--------------------------------------------------------------------
+def read_varint(buf, offset):
+    """Returns the value of the varint at 'offset' and the offset past it"""
+    value = 0
+    for i in range(8):
+        byte = buf[offset + i]
+        value = (value << 7) | (byte & 0x7f)
+        if byte < 0x80:
+            return value, offset + i + 1
+    # 9th byte: all 8 bits are used
+    value = (value << 8) | buf[offset + 8]
+    return value, offset + 9
+
+class SQLiteWALReader:
+    """
+    Reads the pages of a SQLite database as they are with (use_wal=True)
+    or without (use_wal=False) the committed frames of its WAL file.
+    The WAL is checked when the object is created (salts and checksums
+    of the frames, as SQLite does); the pages are read on demand.
+    """
+    #--------------------------------------------------------------------
+    # @param db_path  [IN] path to the database file, or a binary file 
+    #                      object (e.g. io.BytesIO) with its content
+    # @param wal_path [IN] path to the WAL file (default: db_path-wal),
+    #                      or a binary file object (None: no WAL when 
+    #                      'db_path' is a file object)
+    # 2026-10-19
+    #--------------------------------------------------------------------
+    def __init__(self, db_path, wal_path=None):
+        """constructor"""
+        self.db_path = db_path
+        if isinstance(db_path, str):
+            self.wal_path = wal_path if wal_path is not None else f"{db_path}-wal"
+            self.db_file = open(db_path, 'rb')
+        else:
+            self.wal_path = wal_path
+            self.db_file = db_path
+        self.wal_file = None
+
+        header = self.db_file.read(C_DB_HEADER_SIZE)
+        if len(header) < C_DB_HEADER_SIZE or not header.startswith(b'SQLite format 3\x00'):
+            self.db_file.close()
+            raise ValueError(f"'{db_path}' is not a SQLite 3 database")
+
+        self.page_size = struct.unpack('>H', header[16:18])[0]
+        if self.page_size == 1:
+            self.page_size = 65536
+        self.usable_size = self.page_size - header[20]
+        self.db_num_pages = struct.unpack('>I', header[28:32])[0]
+        self.text_encoding = {1: 'utf-8', 2: 'utf-16-le', 3: 'utf-16-be'}.get(
+                                struct.unpack('>I', header[56:60])[0], 'utf-8')
+
+        # Page number -> offset of the page data of the last committed frame
+        self.wal_frames_D = {}
+        self.wal_num_frames = 0
+        self.wal_num_commits = 0
+        self.wal_num_pages = self.db_num_pages
+        if self.wal_path is None:
+            pass
+        elif not isinstance(self.wal_path, str):
+            self.wal_file = self.wal_path
+            self._parse_wal()
+        elif os.path.isfile(self.wal_path) and os.path.getsize(self.wal_path) > 0:
+            self.wal_file = open(self.wal_path, 'rb')
+            self._parse_wal()
+
+    def _parse_wal(self):
+        """Parses the WAL header and the frames, up to the first frame that is
+           not valid (salt or checksum mismatch), as SQLite does"""
+        header = self.wal_file.read(C_WAL_HEADER_SIZE)
+        if len(header) < C_WAL_HEADER_SIZE:
+            return
+
+        magic, _version, page_size, _ckpt_seq, salt1, salt2, cksum1, cksum2 = struct.unpack('>8I', header)
+        if magic not in C_WAL_MAGIC_L or page_size != self.page_size:
+            return
+
+        # Checksums are cumulative: the header, then each frame header 
+        # (first 8 bytes) and page data
+        big_endian = magic == C_WAL_MAGIC_BIG_ENDIAN
+        checksum = wal_checksum(header[:24], 0, 0, big_endian)
+        if checksum != (cksum1, cksum2):
+            # SQLite ignores a WAL whose header is not valid
+            return
+
+        # Frames of a transaction only count once its commit frame is found
+        pending_D = {}
+        frame_offset = C_WAL_HEADER_SIZE
+        while True:
+            self.wal_file.seek(frame_offset)
+            frame_header = self.wal_file.read(C_WAL_FRAME_HEADER_SIZE)
+            page = self.wal_file.read(page_size)
+            if len(frame_header) < C_WAL_FRAME_HEADER_SIZE or len(page) < page_size:
+                break
+
+            page_number, db_size_after_commit, frame_salt1, frame_salt2, \
+                frame_cksum1, frame_cksum2 = struct.unpack('>6I', frame_header)
+            if (frame_salt1, frame_salt2) != (salt1, salt2):
+                # Leftover of a previous WAL generation
+                break
+            checksum = wal_checksum(frame_header[:8], checksum[0], checksum[1], big_endian)
+            checksum = wal_checksum(page, checksum[0], checksum[1], big_endian)
+            if checksum != (frame_cksum1, frame_cksum2):
+                # Torn or corrupted frame: it ends the WAL, and the 
+                # transaction it belongs to is not applied
+                break
+
+            self.wal_num_frames += 1
+            pending_D[page_number] = frame_offset + C_WAL_FRAME_HEADER_SIZE
+            if db_size_after_commit != 0:
+                # Commit frame
+                self.wal_frames_D.update(pending_D)
+                pending_D = {}
+                self.wal_num_commits += 1
+                self.wal_num_pages = db_size_after_commit
+
+            frame_offset += C_WAL_FRAME_HEADER_SIZE + page_size
+
+    def changed_pages(self):
+        """Returns the set of page numbers written by the committed WAL frames"""
+        return set(self.wal_frames_D.keys())
+
+    def num_pages(self, use_wal=True):
+        """Number of pages of the database"""
+        return self.wal_num_pages if use_wal else self.db_num_pages
+
+    def read_page(self, page_number, use_wal=True):
+        """Returns the content of page 'page_number' (1-based), or None if it does not exist"""
+        if use_wal and page_number in self.wal_frames_D:
+            self.wal_file.seek(self.wal_frames_D[page_number])
+            return self.wal_file.read(self.page_size)
+
+        if page_number < 1 or page_number > self.db_num_pages:
+            return None
+        self.db_file.seek((page_number - 1) * self.page_size)
+        page = self.db_file.read(self.page_size)
+        return page if len(page) == self.page_size else None
+
+    def close(self):
+        """Closes the files"""
+        self.db_file.close()
+        if self.wal_file is not None:
+            self.wal_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+#--------------------------------------------------------------------
+# Parses the header of a b-tree page.
+# @param page        [IN] content of the page
+# @param page_number [IN] number of the page (page 1 has the 100 bytes
+#                         DB header before the b-tree header)
+# @return page_type, list with the offsets of the cells, right-most 
+#         pointer (0 for leaf pages). page_type is None if the page 
+#         is not a b-tree page.
+# 2026-10-19
+#--------------------------------------------------------------------
+def parse_btree_page_header(page, page_number):
+    """Returns page_type, cell offsets and right-most pointer of a b-tree page"""
+    hdr = C_DB_HEADER_SIZE if page_number == 1 else 0
+    page_type = page[hdr]
+    if page_type not in (C_BTREE_INTERIOR_INDEX, C_BTREE_INTERIOR_TABLE, 
+                         C_BTREE_LEAF_INDEX, C_BTREE_LEAF_TABLE):
+        return None, [], 0
+
+    num_cells = struct.unpack('>H', page[hdr+3:hdr+5])[0]
+    if page_type in (C_BTREE_INTERIOR_INDEX, C_BTREE_INTERIOR_TABLE):
+        right_ptr = struct.unpack('>I', page[hdr+8:hdr+12])[0]
+        cell_ptrs_offset = hdr + 12
+    else:
+        right_ptr = 0
+        cell_ptrs_offset = hdr + 8
+
+    cells_L = list(struct.unpack(f'>{num_cells}H', page[cell_ptrs_offset:cell_ptrs_offset + 2*num_cells]))
+    return page_type, cells_L, right_ptr
+
+#--------------------------------------------------------------------
+# Parses a cell of a b-tree page.
+# @param page        [IN] content of the page
+# @param page_type   [IN] type of the page
+# @param cell_offset [IN] offset of the cell in the page
+# @param usable_size [IN] usable size of a page
+# @return left_child (0 for leaf pages), local payload (bytes), 
+#         total payload size, first overflow page (0 if none)
+# 2026-10-19
+#--------------------------------------------------------------------
+def parse_btree_cell(page, page_type, cell_offset, usable_size):
+    """Returns left child, local payload, payload size and first overflow page of a cell"""
+    offset = cell_offset
+    left_child = 0
+    if page_type in (C_BTREE_INTERIOR_INDEX, C_BTREE_INTERIOR_TABLE):
+        left_child = struct.unpack('>I', page[offset:offset+4])[0]
+        offset += 4
+        if page_type == C_BTREE_INTERIOR_TABLE:
+            # Only a rowid key, no payload
+            return left_child, b'', 0, 0
+
+    payload_size, offset = read_varint(page, offset)
+    if page_type == C_BTREE_LEAF_TABLE:
+        _rowid, offset = read_varint(page, offset)
+        max_local = usable_size - 35
+    else:
+        max_local = ((usable_size - 12) * 64 // 255) - 23
+
+    if payload_size <= max_local:
+        return left_child, page[offset:offset+payload_size], payload_size, 0
 
-        # Ok, there is a non-zero WAL file
-        db = open_sqlite_db(db_path)
-        cursor = db.cursor()
+    min_local = ((usable_size - 12) * 32 // 255) - 23
+    local_size = min_local + ((payload_size - min_local) % (usable_size - 4))
+    if local_size > max_local:
+        local_size = min_local
+    overflow_page = struct.unpack('>I', page[offset+local_size:offset+local_size+4])[0]
+    return left_child, page[offset:offset+local_size], payload_size, overflow_page
 
-        # Check WAL mode and database status
-        cursor.execute("PRAGMA journal_mode=WAL")
-        cursor.execute("PRAGMA integrity_check")
-        integrity_result = cursor.fetchone()[0]
+#--------------------------------------------------------------------
+# Follows an overflow chain.
+# @return list with the page numbers of the chain
+# 2026-10-19
+#--------------------------------------------------------------------
+def get_overflow_chain(reader, first_page, use_wal=True):
+    """Returns the pages of the overflow chain starting at 'first_page'"""
+    chain_L = []
+    seen_S = set()
+    page_number = first_page
+    while page_number != 0 and page_number not in seen_S:
+        page = reader.read_page(page_number, use_wal)
+        if page is None:
+            break
+        seen_S.add(page_number)
+        chain_L.append(page_number)
+        page_number = struct.unpack('>I', page[:4])[0]
+    return chain_L
 
+#--------------------------------------------------------------------
+# Reads a full cell payload (local part + overflow pages)
+# 2026-10-19
+#--------------------------------------------------------------------
+def read_full_payload(reader, local_payload, payload_size, overflow_page, use_wal=True):
+    """Returns the complete payload of a cell"""
+    if overflow_page == 0:
+        return local_payload
+
+    parts_L = [local_payload]
+    remaining = payload_size - len(local_payload)
+    for page_number in get_overflow_chain(reader, overflow_page, use_wal):
+        page = reader.read_page(page_number, use_wal)
+        chunk = page[4:reader.usable_size][:remaining]
+        parts_L.append(chunk)
+        remaining -= len(chunk)
+        if remaining <= 0:
+            break
+    return b''.join(parts_L)
 
-        if integrity_result == 'ok':
-            if output_debug_L is not None:
-                output_debug_L.append("[INFO] Database integrity check passed.")
+#--------------------------------------------------------------------
+# Decodes a SQLite record (header with serial types + body)
+# @return list with the values of the record
+# 2026-10-19
+#--------------------------------------------------------------------
+def decode_record(payload, text_encoding='utf-8'):
+    """Decodes a record payload into a list of values"""
+    header_size, offset = read_varint(payload, 0)
+    serial_types_L = []
+    while offset < header_size:
+        serial_type, offset = read_varint(payload, offset)
+        serial_types_L.append(serial_type)
+
+    values_L = []
+    offset = header_size
+    int_sizes = {1: 1, 2: 2, 3: 3, 4: 4, 5: 6, 6: 8}
+    for serial_type in serial_types_L:
+        if serial_type == 0:
+            values_L.append(None)
+        elif serial_type in int_sizes:
+            size = int_sizes[serial_type]
+            values_L.append(int.from_bytes(payload[offset:offset+size], 'big', signed=True))
+            offset += size
+        elif serial_type == 7:
+            values_L.append(struct.unpack('>d', payload[offset:offset+8])[0])
+            offset += 8
+        elif serial_type in (8, 9):
+            values_L.append(serial_type - 8)
+        elif serial_type >= 12:
+            size = (serial_type - 12) // 2
+            value = payload[offset:offset+size]
+            if serial_type % 2 == 1:
+                value = value.decode(text_encoding, 'replace')
+            values_L.append(value)
+            offset += size
+        else:
+            # Serial types 10/11 are reserved
+            values_L.append(None)
+    return values_L
 
-            # Checkpoint the WAL file
-            cursor.execute("PRAGMA wal_checkpoint(RESTART);") 
-            output_debug_L.append("[INFO] WAL file checkpointed successfully.")
+#--------------------------------------------------------------------
+# Reads the schema table (page 1 b-tree) with the pure-Python reader
+# @param reader  [IN] SQLiteWALReader object
+# @param use_wal [IN] True: schema with the WAL applied
+# @return list of tuples (type, name, tbl_name, rootpage)
+# 2026-10-19
+#--------------------------------------------------------------------
+def read_schema_roots(reader, use_wal=True):
+    """Returns (type, name, tbl_name, rootpage) for each entry of sqlite_master"""
+    schema_L = []
+    stack_L = [1]
+    seen_S = set()
+    while stack_L:
+        page_number = stack_L.pop()
+        if page_number in seen_S:
+            continue
+        seen_S.add(page_number)
+        page = reader.read_page(page_number, use_wal)
+        if page is None:
+            continue
+        page_type, cells_L, right_ptr = parse_btree_page_header(page, page_number)
+        if page_type == C_BTREE_INTERIOR_TABLE:
+            for cell_offset in cells_L:
+                stack_L.append(struct.unpack('>I', page[cell_offset:cell_offset+4])[0])
+            stack_L.append(right_ptr)
+        elif page_type == C_BTREE_LEAF_TABLE:
+            for cell_offset in cells_L:
+                _left, local_payload, payload_size, overflow_page = parse_btree_cell(page, page_type, cell_offset, reader.usable_size)
+                payload = read_full_payload(reader, local_payload, payload_size, overflow_page, use_wal)
+                values_L = decode_record(payload, reader.text_encoding)
+                if len(values_L) >= 4 and isinstance(values_L[3], int) and values_L[3] > 0:
+                    schema_L.append((values_L[0], values_L[1], values_L[2], values_L[3]))
+    return schema_L
 
-        else:
-            Err_S = "[INFO] Integrity check failed: {integrity_result}"
-            logfunc(Err_S)
-            output_debug_L.append(Err_S)
-       
-        db.commit()
-        db.close()
+#--------------------------------------------------------------------
+# Maps pages to the b-trees that own them, reading only the interior 
+# pages of the b-trees. SQLite b-trees are balanced (all leaves are 
+# at the same depth), so the trees are walked level by level: once 
+# the first page of a level is a leaf, the whole level is made of 
+# leaves, known from the child pointers of their parents. Leaves are
+# not read, except the ones in 'leaves_to_scan_S', whose overflow 
+# chains are followed.
+# @param reader           [IN] SQLiteWALReader object
+# @param roots_L          [IN] list of (tbl_name, rootpage)
+# @param leaves_to_scan_S [IN] leaf pages whose overflow pages are wanted
+# @param use_wal          [IN] True: b-trees with the WAL applied
+# @return dict page_number -> tbl_name, set of leaf page numbers
+# 2026-10-19
+#--------------------------------------------------------------------
+def map_btree_pages(reader, roots_L, leaves_to_scan_S, use_wal=True):
+    """Returns a dict page_number -> table name owning the page and the set of leaf pages"""
+    owner_D = {}
+    leaves_S = set()
+
+    def scan_overflow(page, page_type, cells_L, tbl_name):
+        for cell_offset in cells_L:
+            _left, _payload, _size, overflow_page = parse_btree_cell(page, page_type, cell_offset, reader.usable_size)
+            if overflow_page:
+                for overflow_page_number in get_overflow_chain(reader, overflow_page, use_wal):
+                    owner_D.setdefault(overflow_page_number, tbl_name)
+
+    for tbl_name, root_page in roots_L:
+        level_L = [root_page]
+        while level_L:
+            level_L = [page_number for page_number in level_L if page_number not in owner_D]
+            for page_number in level_L:
+                owner_D[page_number] = tbl_name
+
+            next_level_L = []
+            for i, page_number in enumerate(level_L):
+                if i > 0 and page_number not in leaves_to_scan_S and leaves_S and level_L[0] in leaves_S:
+                    # Leaf level: nothing else to learn from this page
+                    leaves_S.add(page_number)
+                    continue
+
+                page = reader.read_page(page_number, use_wal)
+                if page is None:
+                    continue
+                page_type, cells_L, right_ptr = parse_btree_page_header(page, page_number)
+                if page_type in (C_BTREE_LEAF_TABLE, C_BTREE_LEAF_INDEX):
+                    leaves_S.add(page_number)
+                    if page_number in leaves_to_scan_S:
+                        scan_overflow(page, page_type, cells_L, tbl_name)
+                elif page_type in (C_BTREE_INTERIOR_TABLE, C_BTREE_INTERIOR_INDEX):
+                    if page_type == C_BTREE_INTERIOR_INDEX:
+                        scan_overflow(page, page_type, cells_L, tbl_name)
+                    for cell_offset in cells_L:
+                        next_level_L.append(struct.unpack('>I', page[cell_offset:cell_offset+4])[0])
+                    if right_ptr:
+                        next_level_L.append(right_ptr)
+            level_L = next_level_L
+
+    return owner_D, leaves_S
 
-        if output_debug_L is not None:
-            # We...
-            # - i) Display the # of records per table and the size of the DB file 
-            # - ii) Compute the message digest sha256 of each table after applying WAL
-            # - iii) We compare message digest table per table
-            records_per_table_S = count_records_per_table_S(db_path)
-            sep_S = get_sep()
-            output_debug_L.append(sep_S)
-            output_debug_L.append("[INFO] after 'checkpoint'")
-            if records_per_table_S is not None:
-                output_debug_L.append(records_per_table_S)
+#--------------------------------------------------------------------
+# Reports what the WAL file of a SQLite database changes, without 
+# checkpointing it and without going through the sqlite3 engine 
+# (the evidence files are only read). The cost is O(WAL size) plus 
+# the interior pages of the b-trees, not O(database size).
+# For each table (its indexes included), returns the number of pages
+# written by the WAL, and the number of rows held by those pages 
+# before (DB file) and after (WAL frames) the WAL is applied.
+# @param db_path  [IN] path to the database
+# @param wal_path [IN] path to the WAL (default: db_path-wal)
+# @return dict tbl_name -> {"pages":, "rows_before":, "rows_after":},
+#         dict with WAL info ("frames", "commits", "pages", 
+#         "tables_created", "tables_dropped")
+# 2026-10-19
+#--------------------------------------------------------------------
+def get_WAL_changes_per_table(db_path, wal_path=None):
+    """Returns the per-table changes of the WAL of 'db_path' and a dict with WAL info"""
+    changes_D = {}
+    with SQLiteWALReader(db_path, wal_path) as reader:
+        changed_pages_S = reader.changed_pages()
+        info_D = {"frames": reader.wal_num_frames,
+                  "commits": reader.wal_num_commits,
+                  "pages": len(changed_pages_S),
+                  "tables_created": [],
+                  "tables_dropped": []}
+        if len(changed_pages_S) == 0:
+            return changes_D, info_D
+
+        schema_before_L = read_schema_roots(reader, use_wal=False)
+        schema_after_L = read_schema_roots(reader, use_wal=True)
+        tables_before_S = {name for (obj_type, name, _tbl, _root) in schema_before_L if obj_type == 'table'}
+        tables_after_S = {name for (obj_type, name, _tbl, _root) in schema_after_L if obj_type == 'table'}
+        info_D["tables_created"] = sorted(tables_after_S - tables_before_S)
+        info_D["tables_dropped"] = sorted(tables_before_S - tables_after_S)
+
+        roots_before_L = [(C_WAL_SCHEMA_TABLE, 1)] + [(tbl, root) for (_t, _n, tbl, root) in schema_before_L]
+        roots_after_L = [(C_WAL_SCHEMA_TABLE, 1)] + [(tbl, root) for (_t, _n, tbl, root) in schema_after_L]
+        owner_before_D, _leaves = map_btree_pages(reader, roots_before_L, changed_pages_S, use_wal=False)
+        owner_after_D, _leaves = map_btree_pages(reader, roots_after_L, changed_pages_S, use_wal=True)
+
+        def table_stats(tbl_name):
+            return changes_D.setdefault(tbl_name, {"pages": 0, "rows_before": 0, "rows_after": 0})
+
+        for page_number in sorted(changed_pages_S):
+            tbl_after = owner_after_D.get(page_number)
+            tbl_before = owner_before_D.get(page_number)
+            table_stats(tbl_after or tbl_before or C_WAL_UNATTRIBUTED)["pages"] += 1
+
+            # Rows are the cells of the table leaf pages
+            page_after = reader.read_page(page_number, use_wal=True)
+            page_type, cells_L, _ptr = parse_btree_page_header(page_after, page_number)
+            if tbl_after is not None and page_type == C_BTREE_LEAF_TABLE:
+                table_stats(tbl_after)["rows_after"] += len(cells_L)
+
+            page_before = reader.read_page(page_number, use_wal=False)
+            if page_before is not None and tbl_before is not None:
+                page_type, cells_L, _ptr = parse_btree_page_header(page_before, page_number)
+                if page_type == C_BTREE_LEAF_TABLE:
+                    table_stats(tbl_before)["rows_before"] += len(cells_L)
+
+    return dict(sorted(changes_D.items())), info_D
 
-            # Compute digest of tables content
-            msg_digest_per_table_after_D = compute_table_digest(db_path, 'sha256')
+#--------------------------------------------------------------------
+# Returns the set of (user) tables whose content is changed by the 
+# WAL of 'db_path', including the tables created or dropped by the WAL
+# @return set of table names, or None if the WAL cannot be parsed
+# 2026-10-19
+#--------------------------------------------------------------------
+def get_tables_changed_by_WAL(db_path):
+    """Set of tables changed by the WAL of 'db_path' (None on error)"""
+    try:
+        changes_D, info_D = get_WAL_changes_per_table(db_path)
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        logfunc(f"[WARNING] Cannot parse WAL of '{db_path}': {e}")
+        return None
 
-            if (msg_digest_per_table_before_D is not None) and\
-                    (msg_digest_per_table_after_D is not None):
-                compare_dictionaries(msg_digest_per_table_before_D, msg_digest_per_table_after_D, output_debug_L)
-            output_debug_L.append(sep_S)
+    tables_S = set(changes_D.keys()) - {C_WAL_SCHEMA_TABLE, C_WAL_UNATTRIBUTED}
+    tables_S.update(info_D["tables_created"])
+    tables_S.update(info_D["tables_dropped"])
+    return tables_S
 
-    # DEBUG
-    if output_debug_L is not None:
-        logfunc("DEBUG - 'output_debug_L'")
-        pprint.pp(output_debug_L)
+#--------------------------------------------------------------------
+# Returns the rows of the "WAL changes" report (one row per table 
+# changed by the WAL) and the summary of the WAL, written in the 
+# heading of the report
+# @param db_path  [IN] path to the DB (or file object, see SQLiteWALReader)
+# @param wal_path [IN] path to the WAL (or file object), default: db_path-wal
+# @return (list of rows, summary), or None if the WAL cannot be parsed
+# 2026-10-19
+#--------------------------------------------------------------------
+def get_WAL_changes_report(db_path, wal_path=None):
+    """Rows and summary of the 'WAL changes' report for 'db_path' (None on error)"""
+    try:
+        changes_D, info_D = get_WAL_changes_per_table(db_path, wal_path)
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        logfunc(f"[WARNING] Cannot parse WAL of '{db_path}': {e}")
+        return None
 
-    return True
+    rows_L = []
+    for tbl_name, stats_D in changes_D.items():
+        rows_L.append((tbl_name, stats_D["pages"], stats_D["rows_before"], stats_D["rows_after"]))
+
+    summary_S = (f"[WAL] {info_D['frames']} committed frame(s), {info_D['commits']} commit(s), "
+                 f"{info_D['pages']} page(s); created={info_D['tables_created']} "
+                 f"dropped={info_D['tables_dropped']}")
+    return rows_L, summary_S
+
+#====================================================================
+# In-memory CAM DB
+# For zip/tar inputs, the DB and its WAL are read straight from the
+# archive (seeker.open_file()), the committed WAL frames are applied
+# to the page image and the image is loaded with deserialize(): 
+# nothing is written to the temp folder.
+#====================================================================
+# sqlite3.Connection.deserialize() is available since Python 3.11
+C_IN_MEMORY_SUPPORTED = hasattr(sqlite3.Connection, "deserialize")
 
 #--------------------------------------------------------------------
-# 2025-04-15
+# Builds the content of a DB with the committed frames of its WAL 
+# applied (what a checkpoint would write)
+# @param db_bytes  [IN] content of the DB file
+# @param wal_bytes [IN] content of the WAL file (None/empty: no WAL)
+# @return bytes of the DB (rollback journal mode)
+# 2026-10-19
 #--------------------------------------------------------------------
-def infere_cam_db_version(db_path):
-    """Attempt to determine whether we support/recognize database 'db_path'"""
-    # Get a dictionary with the tables of 'db_path' and the column count
-    # of each of the tables. 
-    # Each keys of the dictionary is a table name of the database,
-    # whereas the value is the number of columns
-    schema_db_tables_cols_count_D = get_sqlite_tables_cols_count(db_path)
+def build_db_image_with_WAL(db_bytes, wal_bytes=None):
+    """Returns 'db_bytes' with the committed WAL frames of 'wal_bytes' applied"""
+    wal_file = io.BytesIO(wal_bytes) if wal_bytes else None
+    with SQLiteWALReader(io.BytesIO(db_bytes), wal_file) as reader:
+        num_pages = reader.num_pages(use_wal=True)
+        empty_page = bytes(reader.page_size)
+        image = bytearray()
+        for page_number in range(1, num_pages + 1):
+            page = reader.read_page(page_number, use_wal=True)
+            image += page if page is not None else empty_page
+
+    # Header: legacy (rollback journal) file format, as an in-memory 
+    # DB cannot be in WAL mode, and a valid in-header DB size 
+    # ("version-valid-for" equal to the change counter)
+    image[18] = 1
+    image[19] = 1
+    image[28:32] = struct.pack('>I', num_pages)
+    image[92:96] = image[24:28]
+    return bytes(image)
 
-    num_tables = len(schema_db_tables_cols_count_D)
-    if num_tables == 0:
-        # Something is wrong
-        Err_S = f"[ERROR] Error processing database '{db_path}'"
-        logfunc(Err_S)
-        return -1
+#--------------------------------------------------------------------
+# Computes the SHA-256 of the content of a DB and of its WAL (same 
+# value as compute_db_content_hash() over the files)
+# @param db_bytes  [IN] content of the DB file
+# @param wal_bytes [IN] content of the WAL file (may be empty)
+# @return hex digest
+# 2026-10-19
+#--------------------------------------------------------------------
+def compute_bytes_content_hash(db_bytes, wal_bytes):
+    """SHA-256 of 'db_bytes' followed by 'wal_bytes'"""
+    hasher = hashlib.sha256(db_bytes)
+    hasher.update(wal_bytes)
+    return hasher.hexdigest()
 
+#--------------------------------------------------------------------
+# Reads an archive member CAM DB (and its WAL) into an in-memory 
+# SQLite database
+# @param db_path  [IN] path of the DB as returned by the seeker
+# @param wal_path [IN] path of the WAL as returned by the seeker (None: no WAL)
+# @param seeker   [IN] seeker of the input (see search_files.py)
+# @return (connection, DB bytes, WAL bytes), (None, None, None) on error
+# 2026-10-19
+#--------------------------------------------------------------------
+def load_CAM_db_in_memory(db_path, wal_path, seeker):
+    """Returns an in-memory (query only) connection to the CAM DB 'db_path' of the archive"""
+    try:
+        with seeker.open_file(db_path) as db_file:
+            db_bytes = db_file.read()
+        wal_bytes = b""
+        if wal_path is not None:
+            with seeker.open_file(wal_path) as wal_file:
+                wal_bytes = wal_file.read()
+
+        image = build_db_image_with_WAL(db_bytes, wal_bytes)
+        conn = sqlite3.connect(":memory:")
+        conn.deserialize(image)
+        conn.execute("PRAGMA query_only = ON")
+    except (OSError, KeyError, ValueError, IndexError, struct.error, 
+            sqlite3.Error, zipfile.BadZipFile, tarfile.TarError) as e:
+        Err_S = f"[ERROR] Cannot read '{db_path}' in memory: {e}"
+        log_and_print_error(Err_S)
+        return None, None, None
 
-    ret_code = C_UNKNOWN
-    Info_S = ""
-    if num_tables == C_NUM_TABLES_CAM_DB_W23H2:
-        # The number of tables indicates this might be W23H2. 
-        # Let's check if schema_db_tables_cols_count_D has
-        # the same content as C_TABLES_CAM_DB_COLS_COUNT_W23H2_D
-        compare_L = compare_dicts_L(schema_db_tables_cols_count_D, C_TABLES_CAM_DB_COLS_COUNT_W23H2_D)
-        if len(compare_L) != 0:
-            ret_code = C_W23H2_DIFF
-            # Hum -- changes were detected at the column count level
-            Info_S = f"""[WARNING] Column count change detected for {C_CAM_DB}:
-- {num_tables} tables (compatible with 'W23H2')
-- changes: {compare_L}"""
-        else:
-            ret_code = C_W23H2
-            Info_S = f"[INFO] W23H2 schema ({num_tables} tables)"
-    elif num_tables == C_NUM_TABLES_CAM_DB_W24H2:
-        # The number of tables indicates this might be W24H2. 
-        # Let's check if schema_db_tables_cols_count_D has
-        # the same content as C_TABLES_CAM_DB_COLS_COUNT_W24H2_D
-        compare_L = compare_dicts_L(schema_db_tables_cols_count_D, C_TABLES_CAM_DB_COLS_COUNT_W24H2_D)
-        if len(compare_L) != 0:
-            ret_code = C_W24H2_DIFF
-            # Hum -- changes were detected at the column count level
-            Info_S = f"""[WARNING] Column count change detected for {db_path}:
-- {num_tables} tables (compatible with 'W24H2')
-- changes: {compare_L}"""
-        else:
-            ret_code = C_W24H2
-            Info_S = f"[INFO] W24H2 schema ({num_tables} tables)"
-    else:
-        # num_tables is neither C_TABLES_CAM_DB_COLS_COUNT_W23H2_D 
-        # or C_TABLES_CAM_DB_COLS_COUNT_W24H2_D 
-        # WARN!
-        # Get a dictionary with the table names (keys) and the name 
-        # of their columns (values)
-        schema_db_tables_D = get_sqlite_schema_readonly(db_path)
-        Info_S = f"""[WARNING] Unexpected number of tables {num_tables} for {db_path}.
-Expecting {C_NUM_TABLES_CAM_DB_W23H2} tables for W23H2 or {C_NUM_TABLES_CAM_DB_W24H2} for W24H2.
-Current DB: {schema_db_tables_D}
-"""
-    if len(Info_S):
-        logfunc(Info_S)
-        
-    return ret_code
+    return conn, db_bytes, wal_bytes
+
+#--------------------------------------------------------------------
+# Extracts to the temp folder the archive members of 'files_found' 
+# that were not extracted by the seeker (see tosearch_no_extract)
+# @param files_found [IN] paths returned by the seeker
+# @param seeker      [IN] seeker of the input
+# @return list with the paths on disk
+# 2026-10-19
+#--------------------------------------------------------------------
+def extract_archive_members(files_found, seeker):
+    """Returns 'files_found' with every archive member written to disk"""
+    return [seeker.extract_file(str(file_found)) for file_found in files_found]
 
 
 #====================================================================
@@ -1928,6 +3584,217 @@ on NonPackagedUsageHistory.AppName = AppNames.ID
 
     return sql_packagedApps_S, sql_nonPackagedApps_S, headers_L        
 
+#--------------------------------------------------------------------
+# CAM aggregation engine
+# Usage records (packaged + non-packaged) are counted by a single
+# UNION ALL + GROUP BY over the dimensions of 'C_AGG_DIMENSIONS_D'.
+# One scan is done at the finest grouping needed; the views (count 
+# per capability, heatmaps...) are rolled up from it in Python.
+#--------------------------------------------------------------------
+C_AGG_TIME_S = "(({0}/10000000) - 11644473600),'unixepoch','localtime'"
+# dimension -> (packaged expression, non-packaged expression)
+# '{0}' is replaced by the LastUsedTimeStop field of each table
+C_AGG_DIMENSIONS_D = {
+    'capability': ("Capabilities.StringValue", "Capabilities.StringValue"),
+    'app':        ("PackageFamilyNames.StringValue", "BinaryFullPaths.StringValue"),
+    'day':        (f"date({C_AGG_TIME_S})", f"date({C_AGG_TIME_S})"),
+    'hour':       (f"strftime('%H',{C_AGG_TIME_S})", f"strftime('%H',{C_AGG_TIME_S})"),
+}
+# Columns of the 'hour' dimension in matrices (always the 24 hours)
+C_AGG_HOURS_L = [f"{h:02d}" for h in range(24)]
+
+#--------------------------------------------------------------------
+# Returns the aggregation SQL for the dimensions 'dims_L'
+# @param dims_L                  [IN] list of keys of C_AGG_DIMENSIONS_D
+# @param packaged_date_filter    [IN] WHERE clause for PackagedUsageHistory ("" if none)
+# @param nonpackaged_date_filter [IN] WHERE clause for NonPackagedUsageHistory ("" if none)
+# @return SQL string; rows are (dim_1, ..., dim_n, Count)
+# 2026-10-19
+#--------------------------------------------------------------------
+def get_SQL_CAM_aggregation(dims_L, packaged_date_filter, nonpackaged_date_filter):
+    """Returns the UNION ALL + GROUP BY SQL counting usage records per 'dims_L'"""
+    parts_L = []
+    for idx, (table_S, app_table_S, app_field_S, where_S) in enumerate((
+            ("PackagedUsageHistory", "PackageFamilyNames", "PackageFamilyName", packaged_date_filter),
+            ("NonPackagedUsageHistory", "BinaryFullPaths", "BinaryFullPath", nonpackaged_date_filter))):
+        time_field_S = f"{table_S}.LastUsedTimeStop"
+        columns_L = [f"{C_AGG_DIMENSIONS_D[dim][idx].format(time_field_S)} AS {dim}" for dim in dims_L]
+        # Capabilities is always joined (INNER JOIN) so that every 
+        # view counts the same records
+        joins_S = f"""INNER JOIN Capabilities
+on {table_S}.Capability = Capabilities.ID"""
+        if 'app' in dims_L:
+            joins_S += f"""
+LEFT JOIN {app_table_S}
+on {table_S}.{app_field_S} = {app_table_S}.ID"""
+        parts_L.append(f"""SELECT {', '.join(columns_L)}
+FROM {table_S}
+{joins_S}
+{where_S}""")
+
+    sql_S = f"""SELECT {', '.join(dims_L)}, COUNT(*) AS Count
+FROM (
+{parts_L[0]}
+UNION ALL
+{parts_L[1]}
+)
+GROUP BY {', '.join(dims_L)}"""
+    return sql_S
+
+#--------------------------------------------------------------------
+# Runs the aggregation over the CAM DB
+# @param cursor  [IN] cursor of the CAM DB
+# @param dims_L  [IN] list of dimensions
+# @param start_date_ftime64, end_date_ftime64 [IN] date filter (None: off)
+# @return list of tuples (dim_1, ..., dim_n, Count)
+# 2026-10-19
+#--------------------------------------------------------------------
+def run_CAM_aggregation(cursor, dims_L, start_date_ftime64, end_date_ftime64):
+    """Counts, in one scan, the usage records per 'dims_L'"""
+    where_date_SQL1_S = start_date_and_end_date_to_sql(start_date_ftime64, end_date_ftime64,
+                                                       "PackagedUsageHistory.LastUsedTimeStop")
+    where_date_SQL2_S = start_date_and_end_date_to_sql(start_date_ftime64, end_date_ftime64,
+                                                       "NonPackagedUsageHistory.LastUsedTimeStop")
+    sql_S = get_SQL_CAM_aggregation(dims_L, where_date_SQL1_S or "", where_date_SQL2_S or "")
+    return execute_sql_query(cursor, sql_S, get_date_filter_params_D(start_date_ftime64, end_date_ftime64))
+
+#--------------------------------------------------------------------
+# Returns the SQL of the CAM events for the timeline: packaged and
+# non-packaged usage (start/stop) and, for W24H2, the global prompts
+# (shown time as both start and stop). Times are in local time.
+# @param db_version   [IN] C_W23H2,C_W23H2_DIFF / C_W24H2,C_W24H2_DIFF
+# @param where_L      [IN] WHERE clauses (or "") of the packaged, 
+#                          non-packaged and prompt parts
+# @return SQL string ("" if db_version is not supported), headers
+# 2026-10-19
+#--------------------------------------------------------------------
+C_TIMELINE_HEADERS_L = ('Start', 'Stop', 'Source', 'Access', 'Capability', 
+                        'AppIdentifier', 'AppName', 'UserSID', 'ID')
+C_TIMELINE_ACTIVITY = 'Windows Capability Access'
+
+def get_SQL_CAM_timeline(db_version, where_L):
+    """Returns the SQL of the start/stop CAM events"""
+    if db_version in (C_W23H2, C_W23H2_DIFF):
+        app_name_S = "NULL"
+        join_app_names_S = ("", "")
+    elif db_version in (C_W24H2, C_W24H2_DIFF):
+        app_name_S = "AppNames.StringValue"
+        join_app_names_S = tuple(f"""INNER JOIN AppNames
+on {table_S}.AppName = AppNames.ID""" for table_S in ("PackagedUsageHistory", "NonPackagedUsageHistory"))
+    else:
+        return "", []
+
+    # Events without start time (0) start at their stop time
+    time_S = "datetime(({0} / 10000000) - 11644473600, 'unixepoch', 'localtime')"
+    parts_L = []
+    for idx, (source_S, table_S, app_table_S, app_field_S) in enumerate((
+            ('Packaged', "PackagedUsageHistory", "PackageFamilyNames", "PackageFamilyName"),
+            ('NonPackaged', "NonPackagedUsageHistory", "BinaryFullPaths", "BinaryFullPath"))):
+        start_S = time_S.format(f"CASE WHEN {table_S}.LastUsedTimeStart = 0 THEN {table_S}.LastUsedTimeStop "
+                                f"ELSE {table_S}.LastUsedTimeStart END")
+        stop_S = time_S.format(f"{table_S}.LastUsedTimeStop")
+        parts_L.append(f"""SELECT {start_S}, {stop_S}, '{source_S}',
+CASE WHEN {table_S}.AccessBlocked = 0 THEN 'Access OK' ELSE 'Blocked' END,
+Capabilities.StringValue, {app_table_S}.StringValue, {app_name_S}, Users.StringValue, {table_S}.ID
+FROM {table_S}
+INNER JOIN Users
+on {table_S}.userSid = Users.ID
+INNER JOIN Capabilities
+on {table_S}.Capability = Capabilities.ID
+INNER JOIN {app_table_S}
+on {table_S}.{app_field_S} = {app_table_S}.ID
+{join_app_names_S[idx]}
+{where_L[idx]}""")
+
+    if db_version in (C_W24H2, C_W24H2_DIFF):
+        shown_S = time_S.format("NonPackagedGlobalPromptHistory.ShownTime")
+        parts_L.append(f"""SELECT {shown_S}, {shown_S}, 'GlobalPrompt', 'Prompt',
+Capabilities.StringValue, ProgramIDs.StringValue, FileIDs.StringValue, Users.StringValue, NonPackagedGlobalPromptHistory.ID
+FROM NonPackagedGlobalPromptHistory
+INNER JOIN Users
+on NonPackagedGlobalPromptHistory.userSid = Users.ID
+INNER JOIN Capabilities
+on NonPackagedGlobalPromptHistory.Capability = Capabilities.ID
+INNER JOIN ProgramIDs
+on NonPackagedGlobalPromptHistory.ProgramID = ProgramIDs.ID
+INNER JOIN FileIDs
+on NonPackagedGlobalPromptHistory.FileID = FileIDs.ID
+{where_L[2]}""")
+
+    return "\nUNION ALL\n".join(parts_L), C_TIMELINE_HEADERS_L
+
+#--------------------------------------------------------------------
+# Loads the CAM events in the timeline of the report (see 
+# timeline_intervals() in ilapfuncs.py), in one transaction
+# @param report_folder [IN] report folder
+# @param cursor        [IN] cursor of the CAM DB
+# @param db_version    [IN] version of the CAM DB
+# @param start_date_ftime64, end_date_ftime64 [IN] date filter (None: off)
+# @return number of events added to the timeline
+# 2026-10-19
+#--------------------------------------------------------------------
+def add_CAM_to_timeline(report_folder, cursor, db_version, start_date_ftime64, end_date_ftime64):
+    """Adds the start/stop CAM events to the timeline"""
+    where_L = []
+    for date_field in ("PackagedUsageHistory.LastUsedTimeStop", "NonPackagedUsageHistory.LastUsedTimeStop",
+                       "NonPackagedGlobalPromptHistory.ShownTime"):
+        where_S = start_date_and_end_date_to_sql(start_date_ftime64, end_date_ftime64, date_field)
+        where_L.append(where_S or "")
+
+    sql_S, headers_L = get_SQL_CAM_timeline(db_version, where_L)
+    if len(sql_S) == 0:
+        return 0
+
+    rows_L = execute_sql_query(cursor, sql_S, get_date_filter_params_D(start_date_ftime64, end_date_ftime64))
+    if len(rows_L) > 0:
+        timeline_intervals(report_folder, C_TIMELINE_ACTIVITY, rows_L, headers_L)
+    return len(rows_L)
+
+#--------------------------------------------------------------------
+# Rolls up the rows of run_CAM_aggregation() to fewer dimensions
+# @param rows_L      [IN] rows (dim_1, ..., dim_n, Count)
+# @param dims_L      [IN] dimensions of 'rows_L'
+# @param view_dims_L [IN] dimensions to keep (subset of 'dims_L')
+# @return dict {tuple of 'view_dims_L' values: count}
+# 2026-10-19
+#--------------------------------------------------------------------
+def rollup_aggregation_D(rows_L, dims_L, view_dims_L):
+    """Sums the counts of 'rows_L' per 'view_dims_L'"""
+    indexes_L = [dims_L.index(dim) for dim in view_dims_L]
+    counts_D = {}
+    for row in rows_L:
+        key = tuple(row[i] for i in indexes_L)
+        counts_D[key] = counts_D.get(key, 0) + row[-1]
+    return counts_D
+
+#--------------------------------------------------------------------
+# Converts a 2-dimension rollup into a (heatmap-ready) matrix
+# @param counts_D [IN] dict {(row value, column value): count}
+# @param row_dim  [IN] dimension of the rows
+# @param col_dim  [IN] dimension of the columns
+# @return headers_L, list of rows [row value, count_col_1, ..., total]
+# 2026-10-19
+#--------------------------------------------------------------------
+def aggregation_to_matrix(counts_D, row_dim, col_dim):
+    """Matrix (rows x columns, 0 for missing cells) of a 2-dimension rollup"""
+    if col_dim == 'hour':
+        cols_L = C_AGG_HOURS_L
+    else:
+        cols_L = sorted({str(c) for (_r, c) in counts_D})
+    row_values_L = sorted({str(r) for (r, _c) in counts_D})
+
+    cells_D = {}
+    for (r, c), count in counts_D.items():
+        cells_D[(str(r), str(c))] = cells_D.get((str(r), str(c)), 0) + count
+
+    matrix_L = []
+    for r in row_values_L:
+        counts_L = [cells_D.get((r, c), 0) for c in cols_L]
+        matrix_L.append([r] + counts_L + [sum(counts_L)])
+
+    headers_L = [f"{row_dim} \\ {col_dim}"] + list(cols_L) + ['Total']
+    return headers_L, matrix_L
+
 #--------------------------------------------------------------------
 # Checks if a file exists and if its size is greater than 0.
 # filepath [IN] The path to the file to check.
@@ -1953,68 +3820,48 @@ def check_file_exists_and_not_empty(filepath, debug_flag=False):
 
 #--------------------------------------------------------------------
 # 2025-03-22
+# 2026-10-19: 'data_L' may be any iterable, rows are streamed
 #--------------------------------------------------------------------
 def create_report_and_tsv_from_list(report_folder, name_S,  headers_L, data_L, 
-                                    tsvname, file_found, dates_filter_str=None, debug_flag=False):
+                                    tsvname, file_found, dates_filter_str=None, debug_flag=False,
+                                    lead_text_S=None):
     """Execute the SQL query 'sql_S' over the SQLite3 cursor.
     'report_folder' [IN]: folder where to write the report
     'name_S'        [IN]: name of the report to be created
     'headers_L      [IN]: list of headers
     'tsvname'       [IN]: name of the TSV (Tab Separated Value) file
+    'lead_text_S'   [IN]: text written above the table (not in the TSV)
     """
-    usageentries = len(data_L)
-
-    if debug_flag:
-        Debug_S = f"[DEBUG][{name_S}] usageentries={usageentries}"
-        logfunc(Debug_S)
+    # 'data_L' may be any iterable (list, generator...): its rows are 
+    # streamed to the report
+    batches_iter = iter_batches(data_L, C_REPORT_BATCH_SIZE)
+    first_batch_L = next(batches_iter, None)
 
-    if usageentries > 0:
+    if first_batch_L is not None:
         report = ArtifactHtmlReport(name_S, dates_filter_S = dates_filter_str)
         report.start_artifact_report(report_folder, name_S)
         report.add_script()
+        if lead_text_S:
+            report.write_lead_text(html.escape(lead_text_S))
 
-        data_list = []
-
-        data_headers = headers_L
-        for rows in data_L:
-            try:
-                payload = rows[0]
-                payload_text = BeautifulSoup(payload, 'html.parser').text
-
-                data_row_L = list(rows[1:])
-                data_row_L.insert(0,payload_text)
-                data_list.append(data_row_L)
-            except Exception as e:
-                print(f"ERROR:['{name_S}']: {e}")
-                raise
-
-        report.write_artifact_data_table(data_headers, data_list, file_found)
+        num_entries = len(data_L) if hasattr(data_L, '__len__') else None
+        usageentries = write_row_batches(report, report_folder, headers_L, 
+                                         itertools.chain([first_batch_L], batches_iter),
+                                         tsvname, file_found, name_S, num_entries=num_entries)
         report.end_artifact_report()
-
-        if tsvname and len(tsvname) > 0:
-            # Create TSV file
-            tsv(report_folder, data_headers, data_list, tsvname)
     else:
+        usageentries = 0
         logfunc(f"No result for '{name_S}'")
 
+    if debug_flag:
+        Debug_S = f"[DEBUG][{name_S}] usageentries={usageentries}"
+        logfunc(Debug_S)
 
-#--------------------------------------------------------------------
-# 2025-03-22
-#--------------------------------------------------------------------
-def dict_to_sorted_list(input_dict):
-    """
-    Converts a dictionary to a sorted list of tuples, sorted by the dictionary values.
-    :param input_dict: Dictionary to be converted.
-    :return: Sorted list of tuples (key, value).
-    """
-    # Use sorted() with a lambda function to sort by the dictionary values
-    sorted_list = sorted(input_dict.items(), key=lambda item: item[1])
-    return sorted_list
 
 #--------------------------------------------------------------------
 # 2025-03-22
 #--------------------------------------------------------------------
-def execute_sql_query(db_cursor, query_S):
+def execute_sql_query(db_cursor, query_S, params=None):
     """
     Executes a SQL query and returns the results in a list of tuples.
 
@@ -2026,7 +3873,7 @@ def execute_sql_query(db_cursor, query_S):
 
     try:
         # Execute the query
-        db_cursor.execute(query_S)
+        db_cursor.execute(query_S, params or {})
 
         # Fetch all results
         results_L = db_cursor.fetchall()
@@ -2038,45 +3885,6 @@ def execute_sql_query(db_cursor, query_S):
     return results_L
 
 
-#--------------------------------------------------------------------
-# 2025-03-22
-#--------------------------------------------------------------------
-def list_of_tuples_to_dict(list_of_tuples):
-    """
-    Converts a list of tuples to a dictionary.
-    :param list_of_tuples: List of tuples where each tuple contains a key (string) and a value (integer).
-    :return: Dictionary with keys and values from the list of tuples.
-    """
-    result_dict = {}
-    for item in list_of_tuples:
-        key = item[0]
-        value = item[1]
-        result_dict[key] = value
-
-    return result_dict
-
-
-#--------------------------------------------------------------------
-# 2025-03-22
-#--------------------------------------------------------------------
-def merge_dicts_with_sum(dict1, dict2):
-    """
-    Merges two dictionaries. If both dictionaries have the same key, the values are added together.
-    :param dict1: First dictionary.
-    :param dict2: Second dictionary.
-    :return: Merged dictionary with summed values for repeated keys.
-    """
-    merged_dict = dict1.copy()  # Create a copy of the first dictionary
-
-    for key, value in dict2.items():
-        if key in merged_dict:
-            merged_dict[key] += value  # Add the values if the key exists in both dictionaries
-        else:
-            merged_dict[key] = value  # Otherwise, add the key-value pair from the second dictionary
-
-    return merged_dict
-
-
 #--------------------------------------------------------------------
 # Return current source filename (for debugging)
 # 2025-05-01
@@ -2205,8 +4013,19 @@ class AppConfig:
         self.order_by_date                   = False
         self.show_SQL_flag                   = False
         self.count_per_category_flag         = False
+        self.heatmaps_L                      = []
         self.merge_WAL_file_to_DB_flag       = False
         self.merge_WAL_file_to_DB_debug_flag = False
+        self.merge_WAL_file_to_DB_mode       = C_MERGE_WAL_MODE_COPY
+        self.merge_WAL_integrity_check_flag  = False
+        self.WAL_changes_report_flag         = False
+        self.schema_known_versions_L         = []
+        self.cache_dir                       = None
+        self.timeline_flag                   = True
+        self.archive_in_memory_flag          = True
+        self.fleet_flag                      = False
+        self.fleet_workers                   = None
+        self.fleet_capabilities_L            = list(C_FLEET_CAPABILITIES_L)
         self.csv_amcache_path                = None
         self.save_SQL_to_file                = None
 
@@ -2279,6 +4098,21 @@ class AppConfig:
         if count_cat_val is not None:
             self.count_per_category_flag = bool(count_cat_val) # Simple bool conversion
 
+        # --- Heatmaps: list of [row dimension, column dimension] ---
+        heatmaps_val = self._get_value(config_obj, "compute.heatmaps")
+        if isinstance(heatmaps_val, list):
+            for heatmap_val in heatmaps_val:
+                if isinstance(heatmap_val, list) and len(heatmap_val) == 2 and\
+                        all(dim in C_AGG_DIMENSIONS_D for dim in heatmap_val) and heatmap_val[0] != heatmap_val[1]:
+                    self.heatmaps_L.append(tuple(heatmap_val))
+                else:
+                    self.log(f"[WARNING] Invalid heatmap {heatmap_val} (dimensions: {list(C_AGG_DIMENSIONS_D)})")
+
+        # --- Timeline (_Timeline/tl.db) ---
+        timeline_val = self._get_value(config_obj, "compute.timeline")
+        if timeline_val is not None:
+            self.timeline_flag = bool(timeline_val) # Simple bool conversion
+
         # --- Merge WAL ---
         merge_wal_val = self._get_value(config_obj, "database.merge_WAL_file_to_DB")
         if merge_wal_val is not None:
@@ -2289,6 +4123,52 @@ class AppConfig:
         if merge_wal_debug_val is not None:
             self.merge_WAL_file_to_DB_debug_flag = bool(merge_wal_debug_val) # Simple bool conversion
 
+        # --- Merge WAL mode ("copy": private copy / "in_place": evidence DB) ---
+        merge_wal_mode_val = self._get_value(config_obj, "database.merge_WAL_file_to_DB_mode")
+        if merge_wal_mode_val is not None:
+            if str(merge_wal_mode_val).lower() in C_MERGE_WAL_MODES_L:
+                self.merge_WAL_file_to_DB_mode = str(merge_wal_mode_val).lower()
+            else:
+                self.log(f"[WARNING] Unknown merge_WAL_file_to_DB_mode '{merge_wal_mode_val}' (using '{self.merge_WAL_file_to_DB_mode}')")
+
+        # --- Merge WAL integrity check ---
+        merge_wal_integrity_val = self._get_value(config_obj, "database.merge_WAL_file_to_DB_integrity_check")
+        if merge_wal_integrity_val is not None:
+            self.merge_WAL_integrity_check_flag = bool(merge_wal_integrity_val) # Simple bool conversion
+
+        # --- WAL changes report ---
+        wal_changes_val = self._get_value(config_obj, "database.WAL_changes_report")
+        if wal_changes_val is not None:
+            self.WAL_changes_report_flag = bool(wal_changes_val) # Simple bool conversion
+
+        # --- Additional known CAM schemas ---
+        known_versions_val = self._get_value(config_obj, "schema.known_versions")
+        if isinstance(known_versions_val, list):
+            self.schema_known_versions_L = known_versions_val
+
+        # --- Cache directory (None/empty: no cache) ---
+        cache_dir_val = self._get_value(config_obj, "cache.directory")
+        if cache_dir_val is not None and len(str(cache_dir_val)) > 0 and str(cache_dir_val).upper() != "NONE":
+            self.cache_dir = str(cache_dir_val)
+
+        # --- Archives (zip/tar) read in memory ---
+        in_memory_val = self._get_value(config_obj, "archive.in_memory")
+        if in_memory_val is not None:
+            self.archive_in_memory_flag = bool(in_memory_val) # Simple bool conversion
+
+        # --- Fleet mode (many hosts, one store) ---
+        fleet_val = self._get_value(config_obj, "fleet.enabled")
+        if fleet_val is not None:
+            self.fleet_flag = bool(fleet_val) # Simple bool conversion
+
+        fleet_workers_val = self._get_value(config_obj, "fleet.workers")
+        if isinstance(fleet_workers_val, int) and fleet_workers_val > 0:
+            self.fleet_workers = fleet_workers_val
+
+        fleet_caps_val = self._get_value(config_obj, "fleet.capabilities")
+        if isinstance(fleet_caps_val, list) and len(fleet_caps_val) > 0:
+            self.fleet_capabilities_L = [str(c) for c in fleet_caps_val]
+
         # --- AmCache CSV Path ---
         csv_path_val = self._get_value(config_obj, "amcache.csv_filename")
         if csv_path_val is not None:
@@ -2322,8 +4202,17 @@ class AppConfig:
             f"Flags:\n"
             f"  Show SQL:                {self.show_SQL_flag}\n"
             f"  Count per Category:      {self.count_per_category_flag}\n"
+            f"  Timeline:                {self.timeline_flag}\n"
+            f"  Heatmaps:                {self.heatmaps_L}\n"
             f"  Merge WAL File:          {self.merge_WAL_file_to_DB_flag}\n"
             f"  Merge WAL Debug:         {self.merge_WAL_file_to_DB_debug_flag}\n"
+            f"  Merge WAL Mode:          {self.merge_WAL_file_to_DB_mode}\n"
+            f"  Merge WAL Integrity:     {self.merge_WAL_integrity_check_flag}\n"
+            f"  WAL Changes Report:      {self.WAL_changes_report_flag}\n"
+            f"  Known schemas (config):  {len(self.schema_known_versions_L)}\n"
+            f"  Cache directory:         '{self.cache_dir}'\n"
+            f"  Archive in memory:       {self.archive_in_memory_flag}\n"
+            f"  Fleet mode:              {self.fleet_flag} (workers={self.fleet_workers}, capabilities={self.fleet_capabilities_L})\n"
             f"External Files:\n"
             f"  AmCache CSV Path: '{amcache}'\n"
             f"  Filename to save SQL:    '{self.save_SQL_to_file}'\n"
@@ -2351,17 +4240,41 @@ def get_windowsCapability(files_found, report_folder, seeker, wrap_text):
     # Load configuration using AppConfig class
     config = AppConfig(config_fname = config_filename, logger=logfunc)
     
+    # zip/tar inputs: the CAM files are not extracted by the seeker. 
+    # They are read in memory, unless not possible/wanted
+    if config.fleet_flag or not (config.archive_in_memory_flag and C_IN_MEMORY_SUPPORTED):
+        files_found = extract_archive_members(files_found, seeker)
+
+    # Fleet mode: all the CAM DBs of the input are analyzed together
+    if config.fleet_flag:
+        get_windowsCapability_fleet(files_found, report_folder, seeker, config)
+        return
+
     # load local variables with values from the config file (via the AppConfig object)
     dates_filter_S                  = config.dates_filter_S
     order_by_date                   = config.order_by_date
     show_SQL_flag                   = config.show_SQL_flag
     save_SQL_to_filename            = config.save_SQL_to_file
     count_per_category_flag         = config.count_per_category_flag
+    timeline_flag                   = config.timeline_flag
+    heatmaps_L                      = config.heatmaps_L
     merge_WAL_file_to_DB_flag       = config.merge_WAL_file_to_DB_flag
     merge_WAL_file_to_DB_debug_flag = config.merge_WAL_file_to_DB_debug_flag
+    merge_WAL_file_to_DB_mode       = config.merge_WAL_file_to_DB_mode
+    merge_WAL_integrity_check_flag  = config.merge_WAL_integrity_check_flag
+    WAL_changes_report_flag         = config.WAL_changes_report_flag
+    schema_known_versions_L         = config.schema_known_versions_L
+    cache_dir                       = config.cache_dir
+    # A relative cache directory is kept in the output folder (-o), 
+    # next to the report folders of the runs, never in the CWD
+    if cache_dir is not None and not os.path.isabs(cache_dir):
+        output_folder = os.path.dirname(os.path.dirname(os.path.normpath(report_folder)))
+        cache_dir = os.path.join(output_folder, cache_dir)
     csv_amcache_path                = config.csv_amcache_path
     start_date_ftime64              = config.start_date_ftime64
     end_date_ftime64                = config.end_date_ftime64
+    # Values bound to the date filters of the queries
+    date_params_D                   = get_date_filter_params_D(start_date_ftime64, end_date_ftime64)
 
 
     # DEBUG
@@ -2382,9 +4295,9 @@ def get_windowsCapability(files_found, report_folder, seeker, wrap_text):
     # Was DB found?
     DB_found_flag = False
 
-    db_filename_S = "CapabilityAccessManager.db"
-    for file_found in files_found:
-        file_found = str(file_found)
+    db_filename_S = C_CAM_DB
+    files_found_L = [str(file_found) for file_found in files_found]
+    for file_found in files_found_L:
         if not os.path.basename(file_found) == db_filename_S:
             continue
 
@@ -2395,21 +4308,56 @@ def get_windowsCapability(files_found, report_folder, seeker, wrap_text):
         logfunc(f"'{file_found}' (path={len(file_found)} chars)")
         logfunc(f"{get_sep()}")
 
-        # Try to infere the version of the CAM SQLite 3 database
-        db_version = infere_cam_db_version(file_found)
+        # DB (and WAL) of a zip/tar input: read in memory, with the 
+        # committed WAL frames applied
+        mem_db = None
+        if seeker.is_virtual(file_found):
+            wal_found = f"{file_found}-wal"
+            if wal_found not in files_found_L:
+                wal_found = None
+            mem_db, db_bytes, wal_bytes = load_CAM_db_in_memory(file_found, wal_found, seeker)
+            if mem_db is None:
+                continue
+            logfunc(f"[INFO] CAM DB read in memory ({len(db_bytes)} bytes, WAL {len(wal_bytes)} bytes)")
 
-        if db_version == C_UNKNOWN:
-            logfunc(f"[INFO] Unrecognized database version '{file_found}' -- skipping")
-            continue
+        # Path of the DB that is queried. It differs from 'file_found' 
+        # when the WAL is replayed into a private copy
+        db_path = file_found
+
+        # Parse the WAL frames before any checkpoint (the in-place 
+        # checkpoint recycles the WAL)
+        WAL_changes_T = None
+        if WAL_changes_report_flag and mem_db is not None:
+            if len(wal_bytes) > 0:
+                WAL_changes_T = get_WAL_changes_report(io.BytesIO(db_bytes), io.BytesIO(wal_bytes))
+        elif WAL_changes_report_flag and check_file_exists_and_not_empty(f"{file_found}-wal"):
+            WAL_changes_T = get_WAL_changes_report(file_found)
 
         # Are we attempting to merge WAL with main DB? 
-        if merge_WAL_file_to_DB_flag:
-            output_debug_L = []     # List to collect debug/info messages
-            ret_sync = sync_WAL_with_DB(file_found, output_debug_L)
+        if merge_WAL_file_to_DB_flag and mem_db is not None:
+            # Already done: the in-memory DB has the WAL frames applied
+            logfunc(f"[INFO] '{os.path.basename(file_found)}' synchronized with WAL (in memory)")
+        elif merge_WAL_file_to_DB_flag:
+            # List to collect debug/info messages
+            output_debug_L = [] if merge_WAL_file_to_DB_debug_flag else None
+            if merge_WAL_file_to_DB_mode == C_MERGE_WAL_MODE_COPY:
+                scratch_dir = create_subdir_in_report_folder(report_folder, C_WAL_REPLAY_SUBDIR)
+                synced_path = None
+                if scratch_dir is not None:
+                    synced_path = sync_WAL_with_DB_copy(file_found, scratch_dir, output_debug_L, 
+                                                        merge_WAL_integrity_check_flag)
+                ret_sync = synced_path is not None
+                if ret_sync:
+                    db_path = synced_path
+            else:
+                ret_sync = sync_WAL_with_DB(file_found, output_debug_L, merge_WAL_integrity_check_flag)
+
             if ret_sync:
-                logfunc(f"[INFO] '{os.path.basename(file_found)}' synchronized with WAL")
+                logfunc(f"[INFO] '{os.path.basename(file_found)}' synchronized with WAL ({merge_WAL_file_to_DB_mode})")
 
-                debug_dir = create_debug_dir(report_folder)
+                debug_dir = None
+                if output_debug_L is not None:
+                    debug_dir = create_debug_dir(report_folder)
                 if debug_dir is not None:
                     # Subdir created with success - Write output_debug_L
                     # First, set the filename
@@ -2420,8 +4368,36 @@ def get_windowsCapability(files_found, report_folder, seeker, wrap_text):
                     # Dump the content of the list in the filename
                     write_list_to_file(output_debug_L, content_description, fname_path )
 
+        # Try to infere the version of the CAM SQLite 3 database. It is
+        # read from the DB that is queried: in 'copy' mode the private 
+        # copy, so that SQLite never opens the evidence with its WAL
+        db_version = infere_cam_db_version(db_path, schema_known_versions_L, mem_db)
+
+        if db_version <= C_UNKNOWN:
+            logfunc(f"[INFO] Unrecognized database version '{file_found}' -- skipping")
+            continue
+
+        # Cached copy of the DB (indexed date fields + materialized 
+        # usage history), reused across runs over the same DB
+        cache_path = None
+        if cache_dir is not None:
+            hash_S = None
+            if mem_db is not None:
+                hash_S = compute_bytes_content_hash(db_bytes, wal_bytes)
+            cache_path, cache_reused_flag = get_CAM_cache_db(db_path, db_version, cache_dir, mem_db, hash_S)
+            if cache_path is not None:
+                cache_S = "reused" if cache_reused_flag else "created"
+                logfunc(f"[INFO] Cache '{cache_path}' ({cache_S})")
+
         # Open DB in read-only mode
-        db = open_sqlite_db_readonly(file_found)
+        if cache_path is not None:
+            db = open_sqlite_db_readonly(cache_path)
+            if mem_db is not None:
+                mem_db.close()
+        elif mem_db is not None:
+            db = mem_db
+        else:
+            db = open_CAM_db_readonly(db_path)
         cursor = db.cursor()
 
         # DEBUG
@@ -2497,10 +4473,11 @@ def get_windowsCapability(files_found, report_folder, seeker, wrap_text):
 
         # DEBUG
         if show_SQL_flag is True:
-            show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename)
+            show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename, date_params_D)
 
         tsvname = f'{Id_S}_CAM_PackagedApps'
-        create_report_and_tsv(report_folder, cursor, name_S, sql_S, headers_L, tsvname, file_found, dates_filter_S)
+        create_report_and_tsv(report_folder, cursor, name_S, sql_S, headers_L, tsvname, file_found, dates_filter_S,
+                              params_D=date_params_D)
 
         # Query done
         Query_dones_L.append(Id_alpha)
@@ -2526,11 +4503,12 @@ def get_windowsCapability(files_found, report_folder, seeker, wrap_text):
 
         # DEBUG
         if show_SQL_flag is True:
-            show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename)
+            show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename, date_params_D)
 
         tsvname = f'{Id_S}_CAM_NonPackagedApps'
         create_report_and_tsv(report_folder, cursor, name_S, sql_S, 
-                        headers_L, tsvname, file_found, dates_filter_S)
+                        headers_L, tsvname, file_found, dates_filter_S,
+                              params_D=date_params_D)
         # Query done
         Query_dones_L.append(Id_alpha)
 
@@ -2558,11 +4536,12 @@ def get_windowsCapability(files_found, report_folder, seeker, wrap_text):
 
         # DEBUG
         if show_SQL_flag is True:
-            show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename)
+            show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename, date_params_D)
 
         tsvname = f'{Id_S}_CAM_NonPackagedIdRelation'
         create_report_and_tsv(report_folder, cursor, name_S, sql_S, 
-                headers_L, tsvname, file_found, dates_filter_S)
+                headers_L, tsvname, file_found, dates_filter_S,
+                              params_D=date_params_D)
 
         # Query done
         Query_dones_L.append(Id_alpha)
@@ -2574,103 +4553,77 @@ def get_windowsCapability(files_found, report_folder, seeker, wrap_text):
         Id_S = f'{Id_alpha}'
         name_S = f'{Id_S}_CAM_AllApps'
 
-        sql_packagedApps_S, sql_nonPackagedApps_S, headers_L =\
-                get_SQL_history_all_applications(db_version, name_S)
+        if cache_path is not None:
+            # Range scan over the materialized history
+            sql_S, headers_L = get_SQL_history_all_applications_cached(db_version, name_S)
+            date_field = f"{C_CACHE_USAGE_TABLE}.LastUsedTimeStop"
+            where_date_SQL_S = start_date_and_end_date_to_sql(start_date_ftime64,end_date_ftime64,date_field)
+            if where_date_SQL_S is not None:
+                sql_S = sql_S + "\n" + where_date_SQL_S
+            # Without ORDER BY, keep the order of the UNION ALL
+            order_by_date_S = "ORDER BY Last_used_stop, rowid" if order_by_date is True else "ORDER BY rowid"
+            sql_S = sql_S + "\n" + order_by_date_S
+        else:
+            sql_packagedApps_S, sql_nonPackagedApps_S, headers_L =\
+                    get_SQL_history_all_applications(db_version, name_S)
 
-        # Are date filters on?
-        date_field1 = "PackagedUsageHistory.LastUsedTimeStop"
-        where_date_SQL1_S = start_date_and_end_date_to_sql(start_date_ftime64,end_date_ftime64,date_field1)
-        if where_date_SQL1_S is not None:
-            sql_packagedApps_S = sql_packagedApps_S + "\n" + where_date_SQL1_S
+            # Are date filters on?
+            date_field1 = "PackagedUsageHistory.LastUsedTimeStop"
+            where_date_SQL1_S = start_date_and_end_date_to_sql(start_date_ftime64,end_date_ftime64,date_field1)
+            if where_date_SQL1_S is not None:
+                sql_packagedApps_S = sql_packagedApps_S + "\n" + where_date_SQL1_S
 
-        date_field2 = "NonPackagedUsageHistory.LastUsedTimeStop"
-        where_date_SQL2_S = start_date_and_end_date_to_sql(start_date_ftime64,end_date_ftime64,date_field2)
-        if where_date_SQL2_S is not None:
-            sql_nonPackagedApps_S = sql_nonPackagedApps_S + "\n" + where_date_SQL2_S
+            date_field2 = "NonPackagedUsageHistory.LastUsedTimeStop"
+            where_date_SQL2_S = start_date_and_end_date_to_sql(start_date_ftime64,end_date_ftime64,date_field2)
+            if where_date_SQL2_S is not None:
+                sql_nonPackagedApps_S = sql_nonPackagedApps_S + "\n" + where_date_SQL2_S
 
-        # Union ALL
-        sql_Union_All = "UNION ALL"
-        sql_S = sql_packagedApps_S + "\n" + sql_Union_All + "\n" + sql_nonPackagedApps_S
+            # Union ALL
+            sql_Union_All = "UNION ALL"
+            sql_S = sql_packagedApps_S + "\n" + sql_Union_All + "\n" + sql_nonPackagedApps_S
 
-        # Order by date?
-        if order_by_date is True:
-            order_by_date_S = f"ORDER BY Last_used_stop"
-            sql_S = sql_S + "\n" + order_by_date_S
+            # Order by date?
+            if order_by_date is True:
+                order_by_date_S = f"ORDER BY Last_used_stop"
+                sql_S = sql_S + "\n" + order_by_date_S
 
         # DEBUG
         if show_SQL_flag is True:
-            show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename)
+            show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename, date_params_D)
 
         tsvname = f'{Id_S}_CAM_allApps'
         create_report_and_tsv(report_folder, cursor, name_S, sql_S, 
-                        headers_L, tsvname, file_found, dates_filter_S)
+                        headers_L, tsvname, file_found, dates_filter_S,
+                              params_D=date_params_D)
 
         # Query done
         Query_dones_L.append(Id_alpha)
 
         #========================================
         # "E" - Category count - All Apps
-        # We run two queries, convert the list
-        # of tuples for each one to dictionary and
-        # then merge the dictionaries.
+        # One UNION ALL + GROUP BY scan (see 
+        # run_CAM_aggregation()); the count per
+        # capability and the heatmaps are rolled
+        # up from it.
+        # 2026-10-19: aggregation engine
         #========================================
+        if count_per_category_flag or len(heatmaps_L) > 0:
+            # Finest grouping needed by the views
+            agg_dims_L = ['capability']
+            for heatmap_dims_L in heatmaps_L:
+                for dim in heatmap_dims_L:
+                    if dim not in agg_dims_L:
+                        agg_dims_L.append(dim)
+            agg_rows_L = run_CAM_aggregation(cursor, agg_dims_L, start_date_ftime64, end_date_ftime64)
+
         if count_per_category_flag:
             Id_alpha = 'E'
             Id_S = f'{Id_alpha}'
             name_S = f'{Id_S}_CAM_CountPerCapability'
 
-            #--------------------
-            # Packaged Apps
-            #--------------------
-            sql_packagedApps_S = """SELECT Capabilities.StringValue as Capability, COUNT(*) as Count 
-FROM PackagedUsageHistory
-INNER JOIN Capabilities
-on PackagedUsageHistory.Capability = Capabilities.ID"""
-            # Are date filters on?
-            date_field1 = "PackagedUsageHistory.LastUsedTimeStop"
-            where_date_SQL1_S = start_date_and_end_date_to_sql(start_date_ftime64,end_date_ftime64,date_field1)
-            if where_date_SQL1_S is not None:
-                sql_packagedApps_S = sql_packagedApps_S + "\n" + where_date_SQL1_S
-
-            # GROUP BY
-            group_by_PackagedCapability_S = "GROUP BY PackagedUsageHistory.Capability"
-            sql_packagedApps_S += "\n" + group_by_PackagedCapability_S
-
-            # Execute the query
-            PackagedApps_L = execute_sql_query(cursor, sql_packagedApps_S) 
-
-            # Convert the list of tuples to a dict
-            PackagedApps_D = list_of_tuples_to_dict(PackagedApps_L)
-
-            #--------------------
-            # Non packaged apps
-            #--------------------
-            sql_nonPackagedApps_S = """
-SELECT Capabilities.StringValue as Capability, COUNT(*) as Count 
-FROM NonPackagedUsageHistory
-INNER JOIN Capabilities
-on NonPackagedUsageHistory.Capability = Capabilities.ID"""
-
-            date_field2 = "NonPackagedUsageHistory.LastUsedTimeStop"
-            where_date_SQL2_S = start_date_and_end_date_to_sql(start_date_ftime64,end_date_ftime64,date_field2)
-            if where_date_SQL2_S is not None:
-                sql_nonPackagedApps_S = sql_nonPackagedApps_S + "\n" + where_date_SQL2_S
-
-            # GROUP BY
-            group_by_nonPackagedApps_S = "GROUP BY NonPackagedUsageHistory.Capability"
-            sql_nonPackagedApps_S = sql_nonPackagedApps_S + "\n" + group_by_nonPackagedApps_S
-
-            # Execute the query
-            NonPackagedApps_L = execute_sql_query(cursor, sql_nonPackagedApps_S) 
-
-            # Convert the list of tuples to a dict
-            NonPackagedApps_D = list_of_tuples_to_dict(NonPackagedApps_L)
-
-            # Merge the two dicts - PackagedApps_D + NonPackagedApps_D
-            allApps_D = merge_dicts_with_sum(PackagedApps_D, NonPackagedApps_D)
-
-            # Extract a sorted list from the dict
-            allApps_sorted_L = dict_to_sorted_list(allApps_D)
+            counts_D = rollup_aggregation_D(agg_rows_L, agg_dims_L, ['capability'])
+            # Sorted by count (ties by capability)
+            allApps_sorted_L = sorted(((k[0], v) for k, v in counts_D.items()), key=lambda item: (item[1], item[0]))
 
             tsvname = "" # We're skipping TSV as our data are not from a SQL query
             headers_L = ('Capability', 'Count')
@@ -2679,6 +4632,25 @@ on NonPackagedUsageHistory.Capability = Capabilities.ID"""
             # Query done
             Query_dones_L.append(Id_alpha)
 
+        #========================================
+        # "E<n>" - Heatmaps (e.g. capability x 
+        # hour of day), from the same scan as "E"
+        # 2026-10-19
+        #========================================
+        for idx, (row_dim, col_dim) in enumerate(heatmaps_L, start=1):
+            Id_alpha = f'E{idx}'
+            Id_S = f'{Id_alpha}'
+            name_S = f'{Id_S}_CAM_Heatmap_{row_dim}_{col_dim}'
+
+            counts_D = rollup_aggregation_D(agg_rows_L, agg_dims_L, [row_dim, col_dim])
+            headers_L, matrix_L = aggregation_to_matrix(counts_D, row_dim, col_dim)
+
+            tsvname = name_S
+            create_report_and_tsv_from_list(report_folder, name_S,  headers_L, 
+                                            matrix_L, tsvname, file_found, dates_filter_S)
+            # Query done
+            Query_dones_L.append(Id_alpha)
+
         #=========================================
         # "F" - NonPackagedGlobalPromptHistory
         # (It does not exist for W23H2)
@@ -2706,11 +4678,12 @@ on NonPackagedUsageHistory.Capability = Capabilities.ID"""
 ##                # DEBUG:FIXME:DELETE:2025-05-12
 ##                # logfunc(f"SQL:{name_S}\n{sql_S}")
             if show_SQL_flag is True:
-                show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename)
+                show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename, date_params_D)
 
             tsvname = f'{Id_S}_CAM_NonPackagedPromptHistory'
             create_report_and_tsv(report_folder, cursor, name_S, sql_S, 
-                            headers_L, tsvname, file_found, dates_filter_S)
+                            headers_L, tsvname, file_found, dates_filter_S,
+                              params_D=date_params_D)
 
             # Query done
             Query_dones_L.append(Id_alpha)
@@ -2722,7 +4695,8 @@ on NonPackagedUsageHistory.Capability = Capabilities.ID"""
         if csv_amcache_path is not None:
             report_ID = 'G'
             csv_db_table_name = "amcache_data"
-            lookup_and_report_fileID_in_CSV(file_found, csv_amcache_path, csv_db_table_name, report_ID, report_folder)
+            # 'db': the DB may only exist in memory (zip/tar input)
+            lookup_and_report_fileID_in_CSV(db, csv_amcache_path, csv_db_table_name, report_ID, report_folder)
 
             # Query done
             Query_dones_L.append(report_ID)
@@ -2759,15 +4733,37 @@ on NonPackagedUsageHistory.Capability = Capabilities.ID"""
         sql_S = sql_packagedApps_S + "\n" + sql_Union_All + "\n" + sql_nonPackagedApps_S + "\n" + sql_order_by
 
         if show_SQL_flag is True:
-            show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename)
+            show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename, date_params_D)
 
         tsvname = f'{Id_S}_CAM_caps_per_App'
         create_report_and_tsv(report_folder, cursor, name_S, sql_S, 
-                            headers_L, tsvname, file_found, dates_filter_S)
+                            headers_L, tsvname, file_found, dates_filter_S,
+                              params_D=date_params_D)
 
         # Query done
         Query_dones_L.append(Id_alpha)
 
+        #========================================
+        # "W" - Changes brought by the WAL
+        # (per table, without checkpoint)
+        # 2026-10-19
+        #========================================
+        if WAL_changes_T is not None:
+            Id_alpha = 'W'
+            Id_S = f'{Id_alpha}'
+            name_S = f'{Id_S}_CAM_WAL_changes'
+            tsvname = f'{name_S}'
+            headers_L = ('Table', 'Changed pages', 'Rows before (changed pages)', 'Rows after (changed pages)')
+            # The summary goes to the heading (and the log): the rows of
+            # the table and of the TSV are tables only
+            WAL_changes_L, WAL_summary_S = WAL_changes_T
+            logfunc(f"[INFO] '{os.path.basename(file_found)}' {WAL_summary_S}")
+            create_report_and_tsv_from_list(report_folder, name_S,  headers_L, 
+                                            WAL_changes_L, tsvname, file_found,
+                                            lead_text_S=WAL_summary_S)
+            # Query done
+            Query_dones_L.append(Id_alpha)
+
         #========================================
         # "X1" - Packaged applications FIRST/LAST
         # Currently not active.
@@ -2804,10 +4800,11 @@ on NonPackagedUsageHistory.Capability = Capabilities.ID"""
 ##                show_SQL = f"SQL:{name_S}\n{sql_S}{sep_S}"
 ##                logfunc(show_SQL)
             if show_SQL_flag is True:
-                show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename)
+                show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename, date_params_D)
 
             tsvname = f'{Id_S}_CAM_PackagedApps_First+Last'
-            create_report_and_tsv(report_folder, cursor, name_S, sql_S, headers_L, tsvname, file_found, dates_filter_S)
+            create_report_and_tsv(report_folder, cursor, name_S, sql_S, headers_L, tsvname, file_found, dates_filter_S,
+                              params_D=date_params_D)
 
             # Query done
             Query_dones_L.append(Id_alpha)
@@ -2844,14 +4841,26 @@ on NonPackagedUsageHistory.Capability = Capabilities.ID"""
                 sql_S = sql_S + "\n" + order_by_date_S
 
             if show_SQL_flag is True:
-                show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename)
+                show_SQL(name_S, sql_S, report_folder, save_SQL_to_filename, date_params_D)
 
             tsvname = f'{Id_S}_CAM_NonpackagedApps_First+Last'
             create_report_and_tsv(report_folder, cursor, name_S, sql_S,
-                                  headers_L, tsvname, file_found, dates_filter_S)
+                                  headers_L, tsvname, file_found, dates_filter_S,
+                              params_D=date_params_D)
             # Query done
             Query_dones_L.append(Id_alpha)
 
+        #========================================
+        # Timeline: start/stop events of the 
+        # packaged, non-packaged and global prompt
+        # history, bulk-loaded in _Timeline/tl.db
+        # 2026-10-19
+        #========================================
+        if timeline_flag:
+            num_events = add_CAM_to_timeline(report_folder, cursor, db_version, 
+                                             start_date_ftime64, end_date_ftime64)
+            logfunc(f"[INFO] {num_events} CAM event(s) added to the timeline")
+
         #====================
         # Done
         #====================
@@ -2875,10 +4884,11 @@ on NonPackagedUsageHistory.Capability = Capabilities.ID"""
 # @return None
 # 2025-05-12
 #--------------------------------------------------------------------
-def show_SQL(name_query_S, sql_query_S, report_folder, save_SQL_filename):
+def show_SQL(name_query_S, sql_query_S, report_folder, save_SQL_filename, params_D=None):
     "Show SQL query and save if save_SQL_filename is not None"
     Sep_S = get_sep()
-    Show_SQL_S = f"{Sep_S}\nSQL:{name_query_S}\n{sql_query_S}\n{Sep_S}"
+    params_S = f"\nParameters: {params_D}" if params_D else ""
+    Show_SQL_S = f"{Sep_S}\nSQL:{name_query_S}\n{sql_query_S}{params_S}\n{Sep_S}"
     logfunc(Show_SQL_S)
 
     if save_SQL_filename is not None:
@@ -1,88 +1,126 @@
 import os
 import re
 import json
-import datetime
-import ast
+import codecs
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 from scripts.artifact_report import ArtifactHtmlReport
-from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows
+from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows, convert_file_time
+
+DATA_HEADERS = ('ParsingName', 'TimesUsed', 'Filename', 'Name', 'Path', 'Description', 'Date', 'DateAccessed', 'EncodedTargetParh', 'ItemNameDisplay', 'Source File')
 
-# https://gist.github.com/NotWearingPants/d162aaf32aef0227bf6bbd37b7317633
-FILE_TIME_EPOCH = datetime.datetime(1601, 1, 1)
-FILE_TIME_MICROSECOND = 10
+# Files are parsed by a pool of processes only when they add up to
+# PARALLEL_MIN_SIZE bytes: starting the pool costs more for small files
+PARALLEL_MIN_SIZE = 16 * 1024 * 1024
 
-def convert_from_file_time(file_time):
-    microseconds_since_file_time_epoch = file_time // FILE_TIME_MICROSECOND
-    return FILE_TIME_EPOCH + datetime.timedelta(microseconds=microseconds_since_file_time_epoch)
+# Properties of an entry written before/after the JumpList items
+ENTRY_PROPERTIES = ('System.ParsingName', 'System.Software.TimesUsed', 'System.FileName')
+ENTRY_PROPERTIES_END = ('System.Tile.EncodedTargetPath', 'System.ItemNameDisplay')
 
 def getData(data, value):
-    try:
-        return data.get(value).get("Value")
-    except:
-        return None
+    item = data.get(value)
+    return item.get("Value") if isinstance(item, dict) else None
 
 def convertDateTime(date):
     try:
-        return convert_from_file_time(float(date))
-    except:
+        text = convert_file_time(int(date))
+    except (TypeError, ValueError, OverflowError):
         return None
+    # Out of the datetime range: no date
+    return text if isinstance(text, str) else None
+
+def get_jumplist(jumplist_data):
+    '''Returns the list of the JumpList JSON of an entry ([] if absent or invalid)'''
+    if not jumplist_data:
+        return []
+    try:
+        jumplist_list = json_loads(jumplist_data)
+    except ValueError:
+        return []
+    return jumplist_list if isinstance(jumplist_list, list) else []
+
+def parse_cache_file(file_found):
+    '''Returns the rows of an AppCache*.txt file (run by the pool workers)'''
+    with open(file_found, "rb") as fp:
+        raw_data = fp.read()
+    if raw_data.startswith(codecs.BOM_UTF8):
+        raw_data = raw_data[len(codecs.BOM_UTF8):]
+    json_data = json_loads(raw_data) if raw_data.strip() else None
+    if not isinstance(json_data, list):
+        return []
+
+    data_list = []
+    for data in json_data:
+        if not isinstance(data, dict):
+            continue
+        start = tuple(getData(data, value) for value in ENTRY_PROPERTIES)
+        end = (convertDateTime(getData(data, 'System.DateAccessed')),) + \
+              tuple(getData(data, value) for value in ENTRY_PROPERTIES_END) + (file_found,)
+
+        jumplist_data = getData(data, 'System.ConnectedSearch.JumpList')
+        jumplist_list = get_jumplist(jumplist_data)
+        if len(jumplist_list) > 0:
+            items = jumplist_list[0].get('Items') if isinstance(jumplist_list[0], dict) else None
+            for i in items if isinstance(items, list) else ():
+                if isinstance(i, dict):
+                    data_list.append(start + (i.get('Name'), i.get('Path'), i.get('Description'), i.get('Date')) + end)
+        else:
+            data_list.append(start + ('', '', jumplist_data, '') + end)
+    return data_list
+
+def read_cache_file(file_found):
+    '''Returns (rows, error) of an AppCache*.txt file: a file that cannot be
+       read or decoded has no rows and is skipped by get_windowsCortana'''
+    try:
+        return parse_cache_file(file_found), None
+    except (OSError, ValueError) as ex:
+        return [], str(ex)
+
+def iter_parsed_files(cache_files):
+    '''Yields the file, rows and error of each file, in the order of cache_files.
+       Several files (one per user) are parsed concurrently by a process pool if
+       they are large'''
+    if len(cache_files) < 2 or (os.cpu_count() or 1) < 2 or \
+            sum(os.path.getsize(file_found) for file_found in cache_files) < PARALLEL_MIN_SIZE:
+        for file_found in cache_files:
+            yield (file_found,) + read_cache_file(file_found)
+        return
+    with ProcessPoolExecutor() as executor:
+        for file_found, (data_list, error) in zip(cache_files, executor.map(read_cache_file, cache_files)):
+            yield file_found, data_list, error
 
 def get_windowsCortana(files_found, report_folder, seeker, wrap_text):
 
-    for file_found in files_found:
-        file_found = str(file_found)
-        if not re.search(r"AppCache[0-9]*.txt", file_found):
+    cache_files = [str(file_found) for file_found in files_found
+                   if re.search(r"AppCache[0-9]*.txt", str(file_found))]
+
+    report = None
+    data_headers = DATA_HEADERS
+    tsvname = f'DeviceSearchCache'
+    for file_found, data_list, error in iter_parsed_files(cache_files):
+        if error is not None:
+            logfunc(f'Error reading {file_found}, skipped: {error}')
             continue
+        if not data_list:
+            logfunc(f'No DeviceSearchCache data available in {file_found}')
+            continue
+        if report is None:
+            report = ArtifactHtmlReport('DeviceSearchCache')
+            report.start_artifact_report(report_folder, 'DeviceSearchCache')
+            report.add_script()
+            report.start_artifact_data_table(data_headers, ', '.join(cache_files))
+
+        report.write_artifact_data_rows(data_list)
+        tsv(report_folder, data_headers, data_list, tsvname)
 
-        with open(file_found, "r", encoding="utf-8") as fp:
-            json_data = json.loads(fp.read())
-            if json_data:
-                report = ArtifactHtmlReport('DeviceSearchCache')
-                report.start_artifact_report(report_folder, 'DeviceSearchCache')
-                report.add_script()
-
-                data_list = []
-                data_headers = ('ParsingName', 'TimesUsed', 'Filename', 'Name', 'Path', 'Description', 'Date', 'DateAccessed', 'EncodedTargetParh', 'ItemNameDisplay')
-
-                for data in json_data:
-                    name = ''
-                    path = ''
-                    description = ''
-                    date = ''
-
-                    jumplist_data = getData(data, 'System.ConnectedSearch.JumpList')
-                    jumplist_list = ast.literal_eval(jumplist_data.replace("\\", "/"))
-                    if len(jumplist_list) > 0:
-                        for i in jumplist_list[0]['Items']:
-                            name = i.get('Name')
-                            path = i.get('Path')
-                            description = i.get('Description')
-                            date = i.get('Date')
-
-                            data_list.append((
-                                getData(data,'System.ParsingName'),
-                                getData(data,'System.Software.TimesUsed'),
-                                getData(data,'System.FileName'),
-                                name, path, description, date,
-                                convertDateTime(getData(data,'System.DateAccessed')),
-                                getData(data,'System.Tile.EncodedTargetPath'),
-                                getData(data,'System.ItemNameDisplay')
-                            ))
-                    else:
-                        data_list.append((
-                            getData(data,'System.ParsingName'),
-                            getData(data,'System.Software.TimesUsed'),
-                            getData(data,'System.FileName'),
-                            name, path, jumplist_data, date,
-                            convertDateTime(getData(data,'System.DateAccessed')),
-                            getData(data,'System.Tile.EncodedTargetPath'),
-                            getData(data,'System.ItemNameDisplay')
-                        ))
-
-                report.write_artifact_data_table(data_headers, data_list, file_found)
-                report.end_artifact_report()
-
-                tsvname = f'DeviceSearchCache'
-                tsv(report_folder, data_headers, data_list, tsvname)
-            else:
-                logfunc(f'No DeviceSearchCache data available')
\ No newline at end of file
+    if report is not None:
+        report.end_artifact_data_table()
+        report.end_artifact_report()
+    else:
+        logfunc(f'No DeviceSearchCache data available')
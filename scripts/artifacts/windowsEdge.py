@@ -1,33 +1,149 @@
 import os
-import pyesedb
 import struct
-import datetime
+import pickle
+import tempfile
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 from scripts.artifact_report import ArtifactHtmlReport
-from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows
+from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows, open_ese_db, get_ese_text, forget_ese_dbs, \
+    convert_file_time, iter_batches
 
-# https://gist.github.com/NotWearingPants/d162aaf32aef0227bf6bbd37b7317633
-FILE_TIME_EPOCH = datetime.datetime(1601, 1, 1)
-FILE_TIME_MICROSECOND = 10
+DATA_HEADERS = ('Category', 'Filename', 'Url', 'AccessCount', 'CreationTime', 'ModifiedTime', 'AccessedTime', 'ExpiryTime', 'SyncTime')
+
+# Columns of the Container_<ContainerId> tables, in the order of the
+# report (after 'Category'); the FILETIME ones are decoded per batch
+CONTAINER_COLUMNS = ('Filename', 'Url', 'AccessCount', 'CreationTime', 'ModifiedTime', 'AccessedTime', 'ExpiryTime', 'SyncTime')
+FILE_TIME_COLUMNS = ('CreationTime', 'ModifiedTime', 'AccessedTime', 'ExpiryTime', 'SyncTime')
+
+# Containers reported, by the start of their name, and their report
+CONTAINER_REPORTS = (('History', 'WebCacheV01.dat'), ('MSHist', 'WebCacheV01.dat'),
+                     ('Cookies', 'WebCache Cookies'), ('iedownload', 'WebCache Downloads'),
+                     ('Content', 'WebCache Content'), ('DOMStore', 'WebCache DOMStore'))
+HISTORY_REPORT = 'WebCacheV01.dat'
+
+# Containers of at least PARALLEL_MIN_RECORDS records are parsed by a pool
+# of processes (each worker opens the whole ESE catalog and spools the
+# rows of the container, batch by batch, to a file of the temp folder),
+# when there are at least two of them. The other containers are parsed
+# in the main process.
+PARALLEL_MIN_RECORDS = 50000
 
 def u64(x):
     return struct.unpack("<Q", x)[0]
 
-def get_data(categoryName, record):
-    accessCount = int.from_bytes(record.get_value_data(8), 'little')
-    syncTime = convert_from_file_time(record.get_value_data(9))
-    creationTime = convert_from_file_time(record.get_value_data(10))
-    expiryTime = convert_from_file_time(record.get_value_data(11))
-    modifiedTime = convert_from_file_time(record.get_value_data(12))
-    accessedTime = convert_from_file_time(record.get_value_data(13))
-    url = record.get_value_data(17).decode("utf-16")
-    filename = record.get_value_data(18)
-    return (categoryName, filename, url, accessCount, creationTime, modifiedTime, accessedTime, expiryTime, syncTime)
-
-def convert_from_file_time(file_time):
-    file_time = int.from_bytes(file_time, 'little')
-    microseconds_since_file_time_epoch = file_time // FILE_TIME_MICROSECOND
-    return FILE_TIME_EPOCH + datetime.timedelta(microseconds=microseconds_since_file_time_epoch)
+def get_raw_data(categoryName, record, indexes):
+    '''Returns a row of the report with the FILETIMEs still as integers'''
+    filename, url, accessCount, creationTime, modifiedTime, accessedTime, expiryTime, syncTime = indexes
+    def integer(index):
+        return record.get_value_data_as_integer(index) if index is not None else None
+    return (categoryName, record.get_value_data(filename) if filename is not None else None,
+            get_ese_text(record, url), integer(accessCount), integer(creationTime), integer(modifiedTime),
+            integer(accessedTime), integer(expiryTime), integer(syncTime))
+
+def convert_batch(batch):
+    '''Decodes the FILETIME columns of a batch of rows from get_raw_data()'''
+    columns = list(zip(*batch))
+    for column in range(4, 4 + len(FILE_TIME_COLUMNS)):
+        columns[column] = [convert_file_time(file_time) for file_time in columns[column]]
+    columns[3] = ['' if count is None else count for count in columns[3]]
+    return list(zip(*columns))
+
+def get_report_name(categoryName):
+    '''Returns the report of a container (None if it is not reported)'''
+    for prefix, report_name in CONTAINER_REPORTS:
+        if categoryName.startswith(prefix):
+            return report_name
+    return None
+
+def get_containers(ese_db):
+    '''Returns the (ContainerId, Name, report name, number of records) of the reported containers'''
+    containerId_index, name_index = ese_db.get_column_indexes("Containers", ('ContainerId', 'Name'))
+    containers = []
+    for record in ese_db.get_table("Containers").records:
+        containerId = u64(record.get_value_data(containerId_index))
+        categoryName = get_ese_text(record, name_index)
+        report_name = get_report_name(categoryName)
+        if report_name is not None:
+            containerObject = ese_db.get_table("Container_{}".format(containerId))
+            num_records = containerObject.number_of_records if containerObject is not None else 0
+            containers.append((containerId, categoryName, report_name, num_records))
+    return containers
+
+def iter_container_records(ese_db, containerId, categoryName):
+    '''Yields the rows (see get_raw_data()) of the table Container_<containerId>'''
+    table_name = "Container_{}".format(containerId)
+    containerObject = ese_db.get_table(table_name)
+    if containerObject is None:
+        return
+    indexes = ese_db.get_column_indexes(table_name, CONTAINER_COLUMNS)
+    for container in containerObject.records:
+        yield get_raw_data(categoryName, container, indexes)
+
+def spool_container(file_found, containerId, categoryName, spool_path):
+    '''Writes the decoded rows of a container to 'spool_path', one pickled batch
+       at a time, and returns 'spool_path' (run by the pool workers, which open
+       the file once with open_ese_db() for all the containers they parse)'''
+    ese_db = open_ese_db(file_found)
+    with open(spool_path, 'wb') as spool:
+        for batch in iter_batches(iter_container_records(ese_db, containerId, categoryName)):
+            pickle.dump(convert_batch(batch), spool, pickle.HIGHEST_PROTOCOL)
+    return spool_path
+
+def iter_spooled_batches(spool_path):
+    '''Yields the batches written by spool_container() and deletes the file'''
+    with open(spool_path, 'rb') as spool:
+        while True:
+            try:
+                yield pickle.load(spool)
+            except EOFError:
+                break
+    os.remove(spool_path)
+
+def iter_local_container_rows(ese_db, containerId, categoryName, report_name):
+    for batch in iter_batches(iter_container_records(ese_db, containerId, categoryName)):
+        yield report_name, convert_batch(batch)
+
+def iter_container_rows(ese_db, containers, spool_folder, max_workers=None):
+    '''Yields (report name, rows) for the containers, container after container.
+       The large containers (see PARALLEL_MIN_RECORDS) are parsed concurrently
+       by a process pool and spooled to files of 'spool_folder', so only batches
+       are held in memory; at most two containers per worker are pending at any time'''
+    max_workers = max_workers or os.cpu_count() or 1
+    num_large = sum(1 for container in containers if container[3] >= PARALLEL_MIN_RECORDS)
+    if num_large < 2 or max_workers < 2:
+        for containerId, categoryName, report_name, _num_records in containers:
+            yield from iter_local_container_rows(ese_db, containerId, categoryName, report_name)
+        return
+
+    containers = iter(containers)
+    os.makedirs(spool_folder, exist_ok=True)
+    def submit(executor, containerId, categoryName, report_name, num_records):
+        future = None
+        if num_records >= PARALLEL_MIN_RECORDS:
+            spool_path = os.path.join(spool_dir, f'Container_{containerId}.pickle')
+            future = executor.submit(spool_container, ese_db.path, containerId, categoryName, spool_path)
+        return containerId, categoryName, report_name, future
+    with tempfile.TemporaryDirectory(prefix='WebCache_', dir=spool_folder) as spool_dir, \
+            ProcessPoolExecutor(max_workers=max_workers, initializer=forget_ese_dbs) as executor:
+        pending = deque(submit(executor, *container) for container in itertools.islice(containers, 2 * max_workers))
+        while pending:
+            containerId, categoryName, report_name, future = pending.popleft()
+            for container in itertools.islice(containers, 1):
+                pending.append(submit(executor, *container))
+            if future is None:
+                yield from iter_local_container_rows(ese_db, containerId, categoryName, report_name)
+                continue
+            for batch in iter_spooled_batches(future.result()):
+                yield report_name, batch
+
+def start_report(report_folder, report_name, file_found):
+    report = ArtifactHtmlReport(report_name)
+    report.start_artifact_report(report_folder, report_name)
+    report.add_script()
+    report.start_artifact_data_table(DATA_HEADERS, file_found)
+    return report
 
 def get_windowsEdge(files_found, report_folder, seeker, wrap_text):
 
@@ -36,37 +152,24 @@ def get_windowsEdge(files_found, report_folder, seeker, wrap_text):
         if not os.path.basename(file_found) == "WebCacheV01.dat":
             continue
 
-        file_object = open(file_found, "rb")
-        esedb_file = pyesedb.file()
-        esedb_file.open_file_object(file_object)
-        ContainersTable = esedb_file.get_table_by_name("Containers")
-
-        if ContainersTable.number_of_records > 0:
-
-            report = ArtifactHtmlReport("WebCacheV01.dat")
-            report.start_artifact_report(report_folder, 'WebCacheV01.dat')
-            report.add_script()
-
-            data_list = []
-
-            data_headers = ('Category', 'Filename', 'Url', 'AccessCount', 'CreationTime', 'ModifiedTime', 'AccessedTime', 'ExpiryTime', 'SyncTime')
-
-            for record in ContainersTable.records:
-                containerId = u64(record.get_value_data(0))
-                categoryName = record.get_value_data(8).decode("utf-16")
-
-                if categoryName.startswith("History") or categoryName.startswith("MSHist"):
-                    containerObject = esedb_file.get_table_by_name("Container_{}".format(containerId))
-                    
-                    for container in containerObject.records:
-                        data_list.append(get_data(categoryName, container))
-
-            report.write_artifact_data_table(data_headers, data_list, file_found)
-            report.end_artifact_report()
-
-            tsvname = f'WebCacheV01.dat'
-            tsv(report_folder, data_headers, data_list, tsvname)
+        ese_db = open_ese_db(file_found)
+        ContainersTable = ese_db.get_table("Containers")
+
+        if ContainersTable is not None and ContainersTable.number_of_records > 0:
+
+            # One pass over the containers: the records of each one are
+            # written batch by batch to the HTML and TSV of its report
+            reports = {HISTORY_REPORT: start_report(report_folder, HISTORY_REPORT, file_found)}
+            spool_folder = os.path.join(os.path.dirname(report_folder.rstrip('/\\')), 'temp')
+            for report_name, data_list in iter_container_rows(ese_db, get_containers(ese_db), spool_folder):
+                report = reports.get(report_name)
+                if report is None:
+                    report = reports[report_name] = start_report(report_folder, report_name, file_found)
+                report.write_artifact_data_rows(data_list)
+                tsv(report_folder, DATA_HEADERS, data_list, report_name)
+
+            for report in reports.values():
+                report.end_artifact_data_table()
+                report.end_artifact_report()
         else:
             logfunc(f"No Containers table available")
-        
-        file_object.close()
\ No newline at end of file
@@ -1,20 +1,17 @@
-import sqlite3
 import os
 import re
 
-from scripts.artifact_report import ArtifactHtmlReport
-from scripts.ilapfuncs import logfunc, tsv, timeline, is_platform_windows, open_sqlite_db_readonly
+from scripts.ilapfuncs import logfunc, is_platform_windows, SqliteQuery, run_sqlite_queries
 
-def get_windowsStickyNotes(files_found, report_folder, seeker, wrap_text):
+NOTE_ID_RE = re.compile("\\\\id=[A-Za-z0-9]{8}-[A-Za-z0-9]{4}-[A-Za-z0-9]{4}-[A-Za-z0-9]{4}-[A-Za-z0-9]{12} ")
 
-    for file_found in files_found:
-        file_found = str(file_found)
-        if not os.path.basename(file_found) == "plum.sqlite":
-            continue
+def strip_note_ids(row):
+    '''Removes the '\\id=<GUID> ' paragraph markers from the text of the note'''
+    if row[0] is None:
+        return row
+    return (NOTE_ID_RE.sub("", row[0]),) + row[1:]
 
-        db = open_sqlite_db_readonly(file_found)
-        cursor = db.cursor()
-        cursor.execute('''select Note.Text,
+NOTES_QUERY = SqliteQuery('Windows StickyNotes', '''select Note.Text,
         CASE
         WHEN Note.IsOpen = 0 THEN 'No'
         WHEN Note.IsOpen = 1 THEN 'Yes'
@@ -29,30 +26,15 @@ def get_windowsStickyNotes(files_found, report_folder, seeker, wrap_text):
         datetime(("CreatedAt" / 10000000) - 62135596800, 'unixepoch', 'localtime') AS CreatedAt,
         datetime(("UpdatedAt" / 10000000) - 62135596800, 'unixepoch', 'localtime') AS UpdatedAt,
         datetime(("DeletedAt" / 10000000) - 62135596800, 'unixepoch', 'localtime') AS DeletedAt
-        FROM Note ORDER BY Note.CreatedAt ASC''')
-
-        all_rows = cursor.fetchall()
-        usageentries = len(all_rows)
-
-        if usageentries > 0:
-            report = ArtifactHtmlReport('Windows StickyNotes')
-            report.start_artifact_report(report_folder, 'Windows StickyNotes')
-            report.add_script()
-
-            data_list = []
+        FROM Note ORDER BY Note.CreatedAt ASC''',
+    ('Text', 'IsOpen', 'IsAlwaysOnTop', 'Theme', 'CreatedAt', 'UpdatedAt', 'DeletedAt'),
+    transform=strip_note_ids, no_data_msg='No Windows StickyNotes data available')
 
-            data_headers = ('Text', 'IsOpen', 'IsAlwaysOnTop', 'Theme', 'CreatedAt', 'UpdatedAt', 'DeletedAt')
-            for rows in all_rows:
-                text_data = re.sub("\\\\id=[A-Za-z0-9]{8}-[A-Za-z0-9]{4}-[A-Za-z0-9]{4}-[A-Za-z0-9]{4}-[A-Za-z0-9]{12} ","",rows[0])
-                data_list.append((text_data, rows[1], rows[2], rows[3], rows[4], rows[5], rows[6]))
-
-            report.write_artifact_data_table(data_headers, data_list, file_found)
-            report.end_artifact_report()
-
-            tsvname = f'Windows StickyNotes'
-            tsv(report_folder, data_headers, data_list, tsvname)
+def get_windowsStickyNotes(files_found, report_folder, seeker, wrap_text):
 
-        else:
-            logfunc(f'No Windows StickyNotes data available')
+    for file_found in files_found:
+        file_found = str(file_found)
+        if not os.path.basename(file_found) == "plum.sqlite":
+            continue
 
-        db.close()
\ No newline at end of file
+        run_sqlite_queries(report_folder, file_found, (NOTES_QUERY,))
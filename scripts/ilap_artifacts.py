@@ -13,6 +13,7 @@ from scripts.artifacts.facebookMessenger import get_facebookMessenger
 from scripts.artifacts.googleDrive import get_googleDrive
 from scripts.artifacts.pfirewall import get_pfirewall
 from scripts.artifacts.setupapiDev import get_setupapiDev
+from scripts.artifacts.srum import get_srum
 from scripts.artifacts.windowsAlarms import get_windowsAlarms
 from scripts.artifacts.windowsCortana import get_windowsCortana
 from scripts.artifacts.windowsEdge import get_windowsEdge
@@ -38,8 +39,9 @@ tosearch = {
     'dropbox':('Dropbox', ('*/AppData/Local/Packages/*.DROPBOX_*/LocalState/users/*/*.sqlite', '*/AppData/Local/Dropbox/instance1/sync_history.db')),
     'facebookMessenger':('Facebook Messenger', ('*/AppData/Local/Packages/FACEBOOK.*_*/LocalState/msys_*.db')),
     'googleDrive':('Google Drive', ('*/AppData/Local/Google/DriveFS/*/metadata_sqlite_db')),
-    'pfirewall':('Firewall', ('*/pfirewall.log')),
-    'setupapiDev':('setupapi.dev.log', ('*/Windows/INF/setupapi.dev.log')),
+    'pfirewall':('Firewall', ('*/pfirewall.log', '*/pfirewall.log.old')),
+    'setupapiDev':('setupapi.dev.log', ('*/Windows/INF/setupapi.dev.log', '*/Windows/INF/setupapi.dev.*.log')),
+    'srum':('SRUM', ('*/Windows/System32/sru/SRUDB.dat')),
     'windowsAlarms':('Windows Alarms', ('*/AppData/Local/Packages/Microsoft.WindowsAlarms_*/LocalState/Alarms/Alarms.json', '*/AppData/Local/Packages/Microsoft.WindowsAlarms_*/Settings/settings.dat')),
     'windowsCortana':('Windows Cortana', ('*/AppData/Local/Packages/Microsoft.Windows.Cortana_*/LocalState/DeviceSearchCache/AppCache*.txt')),
     'windowsEdge':('Windows Edge', ('*/AppData/Local/Microsoft/Windows/WebCache/WebCacheV01.dat')),
@@ -50,6 +52,11 @@ tosearch = {
     'windowsCapability':('Windows Capability Access', ('*/CapabilityAccessManager/*'))
 }
 ##    'windowsCapability':('Windows Capability Access', ('*/ProgramData/Microsoft/Windows/CapabilityAccessManager/*'))
+
+# Artifacts that read their files through seeker.open_file()/extract_file():
+# members of zip/tar inputs are not extracted to the temp folder for them
+tosearch_no_extract = ('windowsCapability',)
+
 slash = '\\' if is_platform_windows() else '/'
 
 def process_artifact(files_found, artifact_func, artifact_name, seeker, report_folder_base, wrap_text):
@@ -1,8 +1,11 @@
 import codecs
 import csv
 import datetime
+import functools
+import itertools
 import os
 import pathlib
+import pyesedb
 import re
 import sqlite3
 import sys
@@ -46,6 +49,80 @@ def sanitize_file_name(filename, replacement_char='_'):
     '''
     return re.sub(r'[\\/*?:"<>|\'\r\n]', replacement_char, filename)
 
+# Markup that html_to_text() strips itself: start/end tags (quoted
+# attribute values may not hold '<' or '>') and the basic named and
+# numeric entities. Anything else (comments, CDATA, <script>, <pre>,
+# stray '&' or '<'...) is handed to BeautifulSoup, so that the output
+# is always the same.
+_HTML_TEXT_TOKEN_RE = re.compile(r'''<(/?)([a-zA-Z][^\s/<>]*)(?:[\s/](?:[^<>"']|"[^<>"]*"|'[^<>']*')*)?>|&(#[0-9]{1,7}|#[xX][0-9a-fA-F]{1,6}|amp|lt|gt|quot|apos);''')
+_HTML_TEXT_SPECIAL_TAGS = frozenset(('script', 'style', 'textarea', 'pre', 'title', 'plaintext', 'xmp', 
+                                     'noscript', 'iframe', 'noembed', 'noframes'))
+_HTML_TEXT_ENTITIES = {'amp': '&', 'lt': '<', 'gt': '>', 'quot': '"', 'apos': "'"}
+# BeautifulSoup replaces a whitespace-only string by '\n' or ' '
+_HTML_TEXT_ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+def _html_text_node(pieces):
+    '''Joins the pieces of a text node, collapsing it as BeautifulSoup does if whitespace-only'''
+    text = ''.join(pieces)
+    if text and not text.strip(_HTML_TEXT_ASCII_SPACES):
+        return '\n' if '\n' in text else ' '
+    return text
+
+def _html_to_text_tokenized(payload):
+    '''Text of 'payload' for simple markup, None if BeautifulSoup is needed'''
+    output = []
+    node = []
+    pos = 0
+    for match in _HTML_TEXT_TOKEN_RE.finditer(payload):
+        text = payload[pos:match.start()]
+        if '<' in text or '&' in text:
+            return None
+        node.append(text)
+        pos = match.end()
+
+        tag_name, entity = match.group(2), match.group(3)
+        if tag_name is not None:
+            if tag_name.lower() in _HTML_TEXT_SPECIAL_TAGS:
+                return None
+            output.append(_html_text_node(node))
+            node = []
+        elif entity[0] == '#':
+            if entity[1] in 'xX':
+                code_point = int(entity[2:], 16)
+            else:
+                code_point = int(entity[1:])
+            # Control characters, surrogates... are left to BeautifulSoup
+            if not (0x20 <= code_point < 0x7f or 0xa0 <= code_point < 0xd800 or 0xe000 <= code_point < 0xfdd0):
+                return None
+            node.append(chr(code_point))
+        else:
+            node.append(_HTML_TEXT_ENTITIES[entity])
+
+    text = payload[pos:]
+    if '<' in text or '&' in text:
+        return None
+    node.append(text)
+    output.append(_html_text_node(node))
+    return ''.join(output)
+
+@functools.lru_cache(maxsize=4096)
+def _html_to_text_cached(payload):
+    text = _html_to_text_tokenized(payload)
+    if text is None:
+        text = BeautifulSoup(payload, 'html.parser').text
+    return text
+
+def html_to_text(payload):
+    '''Returns the text of the HTML 'payload', as BeautifulSoup(payload, 'html.parser').text would.
+       Strings without '<' or '&' take a fast path, simple markup is handled by a compiled
+       tokenizer and the rest by BeautifulSoup. Results are memoized.
+    '''
+    if not isinstance(payload, str):
+        return BeautifulSoup(payload, 'html.parser').text
+    if '<' not in payload and '&' not in payload:
+        return _html_text_node((payload,))
+    return _html_to_text_cached(payload)
+
 #--------------------------------------------------------------------
 def get_next_unused_name(path):
     '''Checks if path exists, if it does, finds an unused name by appending -xx
@@ -68,8 +145,31 @@ def get_next_unused_name(path):
     return os.path.join(folder, new_name)
 
 #--------------------------------------------------------------------
-def open_sqlite_db_readonly(path):
-    '''Opens an sqlite db in read-only mode, so original db (and -wal/journal are intact)'''
+class SqliteOptions:
+    '''Run-wide options of open_sqlite_db_readonly(), set from the command line'''
+    # --immutable_db: open with immutable=1 (no locking, no -wal/-shm checks),
+    # map the whole file in memory and set SQLITE_IMMUTABLE_PRAGMAS. Only for
+    # extracted evidence copies: a db with a non-empty -wal file is still
+    # opened with mode=ro (and the SQLite defaults).
+    immutable = False
+
+def has_wal_content(path):
+    '''True if the db has a non-empty -wal file next to it'''
+    try:
+        return os.path.getsize(path + '-wal') > 0
+    except OSError:
+        return False
+
+def open_sqlite_db_readonly(path, immutable=None):
+    '''Opens an sqlite db in read-only mode, so original db (and -wal/journal are intact).
+       With 'immutable' (SqliteOptions.immutable if None), the db is opened with
+       immutable=1, memory mapped and with SQLITE_IMMUTABLE_PRAGMAS set'''
+    if immutable is None:
+        immutable = SqliteOptions.immutable
+    if immutable and has_wal_content(path):
+        logfunc(f'{path} has a -wal file: opened with mode=ro instead of immutable=1')
+        immutable = False
+    file_size = os.path.getsize(path) if immutable and os.path.isfile(path) else 0
 
     # -> "\\?\" -- Prefix for long path (> 260 chars)
     pre_for_long_path = "%5C%5C%3F%5C" 
@@ -92,7 +192,37 @@ def open_sqlite_db_readonly(path):
     # print(f"\npath='{path}'")
     # print(f"{'#'*80}")
 
-    return sqlite3.connect (f"file:{path}?mode=ro", uri=True)
+    if not immutable:
+        return sqlite3.connect (f"file:{path}?mode=ro", uri=True)
+
+    db = sqlite3.connect (f"file:{path}?mode=ro&immutable=1", uri=True)
+    # mmap_size is capped by SQLite itself (SQLITE_MAX_MMAP_SIZE)
+    db.execute(f'PRAGMA mmap_size = {file_size}')
+    for pragma in SQLITE_IMMUTABLE_PRAGMAS:
+        db.execute(pragma)
+    return db
+
+# Connections shared by the modules during the run: path -> connection
+_sqlite_connections = {}
+
+def get_sqlite_db(path):
+    '''Returns a read-only connection to 'path' (with SQLITE_READ_PRAGMAS set),
+       opened on the first call of the run and shared by the modules that
+       query the same db. Do not close it: see close_sqlite_dbs()'''
+    path = str(path)
+    db = _sqlite_connections.get(path)
+    if db is None:
+        db = open_sqlite_db_readonly(path)
+        for pragma in SQLITE_READ_PRAGMAS:
+            db.execute(pragma)
+        _sqlite_connections[path] = db
+    return db
+
+def close_sqlite_dbs():
+    '''Closes the connections opened by get_sqlite_db()'''
+    for db in _sqlite_connections.values():
+        db.close()
+    _sqlite_connections.clear()
 
 
 #--------------------------------------------------------------------
@@ -124,6 +254,214 @@ def does_table_exist(db, table_name):
         logfunc(f"Query error, query={query} Error={str(ex)}")
     return False
 
+#--------------------------------------------------------------------
+# Pragmas set on the connections of get_sqlite_db(): no writes
+SQLITE_READ_PRAGMAS = ('PRAGMA query_only = ON',)
+# Pragmas set on the immutable connections (--immutable_db) only:
+# sorts/temporary b-trees in memory and a 64 MB page cache
+SQLITE_IMMUTABLE_PRAGMAS = ('PRAGMA temp_store = MEMORY', 'PRAGMA cache_size = -65536')
+SQLITE_BATCH_SIZE = 1000   # rows fetched at once from a cursor
+
+class SqliteQuery:
+    '''Declares a report produced from one SQLite query (see run_sqlite_queries())
+       report_name : name of the HTML report (and of the TSV/timeline by default)
+       sql         : query, its columns are the rows of the report
+       headers     : column names of the report
+       transform   : optional function applied to each row; it returns the row
+                     to write or None to drop it
+       no_data_msg : logged when the query gives no row
+       tsvname     : TSV file name (report_name if None, '' for no TSV)
+       tlactivity  : timeline activity (no timeline if None)
+       html_no_escape : columns written to the HTML without escaping'''
+
+    def __init__(self, report_name, sql, headers, transform=None, no_data_msg=None,
+                 tsvname=None, tlactivity=None, html_no_escape=()):
+        self.report_name = report_name
+        self.sql = sql
+        self.headers = tuple(headers)
+        self.transform = transform
+        self.no_data_msg = no_data_msg or f'No {report_name} data available'
+        self.tsvname = report_name if tsvname is None else tsvname
+        self.tlactivity = tlactivity
+        self.html_no_escape = list(html_no_escape)
+
+def iter_query_batches(cursor, transform=None, batch_size=SQLITE_BATCH_SIZE):
+    '''Yields the rows of an executed cursor in lists (fetchmany()), transformed
+       and without the rows dropped by 'transform' (empty lists are not yielded)'''
+    for batch in iter_batches(cursor, batch_size):
+        if transform is not None:
+            batch = [row for row in map(transform, batch) if row is not None]
+            if not batch:
+                continue
+        yield batch
+
+def run_sqlite_query(report_folder, db, query, source_path, tsv_source=None):
+    '''Runs a SqliteQuery and streams its rows to the HTML report, TSV and timeline.
+       Returns the number of rows written'''
+    from scripts.artifact_report import ArtifactHtmlReport
+
+    report = None
+    num_rows = 0
+    try:
+        cursor = db.cursor()
+        cursor.row_factory = None
+        cursor.execute(query.sql)
+        for data_list in iter_query_batches(cursor, query.transform):
+            if report is None:
+                report = ArtifactHtmlReport(query.report_name)
+                report.start_artifact_report(report_folder, query.report_name)
+                report.add_script()
+                report.start_artifact_data_table(query.headers, source_path)
+            report.write_artifact_data_rows(data_list, html_no_escape=query.html_no_escape)
+            if query.tsvname:
+                tsv(report_folder, query.headers, data_list, query.tsvname, tsv_source)
+            if query.tlactivity:
+                timeline(report_folder, query.tlactivity, data_list, query.headers)
+            num_rows += len(data_list)
+    except sqlite3.Error as ex:
+        logfunc(f'Error reading {query.report_name} from {source_path}: {str(ex)}')
+
+    if report is not None:
+        report.end_artifact_data_table()
+        report.end_artifact_report()
+    else:
+        logfunc(query.no_data_msg)
+    return num_rows
+
+def run_sqlite_queries(report_folder, db_path, queries, source_path=None, tsv_source=None):
+    '''Runs the SqliteQuery objects of 'queries' on one db, through the connection
+       shared for the run (see get_sqlite_db()). 'source_path' is shown in the
+       reports (db_path if None), 'tsv_source' is written in the TSV files'''
+    source_path = source_path or db_path
+    try:
+        db = get_sqlite_db(db_path)
+    except (sqlite3.Error, OSError) as ex:
+        logfunc(f'Error opening {source_path}: {str(ex)}')
+        for query in queries:
+            logfunc(query.no_data_msg)
+        return
+    for query in queries:
+        run_sqlite_query(report_folder, db, query, source_path, tsv_source)
+
+#--------------------------------------------------------------------
+class EseDatabase:
+    '''An ESE database opened with pyesedb, with the table catalog and the
+       column maps of the tables cached. Use open_ese_db() to share it.'''
+
+    def __init__(self, path):
+        self.path = path
+        self.file_object = open(path, 'rb')
+        self.esedb_file = pyesedb.file()
+        self.esedb_file.open_file_object(self.file_object)
+        self.tables = {table.name: table for table in self.esedb_file.tables}
+        self.column_maps = {}
+
+    def get_table(self, table_name):
+        '''Returns the table (None if it does not exist)'''
+        return self.tables.get(table_name)
+
+    def get_column_map(self, table_name):
+        '''Returns {column name: index} for the table (empty if it does not exist)'''
+        column_map = self.column_maps.get(table_name)
+        if column_map is None:
+            table = self.get_table(table_name)
+            column_map = {}
+            if table is not None:
+                column_map = {table.get_column(i).name: i for i in range(table.number_of_columns)}
+            self.column_maps[table_name] = column_map
+        return column_map
+
+    def get_column_indexes(self, table_name, column_names):
+        '''Returns the index of each column of 'column_names' (None if missing)'''
+        column_map = self.get_column_map(table_name)
+        return tuple(column_map.get(name) for name in column_names)
+
+    def close(self):
+        self.esedb_file.close()
+        self.file_object.close()
+
+# ESE databases opened during the run: path -> EseDatabase
+_ese_databases = {}
+
+def open_ese_db(path):
+    '''Returns the EseDatabase of 'path', opened on the first call of the run'''
+    path = str(path)
+    ese_db = _ese_databases.get(path)
+    if ese_db is None:
+        ese_db = _ese_databases[path] = EseDatabase(path)
+    return ese_db
+
+def close_ese_dbs():
+    '''Closes the ESE databases opened by open_ese_db()'''
+    for ese_db in _ese_databases.values():
+        ese_db.close()
+    _ese_databases.clear()
+
+def forget_ese_dbs():
+    '''Drops the ESE databases inherited from the parent by a worker process,
+       without closing them (a forked process shares their file offsets)'''
+    _ese_databases.clear()
+
+def get_ese_data(record, index):
+    '''Returns the bytes of a column of an ESE record (long values included),
+       None if the column is missing or null'''
+    if index is None:
+        return None
+    if record.is_long_value(index):
+        return record.get_value_data_as_long_value(index).get_data()
+    return record.get_value_data(index)
+
+def get_ese_text(record, index):
+    '''Returns the UTF-16 text of a column of an ESE record (long values
+       included), '' if the column is missing or null'''
+    data = get_ese_data(record, index)
+    return data.decode('utf-16') if data else ''
+
+#--------------------------------------------------------------------
+BATCH_SIZE = 10000  # rows written at once to the HTML/TSV/timeline by the modules
+
+def iter_batches(rows, batch_size=BATCH_SIZE):
+    '''Yields the rows of 'rows' in lists of at most 'batch_size' rows (a sqlite3
+       cursor is read with fetchmany())'''
+    if isinstance(rows, sqlite3.Cursor):
+        return iter(functools.partial(rows.fetchmany, batch_size), [])
+    rows = iter(rows)
+    return iter(lambda: list(itertools.islice(rows, batch_size)), [])
+
+#--------------------------------------------------------------------
+# FILETIMEs (100 ns intervals since 1601-01-01) are converted with integer
+# arithmetic, the text of each day is only computed once
+FILE_TIME_EPOCH_ORDINAL = datetime.date(1601, 1, 1).toordinal()
+MICROSECONDS_PER_DAY = 86400 * 1000000
+
+# Day ordinal -> 'YYYY-MM-DD'
+_day_texts = {}
+
+def day_time_to_text(ordinal, microseconds):
+    '''Returns a day ordinal and the microseconds in that day as str(datetime)
+       prints them (None if the day is out of the datetime range)'''
+    day = _day_texts.get(ordinal)
+    if day is None:
+        try:
+            day = _day_texts[ordinal] = datetime.date.fromordinal(ordinal).isoformat()
+        except (ValueError, OverflowError):
+            return None
+    seconds, microseconds = divmod(microseconds, 1000000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if microseconds:
+        return f'{day} {hours:02d}:{minutes:02d}:{seconds:02d}.{microseconds:06d}'
+    return f'{day} {hours:02d}:{minutes:02d}:{seconds:02d}'
+
+def convert_file_time(file_time):
+    '''Returns the text of an integer FILETIME ('' if null, the integer itself
+       if out of the datetime range)'''
+    if file_time is None:
+        return ''
+    days, microseconds = divmod(file_time // 10, MICROSECONDS_PER_DAY)
+    text = day_time_to_text(FILE_TIME_EPOCH_ORDINAL + days, microseconds)
+    return text if text is not None else file_time
+
 class GuiWindow:
     '''This only exists to hold window handle if script is run from GUI'''
     window_handle = None # static variable 
@@ -207,7 +545,7 @@ def tsv(report_folder, data_headers, data_list, tsvname, source_file=None):
         os.makedirs(tsv_report_folder)
 
     if os.path.exists(os.path.join(tsv_report_folder, tsvname +'.tsv')):
-        with codecs.open(os.path.join(tsv_report_folder, tsvname +'.tsv'), 'a') as tsvfile:
+        with codecs.open(os.path.join(tsv_report_folder, tsvname +'.tsv'), 'a', 'utf-8') as tsvfile:
             tsv_writer = csv.writer(tsvfile, delimiter='\t')
             for i in data_list:
                 if source_file == None:
@@ -233,7 +571,8 @@ def tsv(report_folder, data_headers, data_list, tsvname, source_file=None):
                     tsv_writer.writerow(tuple(row_data))
             
 
-def timeline(report_folder, tlactivity, data_list, data_headers):
+def open_timeline_db(report_folder):
+    '''Opens (creating it if needed) the timeline DB _Timeline/tl.db of the report'''
     report_folder = report_folder.rstrip('/')
     report_folder = report_folder.rstrip('\\')
     report_folder_base, tail = os.path.split(report_folder)
@@ -257,6 +596,11 @@ def timeline(report_folder, tlactivity, data_list, data_headers):
         """
             )
         db.commit()
+    return db
+
+def timeline(report_folder, tlactivity, data_list, data_headers):
+    db = open_timeline_db(report_folder)
+    cursor = db.cursor()
     
     a = 0
     length = (len(data_list))
@@ -267,6 +611,32 @@ def timeline(report_folder, tlactivity, data_list, data_headers):
     db.commit()
     db.close()
     
+def timeline_intervals(report_folder, tlactivity, data_list, data_headers, start_index=0, end_index=1):
+    '''Bulk-loads events with a start and an end into the timeline DB.
+       Each row of 'data_list' is added to the 'data' table (key: start, as timeline() 
+       does) and to the 'intervals' table (start, end), in a single transaction. 
+       'intervals' is indexed on (start, end) for overlap queries, e.g. events of 
+       other artifacts within an interval: data.key BETWEEN intervals.start AND intervals.end'''
+    db = open_timeline_db(report_folder)
+    cursor = db.cursor()
+    cursor.execute('''CREATE TABLE IF NOT EXISTS intervals(start TEXT, end TEXT, activity TEXT, datalist TEXT)''')
+
+    def rows_gen(with_end):
+        for row in data_list:
+            modifiedList = str([f'{header}: {value}' for header, value in zip(data_headers, row)])
+            if with_end:
+                yield (str(row[start_index]), str(row[end_index]), tlactivity, modifiedList)
+            else:
+                yield (str(row[start_index]), tlactivity, modifiedList)
+
+    cursor.executemany("INSERT INTO data VALUES(?,?,?)", rows_gen(False))
+    cursor.executemany("INSERT INTO intervals VALUES(?,?,?,?)", rows_gen(True))
+    # Indexes are created after the bulk load (they are then built in one pass)
+    cursor.execute('''CREATE INDEX IF NOT EXISTS intervals_start_end ON intervals(start, end)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS data_key ON data(key)''')
+    db.commit()
+    db.close()
+    
 def kmlgen(report_folder, kmlactivity, data_list, data_headers):
     report_folder = report_folder.rstrip('/')
     report_folder = report_folder.rstrip('\\')
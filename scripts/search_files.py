@@ -8,10 +8,25 @@ from zipfile import ZipFile
 
 class FileSeekerBase:
     # This is an abstract base class
-    def search(self, filepattern_to_search, return_on_first_hit=False):
-        '''Returns a list of paths for files/folders that matched'''
+    def search(self, filepattern_to_search, return_on_first_hit=False, extract=True):
+        '''Returns a list of paths for files/folders that matched.
+           With extract=False, archive members are not written to the temp 
+           folder: the returned paths are where they would be extracted, and 
+           their content is read with open_file() (or written with extract_file())'''
         pass
 
+    def open_file(self, path):
+        '''Returns a binary file object with the content of the file at path'''
+        return open(path, 'rb')
+
+    def extract_file(self, path):
+        '''Makes sure 'path' exists on disk, returns its (real) path'''
+        return path
+
+    def is_virtual(self, path):
+        '''True if 'path' is an archive member that was not extracted'''
+        return False
+
     def cleanup(self):
         '''close any open handles'''
         pass
@@ -36,7 +51,7 @@ class FileSeekerDir(FileSeekerBase):
         except Exception as ex:
             logfunc(f'Error reading {directory} ' + str(ex))
 
-    def search(self, filepattern, return_on_first_hit=False):
+    def search(self, filepattern, return_on_first_hit=False, extract=True):
         if return_on_first_hit:
             for item in self._all_files:
                 if fnmatch.fnmatch(item, filepattern):
@@ -52,14 +67,21 @@ class FileSeekerTar(FileSeekerBase):
         self.tar_file = tarfile.open(tar_file_path, mode)
         self.temp_folder = temp_folder
         self.directory = temp_folder
+        # Not extracted members: path -> member
+        self.virtual_files = {}
 
-    def search(self, filepattern, return_on_first_hit=False):
+    def search(self, filepattern, return_on_first_hit=False, extract=True):
         pathlist = []
         for member in self.tar_file.getmembers():
             if fnmatch.fnmatch('root/' + member.name, filepattern):
                 try:
                     clean_name = sanitize_file_path(member.name)
                     full_path = os.path.join(self.temp_folder, Path(clean_name))
+                    if not extract:
+                        if member.isfile():
+                            self.virtual_files[full_path] = member
+                            pathlist.append(full_path)
+                        continue
                     if member.isdir():
                         os.makedirs(full_path, exist_ok=True)
                     else:
@@ -75,6 +97,23 @@ class FileSeekerTar(FileSeekerBase):
                     logfunc(f'Could not write file to filesystem, path was {member.name} ' + str(ex))
         return pathlist
 
+    def open_file(self, path):
+        if path in self.virtual_files:
+            return self.tar_file.extractfile(self.virtual_files[path])
+        return open(path, 'rb')
+
+    def is_virtual(self, path):
+        return path in self.virtual_files
+
+    def extract_file(self, path):
+        member = self.virtual_files.pop(path, None)
+        if member is not None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as fout:
+                fout.write(self.tar_file.extractfile(member).read())
+            os.utime(path, (member.mtime, member.mtime))
+        return path
+
     def cleanup(self):
         self.tar_file.close()
 
@@ -85,11 +124,19 @@ class FileSeekerZip(FileSeekerBase):
         self.name_list = self.zip_file.namelist()
         self.temp_folder = temp_folder
         self.directory = temp_folder
+        # Not extracted members: path -> member
+        self.virtual_files = {}
 
-    def search(self, filepattern, return_on_first_hit=False):
+    def search(self, filepattern, return_on_first_hit=False, extract=True):
         pathlist = []
         for member in self.name_list:
             if fnmatch.fnmatch('root/' + member, filepattern):
+                if not extract:
+                    if not member.endswith('/'):
+                        full_path = os.path.normpath(os.path.join(self.temp_folder, member.lstrip('/')))
+                        self.virtual_files[full_path] = member
+                        pathlist.append(full_path)
+                    continue
                 try:
                     extracted_path = self.zip_file.extract(member, path=self.temp_folder) # already replaces illegal chars with _ when exporting
                     pathlist.append(extracted_path)
@@ -98,5 +145,19 @@ class FileSeekerZip(FileSeekerBase):
                     logfunc(f'Could not write file to filesystem, path was {member} ' + str(ex))
         return pathlist
 
+    def open_file(self, path):
+        if path in self.virtual_files:
+            return self.zip_file.open(self.virtual_files[path])
+        return open(path, 'rb')
+
+    def is_virtual(self, path):
+        return path in self.virtual_files
+
+    def extract_file(self, path):
+        member = self.virtual_files.pop(path, None)
+        if member is not None:
+            path = self.zip_file.extract(member, path=self.temp_folder)
+        return path
+
     def cleanup(self):
         self.zip_file.close()
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import struct
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.artifacts.windowsCapability import build_db_image_with_WAL, C_IN_MEMORY_SUPPORTED
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE_DB = os.path.join(REPO_DIR, 'Examples-DB', 'CapabilityAccessManager', 'CapabilityAccessManager.db')
+CAM_DB = 'CapabilityAccessManager.db'
+
+
+def make_cam_db_with_wal(folder, num_commits=1):
+    '''Copies the example CAM DB to 'folder' with 'num_commits' committed transactions
+       in its WAL and the -shm of the writer, as they are found on a live system
+       (nothing checkpointed)'''
+    work_dir = tempfile.mkdtemp()
+    try:
+        work_path = os.path.join(work_dir, CAM_DB)
+        shutil.copy(EXAMPLE_DB, work_path)
+        conn = sqlite3.connect(work_path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA wal_autocheckpoint=0')
+        row = conn.execute('SELECT * FROM NonPackagedUsageHistory LIMIT 1').fetchone()
+        for _ in range(num_commits):
+            conn.execute(f"INSERT INTO NonPackagedUsageHistory VALUES ({','.join('?' * len(row))})", (None,) + row[1:])
+            conn.commit()
+        # Copied while the writer is still connected: the WAL is not checkpointed
+        os.makedirs(folder, exist_ok=True)
+        for suffix in ('', '-wal', '-shm'):
+            shutil.copy(work_path + suffix, os.path.join(folder, CAM_DB + suffix))
+        conn.close()
+    finally:
+        shutil.rmtree(work_dir)
+    return os.path.join(folder, CAM_DB)
+
+
+def md5_files(db_path):
+    hashes = {}
+    for suffix in ('', '-wal', '-shm'):
+        with open(db_path + suffix, 'rb') as f:
+            hashes[suffix] = hashlib.md5(f.read()).hexdigest()
+    return hashes
+
+
+class TestEvidenceNotModified(unittest.TestCase):
+
+    def test_db_wal_shm_unchanged(self):
+        '''Default ('copy') WAL merge mode: the evidence DB, -wal and -shm are only read'''
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_dir = os.path.join(tmp_dir, 'input')
+            db_path = make_cam_db_with_wal(os.path.join(input_dir, 'CapabilityAccessManager'))
+            hashes_before = md5_files(db_path)
+
+            subprocess.run([sys.executable, 'wleapp.py', '-t', 'fs', '-i', input_dir,
+                            '-o', os.path.join(tmp_dir, 'output'), '-m', 'windowsCapability'],
+                           cwd=REPO_DIR, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+            self.assertEqual(hashes_before, md5_files(db_path))
+
+
+def dump_usage_history(conn):
+    return conn.execute('SELECT * FROM NonPackagedUsageHistory ORDER BY rowid').fetchall()
+
+
+@unittest.skipUnless(C_IN_MEMORY_SUPPORTED, 'sqlite3 deserialize() needs Python 3.11+')
+class TestInMemoryWAL(unittest.TestCase):
+    '''The in-memory image of zip/tar inputs has the rows SQLite reads from the files'''
+
+    def compare_with_sqlite(self, db_path):
+        conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        try:
+            rows_sqlite = dump_usage_history(conn)
+        finally:
+            conn.close()
+
+        with open(db_path, 'rb') as f:
+            db_bytes = f.read()
+        with open(db_path + '-wal', 'rb') as f:
+            wal_bytes = f.read()
+        mem_db = sqlite3.connect(':memory:')
+        mem_db.deserialize(build_db_image_with_WAL(db_bytes, wal_bytes))
+        try:
+            self.assertEqual(rows_sqlite, dump_usage_history(mem_db))
+        finally:
+            mem_db.close()
+        return rows_sqlite
+
+    def test_valid_wal(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = make_cam_db_with_wal(tmp_dir, num_commits=3)
+            self.compare_with_sqlite(db_path)
+
+    def test_corrupted_last_commit_frame(self):
+        '''A frame whose checksum fails ends the WAL: its transaction is not applied'''
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = make_cam_db_with_wal(tmp_dir, num_commits=3)
+            rows_valid = self.compare_with_sqlite(db_path)
+
+            # Flips a byte of the page data of the last (commit) frame
+            with open(db_path + '-wal', 'r+b') as f:
+                wal = f.read()
+                page_size = struct.unpack('>I', wal[8:12])[0]
+                f.seek(len(wal) - page_size // 2)
+                f.write(bytes([wal[len(wal) - page_size // 2] ^ 0xff]))
+            # SQLite rebuilds its WAL index (and checks the frames) without a -shm
+            os.remove(db_path + '-shm')
+
+            self.assertEqual(rows_valid[:-1], self.compare_with_sqlite(db_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
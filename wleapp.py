@@ -1,5 +1,6 @@
 import argparse
 import io
+import multiprocessing
 import os
 import scripts.report as report
 import shutil
@@ -8,6 +9,7 @@ import traceback
 from scripts.search_files import *
 from scripts.ilapfuncs import *
 from scripts.ilap_artifacts import *
+from scripts.artifacts.pfirewall import FirewallOptions
 from scripts.version_info import wleapp_version
 from time import process_time, gmtime, strftime
 
@@ -26,6 +28,22 @@ def main():
     #---------------------------------------------
     parser.add_argument('-m', '--modules', nargs='+', required=False, action="store",
                 help=f'list the modules you would like to run, {[key for key, value in tosearch.items()]}')
+
+    #---------------------------------------------
+    # Command line option "--immutable_db".
+    # Opens the SQLite databases with immutable=1
+    # and memory mapped (extracted copies only)
+    #---------------------------------------------
+    parser.add_argument('--immutable_db', required=False, action="store_true",
+                help='open SQLite databases as immutable and memory mapped (only for extracted copies that no process writes to)')
+
+    #---------------------------------------------
+    # Command line option "--firewall_details".
+    # Writes every pfirewall row to the HTML report
+    # (by default the HTML has the summaries only)
+    #---------------------------------------------
+    parser.add_argument('--firewall_details', required=False, action="store_true",
+                help='also write every pfirewall.log entry to the Windows Firewall Logs HTML report (the TSV export always has them)')
         
     args = parser.parse_args()
     
@@ -107,6 +125,8 @@ def main():
             if output_path[1] == ':': output_path = '\\\\?\\' + output_path.replace('/', '\\')
 
         out_params = OutputParameters(output_path)
+        SqliteOptions.immutable = args.immutable_db
+        FirewallOptions.detailed_html = args.firewall_details
 
         crunch_artifacts(search_list, extracttype, input_path, out_params, 1, wrap_text)
 
@@ -165,7 +185,7 @@ def crunch_artifacts(search_list, extracttype, input_path, out_params, ratio, wr
         files_found = []
         log.write(f'<b>For {key} parser:</b>')
         for artifact_search_regex in search_regexes:
-            found = seeker.search(artifact_search_regex)
+            found = seeker.search(artifact_search_regex, extract=key not in tosearch_no_extract)
             if not found:
                 logfunc()
                 logfunc(f'No file found for {key} -> {artifact_search_regex}')
@@ -184,6 +204,8 @@ def crunch_artifacts(search_list, extracttype, input_path, out_params, ratio, wr
         categories_searched += 1
         GuiWindow.SetProgressBar(categories_searched * ratio)
     log.close()
+    close_ese_dbs()
+    close_sqlite_dbs()
 
     logfunc('')
     logfunc('Processes completed.')
@@ -207,4 +229,7 @@ def crunch_artifacts(search_list, extracttype, input_path, out_params, ratio, wr
     return True
 
 if __name__ == '__main__':
+    # Frozen (PyInstaller) exe: the process pool workers of the modules
+    # re-run the exe, which must not run main() again
+    multiprocessing.freeze_support()
     main()